@@ -9,6 +9,7 @@ from .enrolment import router as enrolment_router
 from .factory_reset_protection import router as factory_reset_protection_router
 from .internal_auth import router as internal_auth_router
 from .location import router as location_router
+from .metrics import router as metrics_router
 from .payment import router as payment_router
 from .plan import router as plan_router
 from .region import router as region_router
@@ -29,6 +30,7 @@ __all__ = [
     "enrolment_router",
     "internal_auth_router",
     "location_router",
+    "metrics_router",
     "payment_router",
     "plan_router",
     "region_router",
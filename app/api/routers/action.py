@@ -2,10 +2,21 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Path, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
+from app.core.config import settings
 from app.infra.postgres.models.action import ActionState
-from app.schemas.action import ActionCreate, ActionResponse, ActionUpdate
+from app.schemas.action import (
+    ActionBulkCreate,
+    ActionBulkCreateResponse,
+    ActionBulkStateResponse,
+    ActionBulkStateUpdate,
+    ActionClaimRequest,
+    ActionCreate,
+    ActionInDB,
+    ActionResponse,
+    ActionUpdate,
+)
 from app.services.action import action_service
 
 router = APIRouter()
@@ -13,10 +24,12 @@ router = APIRouter()
 
 @router.get("", response_model=List[ActionResponse], response_class=JSONResponse)
 async def get_all_actions(
+    response: Response,
     device_id: Optional[UUID] = None,
     state: Optional[ActionState] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     payload = {}
     if device_id:
@@ -24,15 +37,62 @@ async def get_all_actions(
     if state:
         payload["state"] = state
 
+    if cursor is not None:
+        actions, next_cursor = await action_service.get_page(
+            cursor=cursor, limit=limit, payload=payload
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return actions
+
     return await action_service.get_all(
         skip=skip, limit=limit, payload=payload, prefetch_fields=["applied_by__role"]
     )
 
+@router.get("/wait", response_model=List[ActionInDB], response_class=JSONResponse)
+async def wait_for_actions(
+    device_id: UUID,
+    timeout: int = Query(30, ge=0, le=settings.ACTION_WAIT_MAX_SECONDS, description="Segundos a esperar si no hay acciones pendientes"),
+    claim: bool = Query(False, description="Reclamar las acciones devueltas (estado claimed)"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Long-poll for a device: returns its pending actions right away, or waits
+    up to `timeout` seconds for one to be created. An empty list means the
+    timeout passed without new actions; the device should call again.
+    """
+    return await action_service.wait_for_actions(
+        device_id=device_id, timeout=timeout, claim=claim, limit=limit
+    )
+
 @router.post("", response_model=ActionResponse, response_class=JSONResponse, status_code=201)
 async def create_action(new_action: ActionCreate):
-    action = await action_service.create(obj_in=new_action)
-    await action.fetch_related("applied_by__role")
-    return action
+    return await action_service.create(obj_in=new_action)
+
+@router.post("/bulk", response_model=ActionBulkCreateResponse, response_class=JSONResponse, status_code=201)
+async def bulk_create_actions(bulk: ActionBulkCreate):
+    """
+    Queue the same action for many devices at once (a list of device ids or
+    every device of a store).
+    """
+    return await action_service.bulk_create(obj_in=bulk)
+
+@router.post("/claim", response_model=List[ActionInDB], response_class=JSONResponse)
+async def claim_pending_actions(claim: ActionClaimRequest):
+    """
+    Claim up to `limit` pending actions, oldest first, for dispatch. Claimed
+    actions move to "claimed"; concurrent dispatchers never get the same one.
+    Claims not confirmed within ACTION_CLAIM_TIMEOUT_SECONDS can be claimed again.
+    """
+    return await action_service.claim_pending(obj_in=claim)
+
+@router.post("/state", response_model=ActionBulkStateResponse, response_class=JSONResponse)
+async def bulk_update_action_state(update: ActionBulkStateUpdate):
+    """
+    Move many actions to a new state in one statement. Only valid
+    transitions are applied; the response lists the actions updated.
+    """
+    return await action_service.bulk_update_state(obj_in=update)
 
 @router.get("/{action_id}", response_model=ActionResponse, response_class=JSONResponse)
 async def get_action_by_id(action_id: UUID = Path(...)):
@@ -44,16 +104,9 @@ async def get_action_by_id(action_id: UUID = Path(...)):
 
 @router.patch("/{action_id}", response_model=ActionResponse, response_class=JSONResponse)
 async def update_action(action_id: UUID, update: ActionUpdate):
-    updated = await action_service.update(id=action_id, obj_in=update)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Action not found")
-
-    action = await action_service.get(id=action_id)
+    action = await action_service.update(id=action_id, obj_in=update)
     if not action:
-        # This case is unlikely if update succeeded, but good for safety
-        raise HTTPException(status_code=404, detail="Action not found after update")
-
-    await action.fetch_related("applied_by__role")
+        raise HTTPException(status_code=404, detail="Action not found")
     return action
 
 @router.delete("/{action_id}", response_class=JSONResponse)
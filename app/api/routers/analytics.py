@@ -31,9 +31,12 @@ async def get_analytics_by_date_range(
       - customers: conteo de clientes creados cada día
       - devices: conteo de dispositivos creados cada día
       - payments: valor total de pagos cada día
+      - payments_by_state: valor de los pagos de cada día por estado
       - vendors: conteo de vendedores creados cada día
     
     Si solo se proporciona start_date, obtiene datos desde esa fecha hasta hoy.
+    Los días ya consolidados se leen de daily_store_metrics; solo los
+    posteriores (normalmente hoy) se calculan en vivo.
     """
     analytics_data = await analytics_service.get_analytics_by_date_range(
         start_date=start_date,
@@ -66,7 +69,7 @@ async def download_analytics_excel(
     
     Si solo se proporciona start_date, obtiene datos desde esa fecha hasta hoy.
     """
-    excel_buffer = await analytics_service.generate_analytics_excel(
+    excel_file = await analytics_service.generate_analytics_excel(
         start_date=start_date,
         end_date=end_date,
         store_id=store_id
@@ -77,7 +80,7 @@ async def download_analytics_excel(
     filename = f"analytics_report_{start_date.strftime('%Y-%m-%d')}_to_{end_date_str}.xlsx"
     
     return StreamingResponse(
-        iter([excel_buffer.getvalue()]),
+        analytics_service.iter_excel_chunks(excel_file),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query
 from fastapi.responses import JSONResponse, Response
 
 from app.schemas.configuration import (
@@ -21,24 +21,35 @@ router = APIRouter()
     status_code=200,
 )
 async def get_all_configurations(key: str = None, store_id: UUID = None):
-    import sys
-    
     filters = {}
     if key:
         filters["key"] = key
-        print(f"DEBUG: Filtrando configuraciones por key={key}", file=sys.stderr)
-    
-    # Add store_id filter if provided
     if store_id:
         filters["store_id"] = store_id
-        print(f"DEBUG: Filtrando configuraciones por store_id={store_id}", file=sys.stderr)
-    
-    # Get configurations with all filters applied at database level
+
+    # Con store_id se sirve desde la caché de configuraciones
     configurations = await configuration_service.get_all(payload=filters) if filters else await configuration_service.get_all()
-    
+
     return configurations
 
 
+@router.get(
+    "/resolved",
+    response_class=JSONResponse,
+    response_model=List[ConfigurationDB],
+    status_code=200,
+)
+async def get_resolved_configurations(
+    store_id: Optional[UUID] = Query(None, description="Store whose values override the global ones"),
+    key: Optional[str] = Query(None, description="Resolve a single key"),
+):
+    """
+    Effective configuration of a store: the store's value for each key,
+    falling back to the global value (store_id null).
+    """
+    return await configuration_service.resolve(store_id=store_id, key=key)
+
+
 @router.post(
     "",
     response_class=JSONResponse,
@@ -1,13 +1,12 @@
 from typing import List, Optional
 from uuid import UUID
-import json
-import os
 
-from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi import APIRouter, Header, HTTPException, Path, Query
 from fastapi.responses import JSONResponse, Response
 
-from app.schemas.country import CountryCreate, CountryDB, CountryUpdate
+from app.schemas.country import CountryCreate, CountryDB, CountryTree, CountryUpdate
 from app.services.country import country_service
+from app.services.geography_cache import geography_cache
 
 router = APIRouter()
 
@@ -18,22 +17,29 @@ router = APIRouter()
     status_code=200,
 )
 async def get_all_countries_direct():
-    """Get all countries directly from the database without any filtering or pagination"""
-    from app.infra.postgres.models.country import Country
-    
-    # Query all countries directly from the model
-    countries = await Country.all()
-    
-    # Convert to list of dictionaries for the response
-    result = []
-    for country in countries:
-        result.append({
-            "name": country.name,
-            "code": country.code,
-            "country_id": country.country_id
-        })
-    
-    return result
+    """Get all countries without any filtering or pagination"""
+    return await country_service.get_all()
+
+
+@router.get(
+    "/tree",
+    response_class=Response,
+    response_model=List[CountryTree],
+    status_code=200,
+    responses={304: {"description": "Not Modified"}},
+)
+async def get_geography_tree(if_none_match: Optional[str] = Header(None)):
+    """
+    Full country -> region -> city tree. Sends an ETag; a request whose
+    If-None-Match matches it gets 304 without a body.
+    """
+    body, etag = await geography_cache.tree()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # Los proxies que comprimen pueden debilitar el ETag (W/"...")
+    tags = [tag.strip() for tag in (if_none_match or "").split(",")]
+    if etag in tags or f"W/{etag}" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get(
@@ -51,10 +57,9 @@ async def get_all_countries(name: Optional[str] = Query(None, description="Filte
         filters["name__icontains"] = name
     
     countries = await country_service.get_all(payload=filters)
-    logger.info(f"Retrieved {len(countries)} countries from database")
+    logger.info(f"Retrieved {len(countries)} countries")
     
-    # Ensure we're returning a list
-    return list(countries)
+    return countries
 
 
 @router.post(
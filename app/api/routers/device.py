@@ -19,9 +19,14 @@ router = APIRouter()
     status_code=200,
 )
 async def get_all_devices(
+    response: Response,
     enrolment_id: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
-    store_id: Optional[UUID] = Query(None, description="Filter devices by store_id of the user")
+    store_id: Optional[UUID] = Query(None, description="Filter devices by store_id of the user or vendor of the enrolment"),
+    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    limit: int = Query(100, ge=1, le=1000, description="Número de registros a devolver"),
+    include_total: bool = Query(False, description="Incluir el total de registros en el header X-Total-Count"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     import sys
     
@@ -37,26 +42,25 @@ async def get_all_devices(
         if user_id:
             payload["user_id"] = user_id
         
-        # Obtener dispositivos a través del servicio
-        devices = await device_service.get_all(payload=payload)
-        
-        # Si se proporciona store_id, filtrar los dispositivos donde el usuario en el enrollment pertenece a la tienda especificada
-        if store_id:
-            print(f"DEBUG: Filtering devices for store_id={store_id}", file=sys.stderr)
-            filtered_devices = []
-            for device in devices:
-                # Verificar si el dispositivo tiene un enrollment con usuario o vendedor asociado a la tienda
-                if device.enrolment and (
-                    (device.enrolment.user and device.enrolment.user.store_id == store_id) or
-                    (device.enrolment.vendor and device.enrolment.vendor.store_id == store_id)
-                ):
-                    filtered_devices.append(device)
-            
-            # Debug output
-            print(f"DEBUG: Filtered - Found {len(filtered_devices)} devices for store_id={store_id}", file=sys.stderr)
-            return filtered_devices
-        
+        # Obtener dispositivos; el filtro por tienda se aplica en la base de datos antes de paginar
+        if cursor is not None:
+            devices, next_cursor = await device_service.get_page(
+                cursor=cursor, limit=limit, payload=payload, store_id=store_id
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            devices = await device_service.get_all(
+                payload=payload, skip=skip, limit=limit, store_id=store_id
+            )
+
+        if include_total:
+            total = await device_service.count(payload=payload, store_id=store_id)
+            response.headers["X-Total-Count"] = str(total)
+
         return devices
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: Exception in get_all_devices: {str(e)}", file=sys.stderr)
         raise HTTPException(
@@ -82,14 +86,16 @@ async def create_device(new_device: DeviceCreate):
     response_model=CountResponse,
     status_code=200,
 )
-async def count_devices():
+async def count_devices(
+    store_id: Optional[UUID] = Query(None, description="Count only the devices of this store")
+):
     """
     Count the total number of devices in the system.
     
     Returns:
         CountResponse: Object containing the total count of devices
     """
-    count = await device_service.count()
+    count = await device_service.count(store_id=store_id)
     return {"count": count}
 
 
@@ -113,11 +119,9 @@ async def get_device_by_id(device_id: UUID = Path(...)):
     status_code=200,
 )
 async def update_device(update_device: DeviceUpdate, device_id: UUID = Path(...)):
-    updated = await device_service.update(id=device_id, obj_in=update_device)
-    if not updated:
+    device = await device_service.update(id=device_id, obj_in=update_device)
+    if not device:
         raise HTTPException(status_code=404, detail="Device not found")
-    
-    device = await device_service.get(id=device_id)
     return device
 
 
@@ -1,10 +1,12 @@
-from typing import List
+from typing import Any, List
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, Body, HTTPException, Path, Query
 from fastapi.responses import JSONResponse, Response
 
+from app.core.config import settings
 from app.schemas.enrolment import EnrolmentCreate, EnrolmentDB, EnrolmentUpdate
+from app.schemas.enrolment_bulk import EnrolmentBulkResponse
 from app.services.enrolment import enrolment_service
 
 router = APIRouter()
@@ -34,6 +36,29 @@ async def create_enrolment(new_enrolment: EnrolmentCreate):
     return enrolment
 
 
+@router.post(
+    "/bulk",
+    response_class=JSONResponse,
+    response_model=EnrolmentBulkResponse,
+    status_code=200,
+)
+async def bulk_create_enrolments(
+    items: List[Any] = Body(..., description="Complete enrollments: user, vendor, device, sims and plan"),
+    all_or_nothing: bool = Query(False, description="Reject the whole batch if any item is invalid"),
+):
+    """
+    Enroll a batch of devices in one transaction. Every item gets its own
+    status; invalid items do not prevent the rest from being stored unless
+    all_or_nothing is set.
+    """
+    if len(items) > settings.ENROLMENT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.ENROLMENT_BULK_MAX_ITEMS} enrollments per request",
+        )
+    return await enrolment_service.bulk_create(items=items, all_or_nothing=all_or_nothing)
+
+
 @router.get(
     "/{enrolment_id}",
     response_class=JSONResponse,
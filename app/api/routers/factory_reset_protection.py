@@ -8,6 +8,8 @@ from app.infra.postgres.models.factory_reset_protection import (
     FactoryResetProtectionState,
 )
 from app.schemas.factory_reset_protection import (
+    FactoryResetProtectionBatchQuery,
+    FactoryResetProtectionBatchResponse,
     FactoryResetProtectionCreate,
     FactoryResetProtectionResponse,
     FactoryResetProtectionUpdate,
@@ -82,6 +84,31 @@ async def get_factory_reset_by_account_id(
     return factoryReset
 
 
+@router.post(
+    "/batch",
+    response_model=FactoryResetProtectionBatchResponse,
+    response_class=JSONResponse,
+)
+async def get_factory_resets_batch(query: FactoryResetProtectionBatchQuery):
+    """
+    Look up many accounts at once by account id and/or email, optionally
+    within one store. Unknown values are listed in missing_account_ids and
+    missing_emails.
+    """
+    found, missing_account_ids, missing_emails = (
+        await factory_reset_protection_service.lookup(
+            account_ids=query.account_ids,
+            emails=query.emails,
+            store_id=query.store_id,
+        )
+    )
+    return FactoryResetProtectionBatchResponse(
+        found=found,
+        missing_account_ids=missing_account_ids,
+        missing_emails=missing_emails,
+    )
+
+
 @router.patch(
     "/{factory_reset_protection_id}",
     response_model=FactoryResetProtectionResponse,
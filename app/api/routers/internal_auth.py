@@ -1,11 +1,19 @@
 from typing import Optional
 
-from fastapi import APIRouter, Header, HTTPException, status
-from passlib.context import CryptContext
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel
 
+from app.core.database import pool_stats, read_router
+from app.core.query_stats import route_query_stats
 from app.infra.postgres.models.user import User, UserState
 from app.schemas.user import UserCreate
+from app.services.action_hub import action_hub
+from app.services.cache_invalidation import invalidation_bus
+from app.services.configuration_cache import configuration_cache
+from app.services.credential_cache import INVALID, credential_cache, publish_invalidation
+from app.services.factory_reset_protection_cache import factory_reset_protection_cache
+from app.services.geography_cache import geography_cache
+from app.services.password import password_service
 
 # Dependency to ensure endpoint is only accessible internally
 
@@ -24,9 +32,6 @@ router = APIRouter(
     include_in_schema=False,  # ocultar en /docs públicas
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 # -------------------- helpers actualizados -----------------------
 
 
@@ -64,13 +69,31 @@ class VerifyBody(BaseModel):
 
 @router.post("/auth/verify")
 async def verify_credentials(body: VerifyBody):
-    """Verify username & password. Returns {valid: bool, user: ...}."""
+    """Verify username & password. Returns {valid: bool, user: ...}.
+
+    Results are served from the credential cache when possible; misses run
+    the query and bcrypt verification and store the outcome.
+    """
+    cached = credential_cache.get(body.username, body.password)
+    if cached is INVALID:
+        return {"valid": False, "user": None}
+    if cached is not None:
+        return {"valid": True, "user": cached}
+
+    generation = credential_cache.generation
     user = await User.filter(username=body.username).prefetch_related("role").first()
 
-    if not user or not pwd_context.verify(body.password, user.password):
+    if not user:
+        credential_cache.set_unknown_user(body.username, generation=generation)
         return {"valid": False, "user": None}
 
-    return {"valid": True, "user": _user_to_response(user)}
+    if not await password_service.verify(body.password, user.password):
+        credential_cache.set_invalid(body.username, body.password, generation=generation)
+        return {"valid": False, "user": None}
+
+    data = _user_to_response(user)
+    credential_cache.set_valid(body.username, body.password, data, generation=generation)
+    return {"valid": True, "user": data}
 
 
 # ------------------- Alta interna de usuario ---------------------
@@ -88,12 +111,52 @@ async def create_internal_user(new_user: UserCreate):
         raise HTTPException(status_code=400, detail="Email already exists")
 
     # Hash password & save
-    hashed_pw = pwd_context.hash(new_user.password)
+    hashed_pw = await password_service.hash(new_user.password)
     user_obj = new_user.dict()
     user_obj["password"] = hashed_pw
 
     # Create user
     user = await User.create(**user_obj)
+    await publish_invalidation(username=user.username)
     await user.fetch_related("role")
 
     return _user_to_response(user, include_password=False)
+
+
+# ------------------- Métricas del pool de hashing ----------------
+
+
+@router.get("/internal/hash-pool", dependencies=[Depends(_internal_only)])
+async def get_hash_pool_stats():
+    """Return queue depth and timing counters of the password hashing pool."""
+    return password_service.stats()
+
+
+@router.get("/internal/credential-cache", dependencies=[Depends(_internal_only)])
+async def get_credential_cache_stats():
+    """Return size and hit counters of the /auth/verify credential cache."""
+    return credential_cache.stats()
+
+
+@router.get("/internal/db-pool", dependencies=[Depends(_internal_only)])
+async def get_db_pool_stats():
+    """Return pool counters per connection and the read replica routing status."""
+    return {"pools": pool_stats(), "replica": read_router.stats()}
+
+
+@router.get("/internal/query-stats", dependencies=[Depends(_internal_only)])
+async def get_query_stats():
+    """Return SQL statement counts, DB time and slowest statements per route."""
+    return route_query_stats.snapshot()
+
+
+@router.get("/internal/caches", dependencies=[Depends(_internal_only)])
+async def get_cache_stats():
+    """Return counters of the caches, the invalidation bus and the action long-poll waiters."""
+    return {
+        "action_waiters": action_hub.stats(),
+        "configuration": configuration_cache.stats(),
+        "factory_reset_protection": factory_reset_protection_cache.stats(),
+        "geography": geography_cache.stats(),
+        "invalidation": invalidation_bus.stats(),
+    }
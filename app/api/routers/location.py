@@ -1,10 +1,19 @@
+import json
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query, Request
 from fastapi.responses import JSONResponse, Response
 
-from app.schemas.location import LocationCreate, LocationDB, LocationUpdate
+from app.core.config import settings
+from app.schemas.location import (
+    LocationBulkResponse,
+    LocationCreate,
+    LocationDB,
+    LocationLatestRequest,
+    LocationUpdate,
+)
 from app.services.location import location_service
 
 router = APIRouter()
@@ -16,12 +25,17 @@ router = APIRouter()
     response_model=List[LocationDB],
     status_code=200,
 )
-async def get_all_locations(device_id: Optional[UUID] = None):
-    payload = {}
-    if device_id:
-        payload["device_id"] = device_id
-    locations = await location_service.get_all(payload=payload)
-    return locations
+async def get_all_locations(
+    device_id: Optional[UUID] = None,
+    since: Optional[datetime] = Query(None, description="Desde (inclusive) esta fecha"),
+    until: Optional[datetime] = Query(None, description="Hasta (exclusive) esta fecha"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    # Acotar por fecha limita la consulta a las particiones mensuales del rango
+    return await location_service.get_history(
+        device_id=device_id, since=since, until=until, skip=skip, limit=limit
+    )
 
 
 @router.post(
@@ -35,6 +49,60 @@ async def create_location(new_location: LocationCreate):
     return location
 
 
+@router.post(
+    "/bulk",
+    response_class=JSONResponse,
+    response_model=LocationBulkResponse,
+    status_code=200,
+)
+async def create_locations_bulk(request: Request):
+    """
+    Insert a batch of location pings sent as a JSON array or as NDJSON
+    (Content-Type: application/x-ndjson, one object per line). Every item
+    gets its own status; invalid items do not prevent the rest from being
+    stored.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type:
+        items = []
+        for number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(f"Invalid JSON on line {number}")
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=422, detail="Expected a JSON array of locations")
+
+    if len(items) > settings.LOCATION_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.LOCATION_BULK_MAX_ITEMS} locations per request",
+        )
+    return await location_service.bulk_create(items=items)
+
+
+@router.post(
+    "/latest",
+    response_class=JSONResponse,
+    response_model=List[LocationDB],
+    status_code=200,
+)
+async def get_latest_locations(body: LocationLatestRequest):
+    """
+    Return the last known location of each requested device. Devices without
+    locations are omitted.
+    """
+    return await location_service.get_last_by_device_ids(body.device_ids)
+
+
 @router.get(
     "/{location_id}",
     response_class=JSONResponse,
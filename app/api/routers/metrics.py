@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+# Fuera de /api/v1, en la ruta que espera el scraper de Prometheus
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
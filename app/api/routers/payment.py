@@ -1,7 +1,7 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 
@@ -20,11 +20,14 @@ async def create_payment(new_payment: PaymentCreate):
 
 @router.get("", response_class=JSONResponse, status_code=200)
 async def get_all_payments(
+    response: Response,
     plan_id: Optional[UUID] = Query(None),
     device_id: Optional[UUID] = Query(None),
-    store_id: Optional[UUID] = Query(None, description="Filter payments by store_id of the user"),
+    store_id: Optional[UUID] = Query(None, description="Filter payments by store_id of the user or vendor of the plan"),
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
-    limit: int = Query(100, ge=1, le=1000, description="Número de registros a devolver")
+    limit: int = Query(100, ge=1, le=1000, description="Número de registros a devolver"),
+    include_total: bool = Query(False, description="Incluir el total de registros en el header X-Total-Count"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     import sys
     
@@ -39,24 +42,25 @@ async def get_all_payments(
         if device_id:
             payload["device_id"] = device_id
             
-        # Obtener todos los pagos con los filtros básicos
-        payments = await crud_payment.get_all(skip=skip, limit=limit, payload=payload)
-        
-        # Si se proporciona store_id, filtrar pagos donde el usuario o vendedor del plan pertenece a la tienda especificada
-        if store_id:
-            print(f"DEBUG: Filtering payments for store_id={store_id}", file=sys.stderr)
-            filtered_payments = []
-            for payment in payments:
-                # Verificar si el pago tiene un plan con usuario o vendedor asociado a la tienda
-                if payment.plan and (
-                    (payment.plan.user and payment.plan.user.store_id == store_id) or
-                    (payment.plan.vendor and payment.plan.vendor.store_id == store_id)
-                ):
-                    filtered_payments.append(payment)
-            
-            # Debug output
-            print(f"DEBUG: Filtered - Found {len(filtered_payments)} payments for store_id={store_id}", file=sys.stderr)
-            payments = filtered_payments
+        # Obtener los pagos; el filtro por tienda se aplica en la base de datos antes de paginar
+        if cursor is not None:
+            # Por cursor los pagos se recorren en orden ascendente de fecha
+            try:
+                payments, next_cursor = await crud_payment.get_page(
+                    cursor=cursor, limit=limit, payload=payload, store_id=store_id
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            payments = await crud_payment.get_all(
+                skip=skip, limit=limit, payload=payload, store_id=store_id
+            )
+
+        if include_total:
+            total = await crud_payment.count(payload=payload, store_id=store_id)
+            response.headers["X-Total-Count"] = str(total)
         
         # Format the response
         payment_list = []
@@ -105,6 +109,8 @@ async def get_all_payments(
             payment_list.append(payment_dict)
         
         return payment_list
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: Exception in get_all_payments: {str(e)}", file=sys.stderr)
         raise HTTPException(
@@ -121,26 +127,10 @@ async def get_payment_by_id(payment_id: UUID = Path(...)):
 
 @router.patch("/{payment_id}", response_class=JSONResponse, response_model=PaymentResponse, status_code=200)
 async def update_payment(payment_id: UUID, payment_update: PaymentUpdate):
-    # Verificamos si el pago existe antes de intentar actualizarlo
-    payment_exists = await crud_payment.get_by_id(_id=payment_id)
-    if not payment_exists:
-        raise HTTPException(status_code=404, detail="Payment not found")
-        
-    # Verificamos si hay datos para actualizar
-    update_data = payment_update.dict(exclude_unset=True)
-    if not update_data:
-        # Si no hay datos para actualizar, simplemente devolvemos el pago existente
-        return payment_exists
-        
-    # Si hay datos para actualizar, procedemos con la actualización
-    updated = await crud_payment.update(id=payment_id, obj_in=payment_update)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Payment not found")
-        
-    # Recupera el payment actualizado
-    payment = await crud_payment.get_by_id(_id=payment_id)
+    # Sin datos devuelve el pago actual; en ambos casos con las relaciones de la respuesta
+    payment = await crud_payment.update(id=payment_id, obj_in=payment_update)
     if not payment:
-        raise HTTPException(status_code=404, detail="Payment not found after update")
+        raise HTTPException(status_code=404, detail="Payment not found")
     return payment
 
 @router.delete("/{payment_id}", status_code=204)
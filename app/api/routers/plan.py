@@ -1,10 +1,18 @@
+from datetime import date
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Path, Query, status
+from fastapi import APIRouter, HTTPException, Path, Query, Response, status
 from fastapi.responses import JSONResponse
 
-from app.schemas.payment import PlanCreate, PlanUpdate, PlanDB, PlanResponse
+from app.schemas.payment import (
+    PlanCreate,
+    PlanDB,
+    PlanInstallment,
+    PlanOverdue,
+    PlanResponse,
+    PlanUpdate,
+)
 from app.infra.postgres.crud.plan import crud_plan
 
 router = APIRouter()
@@ -16,9 +24,14 @@ async def create_plan(new_plan: PlanCreate):
 
 @router.get("", response_class=JSONResponse, response_model=List[PlanResponse], status_code=200)
 async def get_all_plans(
+    response: Response,
     device_id: Optional[UUID] = Query(None, description="Filter plans by device_id"),
     user_id: Optional[UUID] = Query(None, description="Filter plans by user_id"),
-    store_id: Optional[UUID] = Query(None, description="Filter plans by store_id")
+    store_id: Optional[UUID] = Query(None, description="Filter plans by store_id of the user or vendor"),
+    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    limit: int = Query(100, ge=1, le=1000, description="Número de registros a devolver"),
+    include_total: bool = Query(False, description="Incluir el total de registros en el header X-Total-Count"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     import sys
     
@@ -34,33 +47,31 @@ async def get_all_plans(
         if user_id:
             payload["user_id"] = user_id
         
-        # Definir campos a precargar
-        prefetch_fields = [
-            "user", "user__role", "user__store",
-            "vendor", "vendor__role", "vendor__store",
-            "device", "device__enrolment", 
-            "device__enrolment__user", "device__enrolment__user__role",
-            "device__enrolment__vendor", "device__enrolment__vendor__role"
-        ]
-        
-        # Obtener todos los planes con los filtros básicos
-        plans = await crud_plan.get_all(payload=payload, prefetch_fields=prefetch_fields)
-        
-        # Si se proporciona store_id, filtrar planes donde el usuario o vendedor pertenece a la tienda especificada
-        if store_id:
-            print(f"DEBUG: Filtering plans for store_id={store_id}", file=sys.stderr)
-            filtered_plans = []
-            for plan in plans:
-                # Verificar si el plan tiene un usuario o vendedor asociado a la tienda
-                if (plan.user and plan.user.store_id == store_id) or \
-                   (plan.vendor and plan.vendor.store_id == store_id):
-                    filtered_plans.append(plan)
-            
-            # Debug output
-            print(f"DEBUG: Filtered - Found {len(filtered_plans)} plans for store_id={store_id}", file=sys.stderr)
-            plans = filtered_plans
-        
+        # Obtener los planes; el filtro por tienda se aplica en la base de datos antes de paginar
+        if cursor is not None:
+            try:
+                plans, next_cursor = await crud_plan.get_page(
+                    cursor=cursor, limit=limit, payload=payload, store_id=store_id
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            plans = await crud_plan.get_all(
+                skip=skip,
+                limit=limit,
+                payload=payload,
+                store_id=store_id,
+            )
+
+        if include_total:
+            total = await crud_plan.count(payload=payload, store_id=store_id)
+            response.headers["X-Total-Count"] = str(total)
+
         return plans
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: Exception in get_all_plans: {str(e)}", file=sys.stderr)
         raise HTTPException(
@@ -68,6 +79,44 @@ async def get_all_plans(
             detail=f"Error retrieving plans: {str(e)}"
         )
 
+@router.get("/overdue", response_class=JSONResponse, response_model=List[PlanOverdue], status_code=200)
+async def get_overdue_plans(
+    response: Response,
+    store_id: Optional[UUID] = Query(None, description="Filter plans by store_id of the user or vendor"),
+    as_of: Optional[date] = Query(None, description="Fecha de corte (por defecto, hoy)"),
+    min_days_overdue: int = Query(0, ge=0, description="Días mínimos desde la primera cuota vencida sin pagar"),
+    limit: int = Query(100, ge=1, le=1000, description="Número de registros a devolver"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); devuelve X-Next-Cursor"),
+):
+    """
+    Plans with unpaid installments due on `as_of`, with their delinquency
+    status, ordered by plan_id and paginated by cursor.
+    """
+    try:
+        plans, next_cursor = await crud_plan.get_overdue(
+            as_of=as_of or date.today(),
+            store_id=store_id,
+            min_days_overdue=min_days_overdue,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return plans
+
+@router.get("/{plan_id}/schedule", response_class=JSONResponse, response_model=List[PlanInstallment], status_code=200)
+async def get_plan_schedule(
+    plan_id: UUID = Path(...),
+    as_of: Optional[date] = Query(None, description="Fecha de corte (por defecto, hoy)"),
+):
+    """Installment calendar of a plan with the status of each installment."""
+    installments = await crud_plan.get_schedule(plan_id=plan_id, as_of=as_of or date.today())
+    if not installments:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return installments
+
 @router.get("/{plan_id}", response_class=JSONResponse, response_model=PlanResponse, status_code=200)
 async def get_plan_by_id(plan_id: UUID = Path(...)):
     # Create a custom method in the CRUD class to get a plan with all related data
@@ -85,40 +134,11 @@ async def get_plan_by_id(plan_id: UUID = Path(...)):
 
 @router.patch("/{plan_id}", response_class=JSONResponse, response_model=PlanResponse, status_code=200)
 async def update_plan(plan_id: UUID, plan_update: PlanUpdate):
-    # Primero verificamos si el plan existe
-    plan = await crud_plan.model.filter(plan_id=plan_id).prefetch_related(
-        "user", "user__role", 
-        "vendor", "vendor__role", 
-        "device", "device__enrolment", 
-        "device__enrolment__user", "device__enrolment__user__role",
-        "device__enrolment__vendor", "device__enrolment__vendor__role"
-    ).first()
-    
+    # Sin datos devuelve el plan actual; en ambos casos con las relaciones de la respuesta
+    plan = await crud_plan.update(id=plan_id, obj_in=plan_update)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
-    
-    # Verificamos si hay datos para actualizar
-    update_data = plan_update.dict(exclude_unset=True)
-    if not update_data:
-        # Si no hay datos para actualizar, simplemente devolvemos el plan sin modificar
-        return plan
-    
-    # Si hay datos para actualizar, procedemos con la actualización
-    updated = await crud_plan.update(id=plan_id, obj_in=plan_update)
-    if not updated:
-        # Esto no debería ocurrir ya que verificamos que el plan existe
-        raise HTTPException(status_code=500, detail="Failed to update plan")
-    
-    # Recuperamos el plan actualizado con todas las relaciones
-    updated_plan = await crud_plan.model.filter(plan_id=plan_id).prefetch_related(
-        "user", "user__role", 
-        "vendor", "vendor__role", 
-        "device", "device__enrolment", 
-        "device__enrolment__user", "device__enrolment__user__role",
-        "device__enrolment__vendor", "device__enrolment__vendor__role"
-    ).first()
-    
-    return updated_plan
+    return plan
 
 @router.delete("/{plan_id}", status_code=204)
 async def delete_plan(plan_id: UUID = Path(...)):
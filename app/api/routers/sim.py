@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Body, HTTPException, Path, Query, Response, status
@@ -19,9 +19,16 @@ router = APIRouter()
     description="Retrieve a list of all SIM cards with pagination.",
 )
 async def get_all_sims(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Opaque pagination cursor (empty for the first page); ignores skip and returns X-Next-Cursor"),
 ):
+    if cursor is not None:
+        sims, next_cursor = await sim_service.get_page(cursor=cursor, limit=limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return sims
     return await sim_service.get_all(skip=skip, limit=limit)
 
 
@@ -20,11 +20,20 @@ router = APIRouter()
     status_code=200,
 )
 async def get_all_stores(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     admin_id: Optional[UUID] = None,
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     """Obtener todas las tiendas con información del país incluida"""
+    if cursor is not None:
+        stores, next_cursor = await store_service.get_page_with_country(
+            cursor=cursor, limit=limit
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return stores
     stores = await store_service.get_all_with_country(skip=skip, limit=limit)
     return stores
 
@@ -3,17 +3,14 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Path, Query, Request
 from fastapi.responses import JSONResponse, Response
-from passlib.context import CryptContext
 
 from app.schemas.user import UserCreate, UserUpdate
 from app.schemas.user_out import UserOut
+from app.services.password import password_service
 from app.services.user import user_service
 
 router = APIRouter()
 
-# bcrypt context
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 @router.get(
     "/",
@@ -23,12 +20,14 @@ pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 )
 async def get_all_users(
     request: Request,
+    response: Response,
     role_name: Optional[str] = Query(None, description="Filtrar por nombre de rol"),
     state: Optional[str] = Query(None, description="Filtrar por estado del usuario (Active/Inactive)"),
     name: Optional[str] = Query(None, description="Filtrar por nombre o apellido del usuario"),
     store_id: Optional[UUID] = Query(None, description="Filtrar por ID de tienda"),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor opaco de paginación (vacío para la primera página); ignora skip y devuelve X-Next-Cursor"),
 ):
     """Obtiene todos los usuarios con sus roles resueltos. Permite filtrar y paginar."""
     payload = {}
@@ -36,17 +35,27 @@ async def get_all_users(
         payload["role__name__iexact"] = role_name
     if state:
         payload["state__iexact"] = state
+    q_filter = None
     if name:
         # Implementamos una búsqueda que incluya tanto nombre como apellido
         from tortoise.expressions import Q
-        return await user_service.get_all_with_filter(
-            Q(first_name__icontains=name) | Q(last_name__icontains=name),
-            payload=payload,
-            skip=skip,
-            limit=limit
-        )
+        q_filter = Q(first_name__icontains=name) | Q(last_name__icontains=name)
+        if cursor is None:
+            return await user_service.get_all_with_filter(
+                q_filter,
+                payload=payload,
+                skip=skip,
+                limit=limit
+            )
     if store_id:
         payload["store_id"] = store_id
+    if cursor is not None:
+        users, next_cursor = await user_service.get_page(
+            cursor=cursor, limit=limit, payload=payload, q_filter=q_filter
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return users
     users = await user_service.get_all(payload=payload, skip=skip, limit=limit)
     return users
 
@@ -59,7 +68,7 @@ async def get_all_users(
 )
 async def create_user(new_user: UserCreate):
     """Crea un nuevo usuario (hashea la contraseña antes de guardarla)."""
-    hashed_password = pwd_ctx.hash(new_user.password)
+    hashed_password = await password_service.hash(new_user.password)
     user_data_with_hashed_pass = new_user.copy(update={"password": hashed_password})
 
     user = await user_service.create(obj_in=user_data_with_hashed_pass)
@@ -89,7 +98,7 @@ async def get_user_by_id(user_id: UUID = Path(...)):
 async def update_user(user_id: UUID, user_in: UserUpdate):
     """Actualiza un usuario."""
     if user_in.password:
-        user_in.password = pwd_ctx.hash(user_in.password)
+        user_in.password = await password_service.hash(user_in.password)
 
     user = await user_service.update(id=user_id, obj_in=user_in)
     if user is None:
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from pydantic import BaseSettings
 
 
@@ -12,6 +14,96 @@ class Settings(BaseSettings):
     # Database Settings
     POSTGRES_DATABASE_URL: str
     DEFAULT_DATA: bool = False
+    # Pool de conexiones asyncpg (por proceso). Las conexiones inactivas más
+    # de POSTGRES_POOL_MAX_INACTIVE_SECONDS se cierran (0 = nunca) y esperar
+    # una conexión libre más de POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS falla
+    # (0 = sin límite)
+    POSTGRES_POOL_MIN_SIZE: int = 2
+    POSTGRES_POOL_MAX_SIZE: int = 10
+    POSTGRES_POOL_MAX_INACTIVE_SECONDS: float = 300.0
+    POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 10.0
+    # Caché de sentencias preparadas por conexión (0 la desactiva, necesario
+    # detrás de pgbouncer en modo transacción)
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    POSTGRES_STATEMENT_CACHE_LIFETIME_SECONDS: int = 300
+    # Tiempo máximo por sentencia en el servidor y en el cliente (0 = sin límite)
+    POSTGRES_STATEMENT_TIMEOUT_MS: int = 30000
+    POSTGRES_COMMAND_TIMEOUT_SECONDS: float = 60.0
+    POSTGRES_APPLICATION_NAME: str = "smartpay-db"
+    # Réplica de solo lectura para listados, conteos y analytics (vacío = todo
+    # al primario). Si su retraso supera REPLICA_MAX_LAG_SECONDS o no responde,
+    # las lecturas vuelven al primario; el estado se comprueba cada
+    # REPLICA_CHECK_INTERVAL_SECONDS
+    POSTGRES_REPLICA_DATABASE_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Query Instrumentation Settings: sentencias SQL por petición (Server-Timing,
+    # /metrics y /internal/query-stats). Se avisa en el log cuando una petición
+    # supera el presupuesto de su ruta (QUERY_BUDGETS, p. ej.
+    # {"GET /api/v1/plans": 5}; 0 = sin presupuesto) o repite la misma
+    # sentencia QUERY_REPEAT_THRESHOLD veces (posible N+1)
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_BUDGET_DEFAULT: int = 25
+    QUERY_BUDGETS: Dict[str, int] = {}
+    QUERY_REPEAT_THRESHOLD: int = 10
+    QUERY_STATS_SLOWEST: int = 3
+
+    # Metrics Settings (/metrics): latencia por ruta y código de estado,
+    # peticiones en curso, pools de BD y retraso del event loop, medido cada
+    # EVENT_LOOP_LAG_INTERVAL_SECONDS
+    REQUEST_METRICS_ENABLED: bool = True
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
+    # Password Hashing Settings
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" o "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+
+    # Credential Cache Settings (/auth/verify); TTL 0 desactiva la caché
+    CREDENTIAL_CACHE_TTL_SECONDS: float = 30
+    CREDENTIAL_CACHE_NEGATIVE_TTL_SECONDS: float = 5
+    CREDENTIAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Geography Cache Settings (países/regiones/ciudades); TTL 0 desactiva la caché
+    GEOGRAPHY_CACHE_TTL_SECONDS: float = 300
+
+    # Configuration Cache Settings (por tienda + globales); TTL 0 desactiva la caché
+    CONFIGURATION_CACHE_TTL_SECONDS: float = 300
+
+    # Factory Reset Protection lookup cache (consultas por cuenta/email); TTL 0 la desactiva
+    FRP_LOOKUP_CACHE_TTL_SECONDS: float = 30
+    FRP_LOOKUP_CACHE_MAX_ENTRIES: int = 50000
+
+    # Cache Invalidation Settings: "postgres" (LISTEN/NOTIFY entre procesos) o "local"
+    CACHE_INVALIDATION_BACKEND: str = "postgres"
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    CACHE_INVALIDATION_HEALTHCHECK_SECONDS: float = 30
+
+    # Action Queue Settings: una acción reclamada sin confirmar vuelve a poder
+    # reclamarse pasado este tiempo (despachador caído)
+    ACTION_CLAIM_TIMEOUT_SECONDS: int = 300
+    # Espera máxima de GET /actions/wait (long-poll de los dispositivos)
+    ACTION_WAIT_MAX_SECONDS: int = 60
+
+    # Enrolment Settings (matrícula masiva)
+    ENROLMENT_BULK_MAX_ITEMS: int = 1000
+
+    # Location Ingestion Settings
+    LOCATION_BULK_MAX_ITEMS: int = 5000
+    # Particiones mensuales de location: meses creados por adelantado, meses
+    # conservados (0 = sin retención) e intervalo del mantenimiento en la app
+    # (0 = solo al arrancar)
+    LOCATION_PARTITION_MONTHS_AHEAD: int = 3
+    LOCATION_RETENTION_MONTHS: int = 12
+    LOCATION_PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 21600
+
+    # Analytics Rollup Settings (daily_store_metrics): intervalo de la
+    # consolidación en la app (0 = solo al arrancar), días ya consolidados que
+    # se recalculan en cada pasada (escrituras tardías) y días por transacción
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 3600
+    ANALYTICS_ROLLUP_RESEAL_DAYS: int = 2
+    ANALYTICS_ROLLUP_BATCH_DAYS: int = 31
 
     class Config:
         env_file = ".env"
@@ -1,12 +1,375 @@
-from tortoise import Tortoise
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlparse
+
+import asyncpg
+from tortoise import Tortoise, connections
+from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+from tortoise.backends.base.client import BaseDBAsyncClient, TransactionContextPooled
+from tortoise.backends.base.config_generator import expand_db_url
 
 from app.core.config import settings
+from app.core.query_stats import record_query
 
+logger = logging.getLogger(__name__)
 
-async def init_db():
-    await Tortoise.init(
-        db_url=settings.POSTGRES_DATABASE_URL,
-        modules={"models": ["app.infra.postgres.models"]},
+MODELS_MODULES = ["app.infra.postgres.models"]
+PRIMARY = "default"
+REPLICA = "replica"
+# Esquemas de URL que Tortoise sirve con asyncpg
+ASYNCPG_SCHEMES = ("postgres", "asyncpg")
+
+# Retraso de la réplica en segundos; 0 si ha aplicado todo lo recibido y NULL
+# si no es una réplica (por ejemplo, una segunda base local en pruebas)
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END AS lag
+"""
+
+
+class RequestScope:
+    """
+    Read routing state of the current request.
+    """
+
+    __slots__ = ("wrote", "force_primary")
+
+    def __init__(self, *, force_primary: bool = False) -> None:
+        self.wrote = False
+        self.force_primary = force_primary
+
+
+_request_scope: ContextVar[Optional[RequestScope]] = ContextVar("db_request_scope", default=None)
+
+
+def mark_write() -> None:
+    """
+    Record that the current request wrote to the primary, so its later
+    reads are not sent to a replica that may not have the write yet.
+    """
+    scope = _request_scope.get()
+    if scope is not None:
+        scope.wrote = True
+
+
+def _is_write(query: str) -> bool:
+    return query.lstrip()[:6].upper() not in ("SELECT", "SHOW")
+
+
+class InstrumentedPool(asyncpg.Pool):
+    """
+    asyncpg pool that counts how long callers wait for a free connection and
+    applies a default acquire timeout (Tortoise acquires without one).
+    """
+
+    def __init__(self, *args: Any, acquire_timeout: Optional[float] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+        self.acquired = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.acquire_timeouts = 0
+
+    async def _acquire(self, timeout):
+        if timeout is None:
+            timeout = self.acquire_timeout
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = time.perf_counter()
+        try:
+            connection = await super()._acquire(timeout)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+            waited = time.perf_counter() - started
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.acquired += 1
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        size = self.get_size()
+        idle = self.get_idle_size()
+        return {
+            "min_size": self.get_min_size(),
+            "max_size": self.get_max_size(),
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "saturation": round((size - idle) / self.get_max_size(), 3),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquired": self.acquired,
+            "acquire_timeouts": self.acquire_timeouts,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "avg_wait_ms": round(self.wait_seconds * 1000 / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+class QueryHooksMixin:
+    """
+    Hooks on every statement a Tortoise client runs: times it for the
+    request's query stats and, unless it is a read, marks the request for
+    read-your-writes.
+    """
+
+    async def execute_insert(self, query: str, values: list) -> Any:
+        mark_write()
+        started = time.perf_counter()
+        try:
+            return await super().execute_insert(query, values)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    async def execute_many(self, query: str, values: list) -> None:
+        mark_write()
+        started = time.perf_counter()
+        try:
+            return await super().execute_many(query, values)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    async def execute_query(self, query: str, values: Optional[list] = None) -> Any:
+        if _is_write(query):
+            mark_write()
+        started = time.perf_counter()
+        try:
+            return await super().execute_query(query, values)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    async def execute_query_dict(self, query: str, values: Optional[list] = None) -> Any:
+        if _is_write(query):
+            mark_write()
+        started = time.perf_counter()
+        try:
+            return await super().execute_query_dict(query, values)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    async def execute_script(self, query: str) -> None:
+        mark_write()
+        started = time.perf_counter()
+        try:
+            return await super().execute_script(query)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+class InstrumentedTransactionWrapper(QueryHooksMixin, TransactionWrapper):
+    pass
+
+
+class InstrumentedAsyncpgDBClient(QueryHooksMixin, AsyncpgDBClient):
+    """
+    Tortoise asyncpg client with the statement hooks of QueryHooksMixin, also
+    inside transactions, and a pool that counts connection waits.
+    """
+
+    def __init__(self, *args: Any, acquire_timeout: Optional[float] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+
+    def _in_transaction(self):
+        mark_write()
+        return TransactionContextPooled(InstrumentedTransactionWrapper(self))
+
+    async def create_pool(self, **kwargs: Any) -> asyncpg.Pool:
+        # Valores por defecto de asyncpg.create_pool que el constructor de Pool exige
+        kwargs.setdefault("max_queries", 50000)
+        kwargs.setdefault("max_inactive_connection_lifetime", 300.0)
+        kwargs.setdefault("setup", None)
+        kwargs.setdefault("init", None)
+        kwargs.setdefault("record_class", asyncpg.Record)
+        return await InstrumentedPool(None, acquire_timeout=self.acquire_timeout, **kwargs)
+
+
+# Tortoise carga el cliente desde el módulo indicado en "engine"
+client_class = InstrumentedAsyncpgDBClient
+
+
+def connection_config(db_url: str) -> Union[str, Dict[str, Any]]:
+    """
+    Tortoise connection settings for `db_url` with the pool, statement cache
+    and timeout settings from Settings. Only PostgreSQL URLs served by
+    asyncpg use them; any other URL (e.g. sqlite://:memory:) is returned
+    unchanged.
+    """
+    if urlparse(db_url).scheme not in ASYNCPG_SCHEMES:
+        return db_url
+    credentials = dict(expand_db_url(db_url)["credentials"])
+    server_settings = dict(credentials.pop("server_settings", None) or {})
+    if settings.POSTGRES_STATEMENT_TIMEOUT_MS > 0:
+        server_settings["statement_timeout"] = str(settings.POSTGRES_STATEMENT_TIMEOUT_MS)
+    credentials.update(
+        minsize=settings.POSTGRES_POOL_MIN_SIZE,
+        maxsize=settings.POSTGRES_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=settings.POSTGRES_POOL_MAX_INACTIVE_SECONDS,
+        acquire_timeout=settings.POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS or None,
+        statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        max_cached_statement_lifetime=settings.POSTGRES_STATEMENT_CACHE_LIFETIME_SECONDS,
+        command_timeout=settings.POSTGRES_COMMAND_TIMEOUT_SECONDS or None,
+        application_name=settings.POSTGRES_APPLICATION_NAME,
+        server_settings=server_settings,
     )
+    return {"engine": "app.core.database", "credentials": credentials}
+
+
+def tortoise_config() -> Dict[str, Any]:
+    """
+    Tortoise configuration shared by the app, the scripts and register_tortoise.
+    The replica connection is only registered if POSTGRES_REPLICA_DATABASE_URL is set.
+    """
+    db_connections = {PRIMARY: connection_config(settings.POSTGRES_DATABASE_URL)}
+    if settings.POSTGRES_REPLICA_DATABASE_URL:
+        db_connections[REPLICA] = connection_config(settings.POSTGRES_REPLICA_DATABASE_URL)
+    return {
+        "connections": db_connections,
+        "apps": {
+            "models": {
+                "models": MODELS_MODULES,
+                "default_connection": PRIMARY,
+            },
+        },
+    }
+
+
+async def init_db():
+    await Tortoise.init(config=tortoise_config())
     # Skip schema generation since we've already applied migrations manually
     # await Tortoise.generate_schemas()
+    await warm_pool()
+    if read_router.enabled:
+        await read_router.check_replica()
+
+
+async def warm_pool() -> None:
+    """
+    Open the pool now (POSTGRES_POOL_MIN_SIZE connections) instead of on the
+    first request.
+    """
+    await Tortoise.get_connection(PRIMARY).execute_query("SELECT 1")
+
+
+class ReadRouter:
+    """
+    Chooses the connection for read-only queries (CRUDBase listings, get and
+    count, analytics). Reads go to the replica unless:
+
+    - no replica is configured, or it is unreachable or lagging more than
+      REPLICA_MAX_LAG_SECONDS;
+    - the query runs inside a transaction;
+    - the current request already wrote (read-your-writes) or asked for the
+      primary with the header X-Read-Consistency: primary.
+    """
+
+    def __init__(self) -> None:
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.POSTGRES_REPLICA_DATABASE_URL)
+
+    def read_db(self) -> BaseDBAsyncClient:
+        primary = connections.get(PRIMARY)
+        if self.enabled and self.healthy and not isinstance(primary, TransactionWrapper):
+            scope = _request_scope.get()
+            if scope is None or not (scope.wrote or scope.force_primary):
+                self.replica_reads += 1
+                return connections.get(REPLICA)
+        self.primary_reads += 1
+        return primary
+
+    async def check_replica(self) -> None:
+        """
+        Measure the replica lag and decide whether it can serve reads.
+        """
+        try:
+            rows = await connections.get(REPLICA).execute_query_dict(REPLICA_LAG_SQL)
+            lag = rows[0]["lag"]
+            self.lag = float(lag) if lag is not None else 0.0
+            healthy = self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+        except Exception as e:
+            self.lag = None
+            healthy = False
+            logger.warning(f"No se pudo comprobar la réplica de lectura: {e}")
+        if healthy != self.healthy:
+            logger.info(f"Réplica de lectura {'activa' if healthy else 'desactivada'} (lag={self.lag})")
+        self.healthy = healthy
+        self.checked_at = time.time()
+
+    async def run(self) -> None:
+        """
+        Check the replica every REPLICA_CHECK_INTERVAL_SECONDS until cancelled.
+        """
+        while self.enabled:
+            await asyncio.sleep(settings.REPLICA_CHECK_INTERVAL_SECONDS)
+            await self.check_replica()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": settings.REPLICA_MAX_LAG_SECONDS,
+            "checked_at": self.checked_at,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+read_router = ReadRouter()
+
+
+def read_db() -> BaseDBAsyncClient:
+    """
+    Connection for a read-only query; see ReadRouter.
+    """
+    return read_router.read_db()
+
+
+class ReadConsistencyMiddleware:
+    """
+    Gives each HTTP request its own read routing scope (see ReadRouter).
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        consistency = dict(scope["headers"]).get(b"x-read-consistency", b"")
+        token = _request_scope.set(
+            RequestScope(force_primary=consistency.lower() == b"primary")
+        )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Size, saturation and wait counters of each connection pool.
+    """
+    stats: Dict[str, Any] = {}
+    for name in connections.db_config:
+        pool = getattr(connections.get(name), "_pool", None)
+        stats[name] = pool.stats() if isinstance(pool, InstrumentedPool) else None
+    return stats
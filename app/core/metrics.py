@@ -0,0 +1,162 @@
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+Collector = Callable[[], Dict[Tuple[str, ...], float]]
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of labels. Observations are a dict
+    update; rendering happens only when /metrics is scraped. With `collect`,
+    the values are read from it at scrape time (totals another object
+    already keeps).
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def samples(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Gauge:
+    """
+    Value that goes up and down. With `collect`, the values are read from
+    it when /metrics is scraped (e.g. the size of a pool) instead of being
+    set by the code.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, labels: Tuple[str, ...] = (), value: float = 0.0) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: Tuple[str, ...] = (), value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def dec(self, labels: Tuple[str, ...] = (), value: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - value
+
+    def samples(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets. An observation is a
+    binary search over the bucket bounds and two additions; the cumulative
+    counts Prometheus expects are built when /metrics is scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [recuento de cada cubeta (la última es +Inf), suma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...] = (), value: float = 0.0) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(labelnames, labels + (_number(bound),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,249 @@
+import json
+import logging
+import re
+import time
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+# Forma de una sentencia: literales y parámetros sustituidos por ? y listas
+# IN (...) colapsadas, para agrupar las que solo cambian de valores
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+SQL_PREVIEW_LENGTH = 300
+
+db_queries_total = registry.register(
+    Counter("smartpay_db_queries_total", "SQL statements run per route.", ("route",))
+)
+db_query_seconds_total = registry.register(
+    Counter("smartpay_db_query_seconds_total", "Time spent in SQL statements per route.", ("route",))
+)
+db_query_budget_exceeded_total = registry.register(
+    Counter(
+        "smartpay_db_query_budget_exceeded_total",
+        "Requests that ran more statements than their route's query budget.",
+        ("route",),
+    )
+)
+db_repeated_statements_total = registry.register(
+    Counter(
+        "smartpay_db_repeated_statements_total",
+        "Requests that repeated one statement shape QUERY_REPEAT_THRESHOLD times or more (likely N+1).",
+        ("route",),
+    )
+)
+
+
+def statement_shape(sql: str) -> str:
+    shape = _STRING_RE.sub("?", sql)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _LIST_RE.sub("(?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class RequestQueries:
+    """
+    SQL statements run while serving one request.
+    """
+
+    __slots__ = ("count", "seconds", "slowest", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # (segundos, sentencia) de las más lentas, de mayor a menor
+        self.slowest: List[Tuple[float, str]] = []
+        self.statements: List[str] = []
+
+    def record(self, sql: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements.append(sql)
+        slowest = self.slowest
+        if len(slowest) < settings.QUERY_STATS_SLOWEST or seconds > slowest[-1][0]:
+            slowest.append((seconds, sql))
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            del slowest[settings.QUERY_STATS_SLOWEST:]
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        """
+        Statement shapes run at least QUERY_REPEAT_THRESHOLD times, most repeated first.
+        """
+        counts = ShapeCounter(statement_shape(sql) for sql in self.statements)
+        return [
+            (shape, count)
+            for shape, count in counts.most_common()
+            if count >= settings.QUERY_REPEAT_THRESHOLD
+        ]
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def record_query(sql: str, seconds: float) -> None:
+    """
+    Account a statement to the request being served, if any.
+    """
+    queries = _current.get()
+    if queries is not None:
+        queries.record(sql, seconds)
+
+
+def _preview(sql: str) -> str:
+    sql = _SPACE_RE.sub(" ", sql).strip()
+    return sql if len(sql) <= SQL_PREVIEW_LENGTH else sql[:SQL_PREVIEW_LENGTH] + "..."
+
+
+class RouteQueryStats:
+    """
+    Per-route aggregate of the statements run by each request, with the
+    slowest statements seen on the route.
+    """
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self, route: str, queries: RequestQueries, *, budget_exceeded: bool, repeated: bool
+    ) -> None:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_ms": 0.0,
+                "budget_exceeded": 0,
+                "repeated_statements": 0,
+                "slowest": [],
+            }
+        stats["requests"] += 1
+        stats["queries"] += queries.count
+        stats["max_queries"] = max(stats["max_queries"], queries.count)
+        stats["db_ms"] += queries.seconds * 1000
+        stats["budget_exceeded"] += budget_exceeded
+        stats["repeated_statements"] += repeated
+        slowest = stats["slowest"] + [
+            (round(seconds * 1000, 3), _preview(sql)) for seconds, sql in queries.slowest
+        ]
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        stats["slowest"] = slowest[: settings.QUERY_STATS_SLOWEST]
+
+    def snapshot(self) -> Dict[str, Any]:
+        result = {}
+        for route, stats in sorted(self._routes.items()):
+            requests = stats["requests"]
+            result[route] = {
+                **stats,
+                "db_ms": round(stats["db_ms"], 3),
+                "avg_queries": round(stats["queries"] / requests, 2),
+                "budget": query_budget(route),
+                "slowest": [{"ms": ms, "sql": sql} for ms, sql in stats["slowest"]],
+            }
+        return result
+
+
+route_query_stats = RouteQueryStats()
+
+
+def query_budget(route: str) -> int:
+    return settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET_DEFAULT)
+
+
+_route_cache: Dict[Tuple[Any, str], str] = {}
+
+
+def route_template(scope: dict) -> str:
+    """
+    "METHOD /path/{param}" of the route that served the request, from the
+    endpoint the router stored in the scope.
+    """
+    endpoint = scope.get("endpoint")
+    method = scope.get("method", "")
+    if endpoint is None:
+        return f"{method} unmatched"
+    key = (endpoint, method)
+    route = _route_cache.get(key)
+    if route is None:
+        route = f"{method} {scope.get('path', '')}"
+        for candidate in getattr(scope.get("app"), "routes", []):
+            if getattr(candidate, "endpoint", None) is endpoint and method in (
+                getattr(candidate, "methods", None) or {method}
+            ):
+                route = f"{method} {candidate.path}"
+                break
+        _route_cache[key] = route
+    return route
+
+
+def finish_request(scope: dict, queries: RequestQueries) -> None:
+    """
+    Aggregate a finished request and warn if it went over its query budget
+    or repeated a statement shape (likely N+1).
+    """
+    route = route_template(scope)
+    db_queries_total.inc((route,), queries.count)
+    db_query_seconds_total.inc((route,), queries.seconds)
+
+    budget = query_budget(route)
+    budget_exceeded = 0 < budget < queries.count
+    if budget_exceeded:
+        db_query_budget_exceeded_total.inc((route,))
+        logger.warning(
+            f"{route} ejecutó {queries.count} sentencias (presupuesto {budget}, "
+            f"{queries.seconds * 1000:.1f} ms en BD); más lentas: "
+            + json.dumps([_preview(sql) for _, sql in queries.slowest], ensure_ascii=False)
+        )
+    repeated = queries.repeated_shapes()
+    if repeated:
+        db_repeated_statements_total.inc((route,))
+        shape, count = repeated[0]
+        logger.warning(f"{route} repitió {count} veces la sentencia (posible N+1): {_preview(shape)}")
+    route_query_stats.add(
+        route, queries, budget_exceeded=budget_exceeded, repeated=bool(repeated)
+    )
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL statements and DB time of each request, reports them in
+    the Server-Timing header and aggregates them per route.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries()
+        token = _current.set(queries)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                timing = (
+                    f'db;dur={queries.seconds * 1000:.3f};desc="{queries.count} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.3f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            finish_request(scope, queries)
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Any, Dict, Tuple
+
+from app.core.config import settings
+from app.core.database import pool_stats
+from app.core.metrics import Counter, Gauge, Histogram, registry
+from app.core.query_stats import route_template
+
+http_request_duration_seconds = registry.register(
+    Histogram(
+        "smartpay_http_request_duration_seconds",
+        "Time to serve a request, per route template and status code.",
+        ("route", "status"),
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("smartpay_http_requests_in_flight", "Requests being served right now.")
+)
+event_loop_lag_seconds = registry.register(
+    Histogram(
+        "smartpay_event_loop_lag_seconds",
+        "Delay of the event loop in running a scheduled callback.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+event_loop_last_lag_seconds = registry.register(
+    Gauge("smartpay_event_loop_last_lag_seconds", "Last measured event loop delay.")
+)
+
+
+def _pool_values(field: str):
+    def collect() -> Dict[Tuple[str, ...], float]:
+        return {(name,): stats[field] for name, stats in pool_stats().items() if stats is not None}
+
+    return collect
+
+
+for _field, _documentation in (
+    ("size", "Open connections in the pool."),
+    ("max_size", "Maximum connections of the pool."),
+    ("idle", "Idle connections in the pool."),
+    ("in_use", "Connections checked out of the pool."),
+    ("waiting", "Callers waiting for a free connection."),
+):
+    registry.register(
+        Gauge(f"smartpay_db_pool_{_field}", _documentation, ("pool",), collect=_pool_values(_field))
+    )
+registry.register(
+    Counter(
+        "smartpay_db_pool_acquired_total",
+        "Connections handed out by the pool.",
+        ("pool",),
+        collect=_pool_values("acquired"),
+    )
+)
+registry.register(
+    Counter(
+        "smartpay_db_pool_acquire_wait_seconds_total",
+        "Time callers spent waiting for a connection.",
+        ("pool",),
+        collect=_pool_values("wait_seconds"),
+    )
+)
+registry.register(
+    Counter(
+        "smartpay_db_pool_acquire_timeouts_total",
+        "Connection acquisitions that timed out.",
+        ("pool",),
+        collect=_pool_values("acquire_timeouts"),
+    )
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    Observes the latency of each request per route template and status
+    code, and counts the requests in flight.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.REQUEST_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration_seconds.observe(
+                (route_template(scope), str(status)), time.perf_counter() - started
+            )
+
+
+async def monitor_event_loop_lag() -> None:
+    """
+    Measure how late the event loop wakes up from a sleep of
+    EVENT_LOOP_LAG_INTERVAL_SECONDS until cancelled. A blocking call in a
+    handler shows up here as lag for every request served by the process.
+    """
+    loop = asyncio.get_running_loop()
+    interval = settings.EVENT_LOOP_LAG_INTERVAL_SECONDS
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - expected, 0.0)
+        event_loop_lag_seconds.observe((), lag)
+        event_loop_last_lag_seconds.set((), lag)
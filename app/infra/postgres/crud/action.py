@@ -1,18 +1,166 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
 
 from app.infra.postgres.crud.base import CRUDBase
 from app.infra.postgres.models.action import Action
 from app.schemas.action import ActionCreate, ActionUpdate
 
+ACTION_COLUMNS = (
+    '"action_id", "device_id", "state", "applied_by_id", "action", "description", '
+    '"created_at", "updated_at"'
+)
+
+CLAIMED_COLUMNS = ", ".join("a." + column.strip() for column in ACTION_COLUMNS.split(","))
+
+# Inserta una acción por dispositivo existente; con $6 omite los que ya tienen
+# una acción del mismo tipo pendiente o reclamada.
+BULK_INSERT_ACTIONS_SQL = f"""
+INSERT INTO "action" ({ACTION_COLUMNS})
+SELECT t.action_id, t.device_id, 'pending', $3::uuid, $4::varchar, $5::varchar, now(), now()
+FROM unnest($1::uuid[], $2::uuid[]) AS t(action_id, device_id)
+JOIN "device" d ON d."device_id" = t.device_id
+WHERE NOT $6::boolean OR NOT EXISTS (
+    SELECT 1 FROM "action" a
+    WHERE a."device_id" = t.device_id
+      AND a."action" = $4::varchar
+      AND a."state" IN ('pending', 'claimed')
+)
+RETURNING "action_id", "device_id"
+"""
+
+# Acciones reclamables: pendientes, o reclamadas hace más de $2 segundos sin
+# confirmar. SKIP LOCKED permite a varios despachadores reclamar en paralelo
+# sin bloquearse ni repartirse la misma acción.
+_CLAIMABLE = """
+    ("state" = 'pending'
+     OR ("state" = 'claimed' AND "updated_at" < now() - make_interval(secs => $2)))
+"""
+
+CLAIM_ACTIONS_SQL = f"""
+WITH claimable AS (
+    SELECT "action_id" FROM "action"
+    WHERE {_CLAIMABLE}
+    ORDER BY "created_at", "action_id"
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE "action" a SET "state" = 'claimed', "updated_at" = now()
+FROM claimable c
+WHERE a."action_id" = c."action_id"
+RETURNING {CLAIMED_COLUMNS}
+"""
+
+CLAIM_DEVICE_ACTIONS_SQL = f"""
+WITH claimable AS (
+    SELECT "action_id" FROM "action"
+    WHERE "device_id" = ANY($3::uuid[]) AND {_CLAIMABLE}
+    ORDER BY "created_at", "action_id"
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE "action" a SET "state" = 'claimed', "updated_at" = now()
+FROM claimable c
+WHERE a."action_id" = c."action_id"
+RETURNING {CLAIMED_COLUMNS}
+"""
+
+BULK_UPDATE_STATE_SQL = """
+UPDATE "action"
+SET "state" = $2, "description" = COALESCE($3, "description"), "updated_at" = now()
+WHERE "action_id" = ANY($1::uuid[]) AND "state" = ANY($4::varchar[])
+RETURNING "action_id"
+"""
+
 
 class CRUDAction(CRUDBase[Action, ActionCreate, ActionUpdate]):
+    # Relaciones que necesita ActionResponse tras crear o actualizar
+    response_related_fields = ("applied_by__role",)
+
     async def get_all(
         self, *, skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None, prefetch_fields: Optional[List[str]] = None
     ) -> List[Action]:
-        query = self.model.all().prefetch_related("applied_by__role")
-        if filters:
-            query = query.filter(**filters)
+        query = self.list_query(payload=filters)
         return await query.offset(skip).limit(limit)
 
+    def list_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Optional[Any] = None
+    ):
+        return self.filter_query(payload=payload, store_id=store_id).prefetch_related(
+            "applied_by__role"
+        )
+
+    async def get_pending_by_device(self, *, device_id: UUID, limit: int = 100) -> List[Action]:
+        return await (
+            self.model.filter(device_id=device_id, state="pending")
+            .order_by("created_at", "action_id")
+            .limit(limit)
+        )
+
+    async def get_device_ids(self, *, action_ids: Sequence[UUID]) -> List[UUID]:
+        return await self.model.filter(action_id__in=list(action_ids)).distinct().values_list(
+            "device_id", flat=True
+        )
+
+    async def bulk_create(
+        self,
+        *,
+        action_ids: Sequence[UUID],
+        device_ids: Sequence[UUID],
+        applied_by_id: UUID,
+        action: str,
+        description: Optional[str],
+        skip_if_pending: bool,
+    ) -> List[Dict[str, Any]]:
+        """
+        Queue one pending action per device in a single statement. Returns
+        the inserted (action_id, device_id) rows; devices that do not exist
+        or (with skip_if_pending) already have the same action queued are left out.
+        """
+        if not device_ids:
+            return []
+        return await self.model._meta.db.execute_query_dict(
+            BULK_INSERT_ACTIONS_SQL,
+            [list(action_ids), list(device_ids), applied_by_id, action, description, skip_if_pending],
+        )
+
+    async def claim_pending(
+        self,
+        *,
+        device_ids: Optional[Sequence[UUID]] = None,
+        limit: int = 100,
+        claim_timeout: int = 300,
+    ) -> List[Action]:
+        """
+        Atomically move up to `limit` claimable actions, oldest first, to
+        "claimed" and return them. Limited to `device_ids` if given.
+        """
+        if device_ids is not None:
+            rows = await self.model._meta.db.execute_query_dict(
+                CLAIM_DEVICE_ACTIONS_SQL, [limit, claim_timeout, list(device_ids)]
+            )
+        else:
+            rows = await self.model._meta.db.execute_query_dict(
+                CLAIM_ACTIONS_SQL, [limit, claim_timeout]
+            )
+        rows.sort(key=lambda row: (row["created_at"], row["action_id"]))
+        return [self.model._init_from_db(**row) for row in rows]
+
+    async def bulk_update_state(
+        self,
+        *,
+        action_ids: Sequence[UUID],
+        state: str,
+        from_states: Sequence[str],
+        description: Optional[str] = None,
+    ) -> List[UUID]:
+        """
+        Move the given actions to `state` in one statement, only those
+        currently in one of `from_states`. Returns the ids updated.
+        """
+        rows = await self.model._meta.db.execute_query_dict(
+            BULK_UPDATE_STATE_SQL, [list(action_ids), state, description, list(from_states)]
+        )
+        return [row["action_id"] for row in rows]
+
 
 crud_action = CRUDAction(model=Action)
@@ -1,11 +1,55 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+import logging
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
+from fastapi import HTTPException
+from tortoise import timezone
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+from app.core.database import read_db
 from app.schemas.general import CreateSchemaType, ModelType, UpdateSchemaType
 
 IdType = TypeVar("IdType")
 
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the ordering values of the last row of a page as an opaque cursor.
+    """
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):  # type: ignore
+    # Rutas de relaciones que vinculan el modelo con una tienda. Un registro
+    # pertenece a la tienda si cualquiera de las rutas coincide con el store_id.
+    store_scope_fields: Tuple[str, ...] = ()
+    # Relaciones a uno que necesita la respuesta de create/update. Se cargan
+    # con un único SELECT con JOINs después de la escritura; si está vacío la
+    # escritura no hace ninguna consulta adicional.
+    response_related_fields: Tuple[str, ...] = ()
+    # Campo que, junto con la clave primaria, da el orden estable de la
+    # paginación por cursor. Si el modelo no lo tiene se ordena solo por pk.
+    cursor_field: Optional[str] = "created_at"
+
     def __init__(self, *, model: Type[ModelType]) -> None:
         self.model = model
         # Get the primary key field name from the model
@@ -14,13 +58,54 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):  # type:
             for field_name, field in model._meta.fields_map.items()
             if field.pk
         )
+        self.cursor_order: Tuple[str, ...] = (
+            (self.cursor_field, self.pk_field)
+            if self.cursor_field in model._meta.fields_map
+            else (self.pk_field,)
+        )
 
     async def get(self, *, id: Any) -> Optional[ModelType]:
         """
-        Retrieve a single record by its primary key.
+        Retrieve a single record by its primary key (from the read replica
+        when available, see ReadRouter).
         """
         pk = self.pk_field
-        return await self.model.get_or_none(**{pk: id})
+        return await self.model.filter(**{pk: id}).using_db(read_db()).first()
+
+    def store_scope(self, store_id: Any) -> Q:
+        """
+        Build the filter that keeps only the records belonging to a store.
+        """
+        if not self.store_scope_fields:
+            raise ValueError(
+                f"{self.model.__name__} does not declare store_scope_fields"
+            )
+        return Q(
+            *(Q(**{field: store_id}) for field in self.store_scope_fields),
+            join_type=Q.OR,
+        )
+
+    def filter_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Any = None
+    ) -> QuerySet:
+        """
+        Build the base queryset for the given filters, scoped to a store if
+        provided. It is read-only: it runs on the read replica when available.
+        """
+        query = self.model.filter(**(payload or {})).using_db(read_db())
+        if store_id:
+            query = query.filter(self.store_scope(store_id))
+        return query
+
+    def list_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Any = None
+    ) -> QuerySet:
+        """
+        Build the queryset used by list endpoints, including the relations the
+        listing needs. Subclasses override it to translate filters or add
+        select_related/prefetch_related.
+        """
+        return self.filter_query(payload=payload, store_id=store_id)
 
     async def get_all(
         self,
@@ -29,12 +114,72 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):  # type:
         limit: int = 100,
         payload: Dict[str, Any] = {},
         prefetch_fields: Optional[List[str]] = None,
+        store_id: Any = None,
     ) -> List[ModelType]:
-        query = self.model.filter(**payload)
+        query = self.list_query(payload=payload, store_id=store_id)
         if prefetch_fields:
             query = query.prefetch_related(*prefetch_fields)
         return await query.offset(skip).limit(limit).all()
 
+    async def get_page(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        payload: Optional[Dict[str, Any]] = None,
+        store_id: Any = None,
+        q_filter: Optional[Q] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination ordered by cursor_order. Returns the page and the
+        cursor of the next one (None on the last page). Rows inserted while
+        paging never shift the remaining pages. Raises ValueError if the
+        cursor is invalid.
+        """
+        query = self.list_query(payload=payload, store_id=store_id)
+        if q_filter is not None:
+            query = query.filter(q_filter)
+        if cursor:
+            query = query.filter(self._after_cursor(decode_cursor(cursor)))
+        rows = await query.order_by(*self.cursor_order).limit(limit + 1)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor([getattr(rows[-1], field) for field in self.cursor_order])
+
+    def _after_cursor(self, values: List[Any]) -> Q:
+        """
+        Filter the rows that come after the cursor position in cursor_order.
+        """
+        if len(values) != len(self.cursor_order):
+            raise ValueError("Invalid cursor")
+        fields_map = self.model._meta.fields_map
+        try:
+            values = [
+                fields_map[field].to_python_value(value)
+                for field, value in zip(self.cursor_order, values)
+            ]
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        if len(values) == 1:
+            return Q(**{f"{self.pk_field}__gt": values[0]})
+        field, pk = self.cursor_order
+        return Q(
+            Q(**{f"{field}__gt": values[0]}),
+            Q(**{field: values[0], f"{pk}__gt": values[1]}),
+            join_type=Q.OR,
+        )
+
+    async def get_for_response(self, *, id: Any) -> Optional[ModelType]:
+        """
+        Retrieve a record with the relations declared in response_related_fields,
+        resolved in a single query with JOINs.
+        """
+        query = self.model.filter(**{self.pk_field: id})
+        if self.response_related_fields:
+            query = query.select_related(*self.response_related_fields)
+        return await query.first()
+
     async def create(self, *, obj_in: CreateSchemaType) -> ModelType:
         # Manejar tanto objetos Pydantic como diccionarios
         if hasattr(obj_in, 'dict'):
@@ -42,73 +187,86 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):  # type:
         else:
             # Si es un diccionario, usarlo directamente
             obj_in_data = obj_in
-        
-        # Create a new record in the database
+
+        # La clave primaria y los valores por defecto se generan en Python, así
+        # que tras el INSERT la instancia ya refleja la fila guardada
         model = await self.model.create(**obj_in_data)
-        
-        # Recargar el modelo con sus relaciones utilizando la clave primaria dinámica
-        pk = self.pk_field
-        model = await self.model.get(**{pk: getattr(model, pk)}).prefetch_related(*self.model._meta.fetch_fields)
-        return model
+        if not self.response_related_fields:
+            return model
+        return await self.get_for_response(id=getattr(model, self.pk_field))
 
-    async def update(self, *, id: Any, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> ModelType:
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        pk = self.pk_field
-        logger.info(f"Actualizando modelo {self.model.__name__} con pk={pk}, id={id}")
-        
+    async def update(self, *, id: Any, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Optional[ModelType]:
         # Obtenemos solo los campos que se han establecido explícitamente
-        update_data = (
+        update_data = dict(
             obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_none=True)
         )
-        
-        logger.info(f"Datos de actualización: {update_data}")
-
         if not update_data:
-            logger.warning("No hay datos para actualizar, retornando objeto original")
             # Devolvemos el objeto original sin cambios pero con sus relaciones
-            return await self.model.get(**{pk: id}).prefetch_related(*self.model._meta.fetch_fields)
+            return await self.get_for_response(id=id)
 
-        try:
-            # Primero obtenemos el objeto existente para verificar que existe
-            obj = await self.model.get_or_none(**{pk: id})
-            if not obj:
-                logger.warning(f"No se encontró el objeto con {pk}={id}")
-                return None
-                
-            # Manejo especial para claves foráneas para asegurar la actualización correcta
-            from app.infra.postgres.models import Store # Importación local para evitar dependencias circulares
-            if 'store_id' in update_data:
-                store_id = update_data.pop('store_id') # Quitamos store_id para manejarlo por separado
-                if store_id:
-                    store_obj = await Store.get_or_none(id=store_id)
-                    if not store_obj:
-                        raise HTTPException(status_code=404, detail=f"Store con id {store_id} no encontrada.")
-                    obj.store = store_obj
-                else:
-                    obj.store = None # Permitir desasociar la tienda
-
-            # Actualizamos los campos restantes
-            for field, value in update_data.items():
-                setattr(obj, field, value)
-            
-            # Guardamos el objeto. Tortoise se encargará de las relaciones.
-            await obj.save()
-            logger.info(f"Objeto con {pk}={id} actualizado con los campos: {list(update_data.keys())}")
-
-            # Devolvemos el objeto actualizado con sus relaciones
-            await obj.fetch_related(*self.model._meta.fetch_fields)
+        if update_data.get("store_id"):
+            # Importación local para evitar dependencias circulares
+            from app.infra.postgres.models import Store
+
+            if not await Store.exists(id=update_data["store_id"]):
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Store con id {update_data['store_id']} no encontrada.",
+                )
+
+        obj = await self._update_returning(id=id, values=update_data)
+        if obj is None:
+            logger.warning(f"No se encontró {self.model.__name__} con {self.pk_field}={id}")
+            return None
+        if not self.response_related_fields:
             return obj
-        except Exception as e:
-            logger.error(f"Error al actualizar: {str(e)}")
-            raise
+        return await self.get_for_response(id=id)
+
+    async def _update_returning(self, *, id: Any, values: Dict[str, Any]) -> Optional[ModelType]:
+        """
+        Run a single UPDATE ... RETURNING * and build the instance from the
+        returned row. Returns None if no row has the given primary key.
+        """
+        meta = self.model._meta
+        values = dict(values)
+        for name, field in meta.fields_map.items():
+            # Replica el comportamiento de save() con los campos auto_now
+            if getattr(field, "auto_now", False) and name not in values:
+                values[name] = timezone.now()
+
+        assignments = []
+        params: List[Any] = []
+        for name, value in values.items():
+            if name in meta.fk_fields or name in meta.o2o_fields:
+                # Se recibió la instancia relacionada en lugar de su id
+                name = meta.fields_map[name].source_field
+                value = value.pk if value is not None else None
+            if name not in meta.fields_db_projection:
+                # Igual que save(), los atributos que no son columnas se ignoran
+                continue
+            field = meta.fields_map[name]
+            params.append(field.to_db_value(value, None))
+            assignments.append(f'"{meta.fields_db_projection[name]}"=${len(params)}')
+
+        if not assignments:
+            return await self.get(id=id)
+
+        pk_field = meta.fields_map[self.pk_field]
+        params.append(pk_field.to_db_value(id, None))
+        sql = (
+            f'UPDATE "{meta.db_table}" SET {", ".join(assignments)} '
+            f'WHERE "{meta.fields_db_projection[self.pk_field]}"=${len(params)} RETURNING *'
+        )
+        rows = await meta.db.execute_query_dict(sql, params)
+        if not rows:
+            return None
+        return self.model._init_from_db(**rows[0])
 
     async def delete(self, *, id: Any) -> bool:
         pk = self.pk_field
         deleted_count = await self.model.filter(**{pk: id}).delete()
         return deleted_count > 0
 
-    async def count(self, *, payload: Dict[str, Any] = {}) -> int:
-        count = await self.model.filter(**payload).all().count()
+    async def count(self, *, payload: Dict[str, Any] = {}, store_id: Any = None) -> int:
+        count = await self.filter_query(payload=payload, store_id=store_id).count()
         return count
@@ -0,0 +1,266 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from tortoise import Tortoise
+
+from app.core.database import read_db
+from app.infra.postgres.models.payment import PaymentState
+
+CUSTOMER_ROLE = "Cliente"
+VENDOR_ROLE = "Vendedor"
+
+# Tienda bajo la que se agrupan los registros sin tienda
+NO_STORE_ID = UUID(int=0)
+
+# Columna de daily_store_metrics con el valor de los pagos en cada estado
+PAYMENT_STATE_COLUMNS = {state.value: f"payments_{state.value.lower()}" for state in PaymentState}
+
+METRIC_COLUMNS = ["customers", "vendors", "devices", "payments"] + list(
+    PAYMENT_STATE_COLUMNS.values()
+)
+
+_ZERO_STATES = ", ".join(f"0 AS {column}" for column in PAYMENT_STATE_COLUMNS.values())
+# Valor de los pagos por estado, sobre filas de "payment" con alias p
+PAYMENT_STATE_SUMS = ", ".join(
+    f"COALESCE(SUM(p.value) FILTER (WHERE p.state = '{state}'), 0) AS {column}"
+    for state, column in PAYMENT_STATE_COLUMNS.items()
+)
+
+# Recalcula los días entre $1 y $2 (ambos incluidos) para todas las tiendas.
+# Misma atribución que las consultas en vivo de AnalyticsService: usuarios
+# por su tienda, dispositivos por el cliente del enrolamiento y pagos por el
+# cliente del plan.
+ROLLUP_DAYS_SQL = f"""
+INSERT INTO "daily_store_metrics" ("day", "store_id", {", ".join(f'"{c}"' for c in METRIC_COLUMNS)})
+SELECT day, store_id, {", ".join(f"SUM({c})" for c in METRIC_COLUMNS)}
+FROM (
+    SELECT date_trunc('day', u.created_at)::date AS day,
+           COALESCE(u.store_id, $5::uuid) AS store_id,
+           COUNT(*) FILTER (WHERE r.name = $3) AS customers,
+           COUNT(*) FILTER (WHERE r.name = $4) AS vendors,
+           0 AS devices, 0 AS payments, {_ZERO_STATES}
+    FROM "user" u
+    JOIN "role" r ON r.role_id = u.role_id
+    WHERE u.created_at >= $1::date AND u.created_at < $2::date + 1
+      AND r.name IN ($3, $4)
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT date_trunc('day', d.created_at)::date, COALESCE(u.store_id, $5::uuid),
+           0, 0, COUNT(*), 0, {_ZERO_STATES}
+    FROM "device" d
+    LEFT JOIN "enrolment" e ON e.enrolment_id = d.enrolment_id
+    LEFT JOIN "user" u ON u.user_id = e.user_id
+    WHERE d.created_at >= $1::date AND d.created_at < $2::date + 1
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT date_trunc('day', p.date)::date, COALESCE(u.store_id, $5::uuid),
+           0, 0, 0, SUM(p.value), {PAYMENT_STATE_SUMS}
+    FROM "payment" p
+    LEFT JOIN "plan" pl ON pl.plan_id = p.plan_id
+    LEFT JOIN "user" u ON u.user_id = pl.user_id
+    WHERE p.date >= $1::date AND p.date < $2::date + 1
+    GROUP BY 1, 2
+) metrics
+GROUP BY day, store_id
+"""
+
+CLEAR_DAYS_SQL = 'DELETE FROM "daily_store_metrics" WHERE "day" BETWEEN $1 AND $2'
+
+# Serializa la consolidación entre procesos; SKIP LOCKED deja la pasada a
+# quien ya la está haciendo
+LOCK_STATE_SQL = """
+SELECT "sealed_through", CURRENT_DATE - 1 AS yesterday
+FROM "daily_store_metrics_state"
+WHERE "id" = 1
+FOR UPDATE {wait}
+"""
+
+SEAL_SQL = """
+UPDATE "daily_store_metrics_state"
+SET "sealed_through" = GREATEST("sealed_through", $1::date), "updated_at" = now()
+WHERE "id" = 1
+"""
+
+FIRST_DAY_SQL = """
+SELECT LEAST(
+    (SELECT MIN("created_at") FROM "user"),
+    (SELECT MIN("created_at") FROM "device"),
+    (SELECT MIN("date") FROM "payment")
+)::date AS first_day
+"""
+
+# Días ya consolidados a los que pertenecen las fechas dadas
+SEALED_DAYS_SQL = """
+SELECT DISTINCT date_trunc('day', t.at)::date AS day
+FROM unnest($1::timestamptz[]) AS t(at), "daily_store_metrics_state" s
+WHERE s."id" = 1 AND date_trunc('day', t.at)::date <= s."sealed_through"
+"""
+
+# Fechas en días ya consolidados de los registros cuya atribución cambia o
+# que se borran en cascada al modificar o borrar usuarios ($1 como cliente o
+# en general, $2 como vendedor), enrolamientos ($3), dispositivos ($4) o
+# planes ($5)
+AFFECTED_SEALED_MOMENTS_SQL = """
+WITH devices AS (
+    SELECT d."device_id", d."created_at"
+    FROM "device" d
+    WHERE d."device_id" = ANY($4::uuid[])
+    UNION
+    SELECT d."device_id", d."created_at"
+    FROM "device" d
+    JOIN "enrolment" e ON e."enrolment_id" = d."enrolment_id"
+    WHERE e."enrolment_id" = ANY($3::uuid[])
+       OR e."user_id" = ANY($1::uuid[])
+       OR e."vendor_id" = ANY($2::uuid[])
+),
+plans AS (
+    SELECT pl."plan_id"
+    FROM "plan" pl
+    WHERE pl."plan_id" = ANY($5::uuid[])
+       OR pl."user_id" = ANY($1::uuid[])
+       OR pl."vendor_id" = ANY($2::uuid[])
+       OR pl."device_id" IN (SELECT "device_id" FROM devices)
+),
+moments AS (
+    SELECT u."created_at" AS at FROM "user" u WHERE u."user_id" = ANY($1::uuid[])
+    UNION ALL
+    SELECT "created_at" FROM devices
+    UNION ALL
+    SELECT p."date" FROM "payment" p
+    WHERE p."plan_id" IN (SELECT "plan_id" FROM plans)
+       OR p."device_id" IN (SELECT "device_id" FROM devices)
+)
+SELECT DISTINCT date_trunc('day', m.at) AS at
+FROM moments m, "daily_store_metrics_state" s
+WHERE s."id" = 1 AND date_trunc('day', m.at)::date <= s."sealed_through"
+"""
+
+DAILY_METRICS_SQL = f"""
+SELECT "day", {", ".join(f'SUM("{c}") AS {c}' for c in METRIC_COLUMNS)}
+FROM "daily_store_metrics"
+WHERE "day" BETWEEN $1 AND $2
+  {{store_filter}}
+GROUP BY "day"
+"""
+
+
+class CRUDDailyStoreMetrics:
+    """
+    Daily per-store rollup of the analytics metrics. Days up to
+    sealed_through are stored in daily_store_metrics; later days are
+    computed live by AnalyticsService.
+    """
+
+    @staticmethod
+    def _db():
+        return Tortoise.get_connection("default")
+
+    async def get_sealed_through(self) -> Optional[date]:
+        rows = await read_db().execute_query_dict(
+            'SELECT "sealed_through" FROM "daily_store_metrics_state" WHERE "id" = 1'
+        )
+        return rows[0]["sealed_through"] if rows else None
+
+    async def get_daily(
+        self, *, start_date: date, end_date: date, store_id: Optional[UUID] = None
+    ) -> Dict[date, dict]:
+        """
+        Metrics of the stored days between start_date and end_date, summed
+        over every store or limited to one, indexed by day.
+        """
+        params: List[Any] = [start_date, end_date]
+        store_filter = ""
+        if store_id:
+            store_filter = 'AND "store_id" = $3'
+            params.append(store_id)
+        rows = await read_db().execute_query_dict(
+            DAILY_METRICS_SQL.format(store_filter=store_filter), params
+        )
+        return {row["day"]: row for row in rows}
+
+    async def rollup_days(self, *, start_date: date, end_date: date) -> None:
+        """
+        Recompute the stored metrics of every store for the days between
+        start_date and end_date. Run it inside a transaction.
+        """
+        db = self._db()
+        await db.execute_query(CLEAR_DAYS_SQL, [start_date, end_date])
+        await db.execute_query(
+            ROLLUP_DAYS_SQL,
+            [start_date, end_date, CUSTOMER_ROLE, VENDOR_ROLE, NO_STORE_ID],
+        )
+
+    async def lock_state(self, *, wait: bool = True) -> Optional[dict]:
+        """
+        Lock the rollup state until the end of the current transaction and
+        return it. Without `wait`, returns None if another process holds it.
+        """
+        rows = await self._db().execute_query_dict(
+            LOCK_STATE_SQL.format(wait="" if wait else "SKIP LOCKED")
+        )
+        return rows[0] if rows else None
+
+    async def seal(self, *, through: date) -> None:
+        await self._db().execute_query(SEAL_SQL, [through])
+
+    async def get_first_day(self) -> Optional[date]:
+        rows = await self._db().execute_query_dict(FIRST_DAY_SQL)
+        return rows[0]["first_day"]
+
+    async def refresh_sealed_days(self, *, moments: Sequence[datetime]) -> List[date]:
+        """
+        Recompute the stored days that contain any of `moments`, for writes
+        dated on days that are already sealed. Run it inside the transaction
+        that made the write. Returns the days recomputed.
+        """
+        moments = [moment for moment in moments if moment is not None]
+        if not moments:
+            return []
+        rows = await self._db().execute_query_dict(SEALED_DAYS_SQL, [moments])
+        days = sorted(row["day"] for row in rows)
+        if not days:
+            return []
+        # Espera a una consolidación en curso para no pisarse con ella. Una
+        # escritura que coincide con el cierre de su día la corrige la
+        # siguiente pasada (ANALYTICS_ROLLUP_RESEAL_DAYS).
+        await self.lock_state()
+        for day in days:
+            await self.rollup_days(start_date=day, end_date=day)
+        return days
+
+    async def get_affected_moments(
+        self,
+        *,
+        user_ids: Sequence[UUID] = (),
+        vendor_ids: Sequence[UUID] = (),
+        enrolment_ids: Sequence[UUID] = (),
+        device_ids: Sequence[UUID] = (),
+        plan_ids: Sequence[UUID] = (),
+    ) -> List[datetime]:
+        """
+        Moments on sealed days whose stored metrics change when the given
+        rows are reassigned or deleted (with their cascades): users as
+        customers, users as vendors, enrolments, devices and plans. Call it
+        before the write and pass the result to refresh_sealed_days after it.
+        """
+        if not any((user_ids, vendor_ids, enrolment_ids, device_ids, plan_ids)):
+            return []
+        rows = await self._db().execute_query_dict(
+            AFFECTED_SEALED_MOMENTS_SQL,
+            [list(user_ids), list(vendor_ids), list(enrolment_ids), list(device_ids), list(plan_ids)],
+        )
+        return [row["at"] for row in rows]
+
+
+def date_batches(start_date: date, end_date: date, size: int):
+    """
+    Split [start_date, end_date] into consecutive ranges of at most `size` days.
+    """
+    while start_date <= end_date:
+        batch_end = min(end_date, start_date + timedelta(days=size - 1))
+        yield start_date, batch_end
+        start_date = batch_end + timedelta(days=1)
+
+
+crud_daily_store_metrics = CRUDDailyStoreMetrics()
@@ -1,11 +1,17 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
 from app.infra.postgres.crud.base import CRUDBase
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
 from app.infra.postgres.models.device import Device
 from app.schemas.device import DeviceCreate, DeviceUpdate
 
 
 class CRUDDevice(CRUDBase[Device, DeviceCreate, DeviceUpdate]):
+    store_scope_fields = ("enrolment__user__store_id", "enrolment__vendor__store_id")
+
     async def get(self, *, id: Any) -> Optional[Device]:
         """
         Obtiene un dispositivo por su ID, con las relaciones 'enrolment' y 'actions' precargadas.
@@ -21,18 +27,70 @@ class CRUDDevice(CRUDBase[Device, DeviceCreate, DeviceUpdate]):
         *,
         filters: Optional[Dict[str, Any]] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        store_id: Optional[Any] = None,
     ) -> List[Device]:
-        query = self.model.all().prefetch_related("enrolment__user")
-        if filters:
-            filters = filters.copy()
-            if "enrolment_id" in filters:
-                filters["enrolment__enrolment_id"] = filters.pop("enrolment_id")
-            if "user_id" in filters:
-                filters["enrolment__user__user_id"] = filters.pop("user_id")
-            query = query.filter(**filters)
+        query = self.list_query(payload=filters, store_id=store_id)
         results = await query.offset(skip).limit(limit)
         return results
 
+    def list_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Optional[Any] = None
+    ):
+        return self.filter_query(
+            payload=self._translate_filters(payload), store_id=store_id
+        ).prefetch_related("enrolment__user")
+
+    async def count(
+        self, *, payload: Dict[str, Any] = {}, store_id: Optional[Any] = None
+    ) -> int:
+        return await self.filter_query(
+            payload=self._translate_filters(payload), store_id=store_id
+        ).count()
+
+    async def update(
+        self, *, id: Any, obj_in: Union[DeviceUpdate, Dict[str, Any]]
+    ) -> Optional[Device]:
+        """
+        Update a device. Moving it to another enrolment can change the store
+        it (and its payments) count for, so the sealed analytics days are
+        refreshed in the same transaction.
+        """
+        update_data = dict(
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_none=True)
+        )
+        if "enrolment_id" not in update_data:
+            return await super().update(id=id, obj_in=update_data)
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(device_ids=[id])
+            device = await super().update(id=id, obj_in=update_data)
+            if device is not None:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return device
+
+    async def delete(self, *, id: Any) -> bool:
+        """
+        Delete a device with its plans and payments and refresh the sealed
+        analytics days they were counted in, in the same transaction.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(device_ids=[id])
+            deleted = await super().delete(id=id)
+            if deleted:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return deleted
+
+    @staticmethod
+    def _translate_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Map the public filter names to their lookups through the enrolment.
+        """
+        filters = dict(filters or {})
+        if "enrolment_id" in filters:
+            filters["enrolment__enrolment_id"] = filters.pop("enrolment_id")
+        if "user_id" in filters:
+            filters["enrolment__user__user_id"] = filters.pop("user_id")
+        return filters
+
 
 crud_device = CRUDDevice(model=Device)
@@ -1,13 +1,134 @@
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
 from app.infra.postgres.crud.base import CRUDBase
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
 from app.infra.postgres.models.enrolment import Enrolment
 from app.schemas.enrolment import EnrolmentCreate, EnrolmentUpdate
 
+# Prevalidación masiva en una sola consulta: IMEI e ICC ID ya registrados y
+# usuarios (clientes y vendedores) existentes.
+BULK_LOOKUP_SQL = """
+SELECT 'imei' AS kind, "imei" AS value FROM "device" WHERE "imei" = ANY($1::varchar[])
+UNION ALL
+SELECT 'icc_id', "icc_id" FROM "sim" WHERE "icc_id" = ANY($2::varchar[])
+UNION ALL
+SELECT 'user_id', "user_id"::text FROM "user" WHERE "user_id" = ANY($3::uuid[])
+"""
+
+BULK_INSERT_ENROLMENTS_SQL = """
+INSERT INTO "enrolment" ("enrolment_id", "user_id", "vendor_id", "created_at", "updated_at")
+SELECT e.enrolment_id, e.user_id, e.vendor_id, $4, $4
+FROM unnest($1::uuid[], $2::uuid[], $3::uuid[]) AS e(enrolment_id, user_id, vendor_id)
+"""
+
+BULK_INSERT_DEVICES_SQL = """
+INSERT INTO "device" (
+    "device_id", "enrolment_id", "name", "imei", "imei_two", "serial_number",
+    "model", "brand", "product_name", "state", "created_at", "updated_at"
+)
+SELECT d.*, $11, $11
+FROM unnest(
+    $1::uuid[], $2::uuid[], $3::varchar[], $4::varchar[], $5::varchar[],
+    $6::varchar[], $7::varchar[], $8::varchar[], $9::varchar[], $10::varchar[]
+) AS d
+"""
+
+BULK_INSERT_SIMS_SQL = """
+INSERT INTO "sim" (
+    "sim_id", "device_id", "icc_id", "slot_index", "operator", "number", "state",
+    "created_at", "updated_at"
+)
+SELECT s.*, $8, $8
+FROM unnest(
+    $1::uuid[], $2::uuid[], $3::varchar[], $4::varchar[], $5::varchar[],
+    $6::varchar[], $7::varchar[]
+) AS s
+"""
+
+BULK_INSERT_PLANS_SQL = """
+INSERT INTO "plan" (
+    "plan_id", "user_id", "vendor_id", "device_id", "initial_date", "value",
+    "quotas", "period", "contract"
+)
+SELECT p.*
+FROM unnest(
+    $1::uuid[], $2::uuid[], $3::uuid[], $4::uuid[], $5::date[], $6::numeric[],
+    $7::smallint[], $8::int[], $9::varchar[]
+) AS p
+"""
+
+
+def _columns(rows: Sequence[Tuple]) -> List[List[Any]]:
+    return [list(column) for column in zip(*rows)]
+
 
 class CRUDEnrolment(CRUDBase[Enrolment, EnrolmentCreate, EnrolmentUpdate]):
     async def get(self, *, id: Any) -> Optional[Enrolment]:
         return await self.model.filter(pk=id).first()
 
+    async def delete(self, *, id: Any) -> bool:
+        """
+        Delete an enrolment with its devices, plans and payments and refresh
+        the sealed analytics days they were counted in, in the same transaction.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(enrolment_ids=[id])
+            deleted = await super().delete(id=id)
+            if deleted:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return deleted
+
+    async def bulk_lookup(
+        self,
+        *,
+        imeis: Sequence[str],
+        icc_ids: Sequence[str],
+        user_ids: Sequence[Any],
+    ) -> Dict[str, Set[str]]:
+        """
+        Return the IMEIs and ICC IDs already registered and the user ids that
+        exist, as {"imei": ..., "icc_id": ..., "user_id": ...}.
+        """
+        found: Dict[str, Set[str]] = {"imei": set(), "icc_id": set(), "user_id": set()}
+        rows = await self.model._meta.db.execute_query_dict(
+            BULK_LOOKUP_SQL, [list(imeis), list(icc_ids), list(user_ids)]
+        )
+        for row in rows:
+            found[row["kind"]].add(row["value"])
+        return found
+
+    async def bulk_create(
+        self,
+        *,
+        enrolments: Sequence[Tuple],
+        devices: Sequence[Tuple],
+        sims: Sequence[Tuple],
+        plans: Sequence[Tuple],
+        created_at: Any,
+    ) -> None:
+        """
+        Insert complete enrollments in one transaction with one statement per
+        table. Rows are column tuples in the order of the INSERT statements
+        above; ids are generated by the caller.
+        """
+        if not enrolments:
+            return
+        async with in_transaction(connection_name=PRIMARY) as connection:
+            await connection.execute_query(
+                BULK_INSERT_ENROLMENTS_SQL, _columns(enrolments) + [created_at]
+            )
+            await connection.execute_query(
+                BULK_INSERT_DEVICES_SQL, _columns(devices) + [created_at]
+            )
+            if sims:
+                await connection.execute_query(
+                    BULK_INSERT_SIMS_SQL, _columns(sims) + [created_at]
+                )
+            if plans:
+                await connection.execute_query(BULK_INSERT_PLANS_SQL, _columns(plans))
+
 
 crud_enrolment = CRUDEnrolment(model=Enrolment)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import UUID
 
 from app.infra.postgres.crud.base import CRUDBase
@@ -8,6 +8,19 @@ from app.schemas.factory_reset_protection import (
     FactoryResetProtectionUpdate,
 )
 
+FRP_LOOKUP_COLUMNS = (
+    '"factory_reset_protection_id", "account_id", "name", "email", "state", "store_id"'
+)
+
+# Ambas variantes usan los índices únicos (account_id, store_id) y
+# (email, store_id); sin tienda, los índices simples de account_id y email.
+BATCH_LOOKUP_SQL = f"""
+SELECT {FRP_LOOKUP_COLUMNS}
+FROM "factoryResetProtection"
+WHERE ("account_id" = ANY($1::varchar[]) OR "email" = ANY($2::varchar[]))
+"""
+BATCH_LOOKUP_BY_STORE_SQL = BATCH_LOOKUP_SQL + 'AND "store_id" = $3\n'
+
 
 class CRUDFactoryResetProtection(
     CRUDBase[
@@ -24,6 +37,26 @@ class CRUDFactoryResetProtection(
             filters["store_id"] = store_id
         return await self.model.filter(**filters).first()
 
+    async def get_by_account_ids(
+        self,
+        *,
+        account_ids: Sequence[str] = (),
+        emails: Sequence[str] = (),
+        store_id: Optional[UUID] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rows matching any of the account ids or emails, in a single query.
+        Without store_id the rows of every store are returned.
+        """
+        if not account_ids and not emails:
+            return []
+        params = [list(account_ids), list(emails)]
+        sql = BATCH_LOOKUP_SQL
+        if store_id:
+            sql = BATCH_LOOKUP_BY_STORE_SQL
+            params.append(store_id)
+        return await self.model._meta.db.execute_query_dict(sql, params)
+
 
 # Instancia que se importa en el servicio
 crud_factory_reset_protection = CRUDFactoryResetProtection(model=FactoryResetProtection)
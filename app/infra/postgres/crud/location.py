@@ -1,7 +1,18 @@
-from typing import Any, List, Optional
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
 
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
 from app.infra.postgres.crud.base import CRUDBase
-from app.infra.postgres.models.location import City, Country, Location, Region
+from app.infra.postgres.models.location import (
+    City,
+    Country,
+    DeviceLastLocation,
+    Location,
+    Region,
+)
 from app.schemas.location import (
     CityCreate,
     CityUpdate,
@@ -13,30 +24,187 @@ from app.schemas.location import (
     RegionUpdate,
 )
 
+LAST_LOCATION_COLUMNS = '"device_id", "location_id", "latitude", "longitude", "created_at"'
+
+# Upsert de la última ubicación a partir de las filas de "new_location"; solo
+# reemplaza la existente si la nueva es igual o más reciente.
+UPSERT_LAST_LOCATION_SQL = f"""
+INSERT INTO "device_last_location" ({LAST_LOCATION_COLUMNS})
+SELECT DISTINCT ON ("device_id") {LAST_LOCATION_COLUMNS}
+FROM new_location
+ORDER BY "device_id", "created_at" DESC
+ON CONFLICT ("device_id") DO UPDATE SET
+    "location_id" = EXCLUDED."location_id",
+    "latitude" = EXCLUDED."latitude",
+    "longitude" = EXCLUDED."longitude",
+    "created_at" = EXCLUDED."created_at"
+WHERE "device_last_location"."created_at" <= EXCLUDED."created_at"
+"""
+
+# Recalcula la última ubicación de un dispositivo desde el historial, o la
+# elimina si ya no le quedan ubicaciones.
+REFRESH_LAST_LOCATION_SQL = f"""
+WITH latest AS (
+    SELECT {LAST_LOCATION_COLUMNS}
+    FROM "location"
+    WHERE "device_id" = $1
+    ORDER BY "created_at" DESC
+    LIMIT 1
+), removed AS (
+    DELETE FROM "device_last_location"
+    WHERE "device_id" = $1 AND NOT EXISTS (SELECT 1 FROM latest)
+)
+INSERT INTO "device_last_location" ({LAST_LOCATION_COLUMNS})
+SELECT {LAST_LOCATION_COLUMNS} FROM latest
+ON CONFLICT ("device_id") DO UPDATE SET
+    "location_id" = EXCLUDED."location_id",
+    "latitude" = EXCLUDED."latitude",
+    "longitude" = EXCLUDED."longitude",
+    "created_at" = EXCLUDED."created_at"
+"""
+
+BULK_INSERT_LOCATIONS_SQL = f"""
+WITH new_location AS (
+    INSERT INTO "location" ("location_id", "device_id", "latitude", "longitude", "created_at")
+    SELECT p.location_id, p.device_id, p.latitude, p.longitude, p.created_at
+    FROM unnest($1::uuid[], $2::uuid[], $3::float8[], $4::float8[], $5::timestamptz[])
+        AS p(location_id, device_id, latitude, longitude, created_at)
+    JOIN "device" d ON d."device_id" = p.device_id
+    RETURNING {LAST_LOCATION_COLUMNS}
+), last_location AS ({UPSERT_LAST_LOCATION_SQL})
+SELECT "location_id" FROM new_location
+"""
+
+INSERT_LAST_LOCATION_SQL = (
+    "WITH new_location AS (SELECT $1::uuid AS device_id, $2::uuid AS location_id, "
+    "$3::float8 AS latitude, $4::float8 AS longitude, $5::timestamptz AS created_at)"
+    + UPSERT_LAST_LOCATION_SQL
+)
+
 
 class CRUDLocation(CRUDBase[Location, LocationCreate, LocationUpdate]):
     async def get(self, *, id: Any) -> Optional[Location]:
         return await self.model.filter(pk=id).first()
 
     async def get_all(
-        self, payload: Optional[dict], skip: int = 0, limit: int = 100
+        self,
+        payload: Optional[dict],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
     ) -> List[dict]:
+        """
+        List locations, most recent first. `since`/`until` bound created_at so
+        PostgreSQL only scans the monthly partitions in that range.
+        """
         query = self.model.all()
         if payload:
             query = query.filter(**payload)
+        if since:
+            query = query.filter(created_at__gte=since)
+        if until:
+            query = query.filter(created_at__lt=until)
 
         # Order by most recent
         query = query.order_by("-created_at")
 
         return await query.offset(skip).limit(limit).values()
 
-    async def get_last_by_device_id(self, device_id: int) -> Optional[Location]:
-        location = (
-            await Location.filter(device_id=device_id).order_by("-created_at").first()
-        )
+    async def get_last_by_device_id(self, device_id: UUID) -> Optional[DeviceLastLocation]:
+        return await DeviceLastLocation.get_or_none(device_id=device_id)
+
+    async def get_last_by_device_ids(
+        self, device_ids: Sequence[UUID]
+    ) -> List[DeviceLastLocation]:
+        if not device_ids:
+            return []
+        return await DeviceLastLocation.filter(device_id__in=list(device_ids))
+
+    async def create(self, *, obj_in: LocationCreate) -> Location:
+        """
+        Insert a location and update the device's last location in the same transaction.
+        """
+        obj_in_data = obj_in.dict() if hasattr(obj_in, "dict") else obj_in
+        async with in_transaction(connection_name=PRIMARY) as connection:
+            location = await self.model.create(using_db=connection, **obj_in_data)
+            await connection.execute_query(
+                INSERT_LAST_LOCATION_SQL,
+                [
+                    location.device_id,
+                    location.location_id,
+                    location.latitude,
+                    location.longitude,
+                    location.created_at,
+                ],
+            )
+        return location
+
+    async def update(self, *, id: Any, obj_in: Any) -> Optional[Location]:
+        location = await super().update(id=id, obj_in=obj_in)
         if location:
-            return location
-        return None
+            await self.refresh_last_location(device_id=location.device_id)
+        return location
+
+    async def delete(self, *, id: Any) -> bool:
+        location = await self.model.get_or_none(pk=id)
+        if not location:
+            return False
+        deleted = await super().delete(id=id)
+        await self.refresh_last_location(device_id=location.device_id)
+        return deleted
+
+    async def refresh_last_location(self, *, device_id: UUID) -> None:
+        """
+        Recompute a device's last location from its history, after an update
+        or delete that may have touched the current one.
+        """
+        await self.model._meta.db.execute_query(REFRESH_LAST_LOCATION_SQL, [device_id])
+
+    async def ensure_partitions(self, *, months_ahead: int) -> int:
+        """
+        Create the monthly partitions up to `months_ahead` months from now.
+        Returns how many were created.
+        """
+        result = await self.model._meta.db.execute_query_dict(
+            "SELECT location_ensure_partitions(CURRENT_DATE, $1) AS created",
+            [months_ahead],
+        )
+        return result[0]["created"]
+
+    async def drop_expired_partitions(self, *, retention_months: int) -> List[str]:
+        """
+        Drop the monthly partitions older than `retention_months` months.
+        Returns the names of the dropped partitions.
+        """
+        result = await self.model._meta.db.execute_query_dict(
+            "SELECT location_drop_partitions($1) AS name", [retention_months]
+        )
+        return [row["name"] for row in result]
+
+    async def bulk_create(
+        self, *, rows: Sequence[Tuple[UUID, UUID, float, float, datetime]]
+    ) -> Set[UUID]:
+        """
+        Insert (location_id, device_id, latitude, longitude, created_at) rows
+        and upsert each device's last location in a single statement. Rows
+        whose device does not exist are skipped by the join with device;
+        returns the ids of the inserted rows.
+        """
+        if not rows:
+            return set()
+        location_ids, device_ids, latitudes, longitudes, created_ats = zip(*rows)
+        result = await self.model._meta.db.execute_query_dict(
+            BULK_INSERT_LOCATIONS_SQL,
+            [
+                list(location_ids),
+                list(device_ids),
+                list(latitudes),
+                list(longitudes),
+                list(created_ats),
+            ],
+        )
+        return {row["location_id"] for row in result}
 
 
 class CRUDCountry(CRUDBase[Country, CountryCreate, CountryUpdate]):
@@ -1,7 +1,12 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
 from app.infra.postgres.crud.base import CRUDBase
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
+from app.infra.postgres.crud.plan import crud_plan
 from app.infra.postgres.models.payment import Payment
 from app.schemas.payment import PaymentCreate, PaymentUpdate
 
@@ -11,13 +16,17 @@ try:
 except ImportError:
     PaymentUpdate = None  # O define una clase vacía si es necesario
 
+# Campos del pago que cuentan en el resumen de su plan y en daily_store_metrics
+PLAN_SUMMARY_FIELDS = frozenset({"plan_id", "value", "state", "date"})
+
 
 class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
-    async def create(self, *, obj_in: PaymentCreate) -> Payment:
-        obj_in_data = obj_in.dict()
-        model = await self.model.create(**obj_in_data)
-        # Re-fetch with all relationships to ensure complete data in response
-        return await self.get_by_id(_id=model.payment_id)
+    store_scope_fields = ("plan__user__store_id", "plan__vendor__store_id")
+    # Relaciones a uno que necesita el listado de pagos, resueltas con JOINs
+    list_related_fields = ("plan__user__role", "plan__vendor__role", "device")
+    # Relaciones que necesita PaymentResponse tras crear o actualizar
+    response_related_fields = ("plan__user", "plan__vendor", "plan__device")
+    cursor_field = "date"
 
     async def get_all(
         self,
@@ -26,69 +35,44 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         limit: int = 100,
         payload: Optional[dict] = None,
         plan_id: Optional[UUID] = None,
+        store_id: Optional[UUID] = None,
     ) -> List[Payment]:
+        """
+        Lista pagos en una sola consulta: las relaciones a uno usadas por el
+        listado (plan, usuario y vendedor con su rol, dispositivo) se cargan
+        con JOINs. El total de registros se obtiene aparte con count(), solo
+        cuando se solicita.
+        """
         import logging
 
         logger = logging.getLogger(__name__)
-        logger.info(
-            f"CRUDPayment.get_all llamado con skip={skip}, limit={limit}, payload={payload}, plan_id={plan_id}"
+        logger.debug(
+            f"CRUDPayment.get_all llamado con skip={skip}, limit={limit}, payload={payload}, plan_id={plan_id}, store_id={store_id}"
         )
 
-        # Intentar contar todos los pagos primero para verificar si hay datos
-        total_count = await self.model.all().count()
-        logger.info(f"Total de pagos en la base de datos: {total_count}")
-
-        query = self.model.all()
-
+        filters = {}
         # Manejar filtros desde el parámetro payload
         if payload:
-            logger.info(f"Aplicando filtros desde payload: {payload}")
-            if "plan_id" in payload and payload["plan_id"]:
-                logger.info(f"Filtrando por plan_id: {payload['plan_id']}")
-                query = query.filter(plan_id=payload["plan_id"])
-            if "device_id" in payload and payload["device_id"]:
-                logger.info(f"Filtrando por device_id: {payload['device_id']}")
-                query = query.filter(device_id=payload["device_id"])
+            if payload.get("plan_id"):
+                filters["plan_id"] = payload["plan_id"]
+            if payload.get("device_id"):
+                filters["device_id"] = payload["device_id"]
         # Mantener compatibilidad con el parámetro plan_id directo
         elif plan_id:
-            logger.info(f"Filtrando por plan_id directo: {plan_id}")
-            query = query.filter(plan_id=plan_id)
-
-        # Aplicar paginación
-        query = query.offset(skip).limit(limit)
+            filters["plan_id"] = plan_id
 
-        # Obtener los resultados antes de aplicar prefetch_related para verificar
-        results = await query
-        logger.info(f"Número de resultados encontrados: {len(results)}")
-
-        # Si no hay resultados, devolver lista vacía sin intentar prefetch_related
-        if not results:
-            logger.info("No se encontraron pagos, devolviendo lista vacía")
-            return []
+        # Filtrar por tienda en la base de datos, antes de paginar
+        query = self.list_query(payload=filters, store_id=store_id).order_by(
+            "-date", "payment_id"
+        )
+        return await query.offset(skip).limit(limit)
 
-        try:
-            # Intentar obtener los resultados con prefetch_related
-            prefetched_results = await query.prefetch_related(
-                "plan",
-                "plan__user",
-                "plan__user__role",
-                "plan__vendor",
-                "plan__vendor__role",
-                "device",
-                "device__enrolment",
-                "device__enrolment__user",
-                "device__enrolment__user__role",
-                "device__enrolment__vendor",
-                "device__enrolment__vendor__role",
-            )
-            logger.info(
-                f"Número de resultados después de prefetch_related: {len(prefetched_results)}"
-            )
-            return prefetched_results
-        except Exception as e:
-            logger.error(f"Error al hacer prefetch_related: {str(e)}")
-            # En caso de error con prefetch_related, devolver los resultados sin prefetch
-            return results
+    def list_query(
+        self, *, payload: Optional[dict] = None, store_id: Optional[UUID] = None
+    ):
+        return self.filter_query(payload=payload, store_id=store_id).select_related(
+            *self.list_related_fields
+        )
 
     async def get_by_id(self, *, _id: UUID) -> Optional[Payment]:
         return (
@@ -104,5 +88,58 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
             .first()
         )
 
+    async def create(self, *, obj_in: PaymentCreate) -> Payment:
+        """
+        Insert a payment and refresh its plan's payment summary (and the
+        analytics rollup, if dated on a sealed day) in the same transaction.
+        """
+        obj_in_data = obj_in.dict() if hasattr(obj_in, "dict") else obj_in
+        async with in_transaction(connection_name=PRIMARY) as connection:
+            payment = await self.model.create(using_db=connection, **obj_in_data)
+            await crud_plan.refresh_payment_summary(plan_ids=[payment.plan_id])
+            await crud_daily_store_metrics.refresh_sealed_days(moments=[payment.date])
+        # La respuesta se carga tras el commit para incluir el resumen actualizado
+        return await self.get_for_response(id=payment.payment_id)
+
+    async def update(
+        self, *, id: Any, obj_in: Union[PaymentUpdate, Dict[str, Any]]
+    ) -> Optional[Payment]:
+        """
+        Update a payment. If the change affects the plan summary, the
+        previous and the current plan (and the sealed analytics days of the
+        previous and current date) are refreshed in the same transaction.
+        """
+        update_data = dict(
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_none=True)
+        )
+        if not PLAN_SUMMARY_FIELDS.intersection(update_data):
+            return await super().update(id=id, obj_in=update_data)
+        async with in_transaction(connection_name=PRIMARY):
+            previous = await self.model.filter(payment_id=id).first().values("plan_id", "date")
+            payment = await self._update_returning(id=id, values=update_data)
+            if payment is None:
+                return None
+            await crud_plan.refresh_payment_summary(
+                plan_ids=[previous["plan_id"], payment.plan_id]
+            )
+            await crud_daily_store_metrics.refresh_sealed_days(
+                moments=[previous["date"], payment.date]
+            )
+        return await self.get_for_response(id=id)
+
+    async def delete(self, *, id: Any) -> bool:
+        """
+        Delete a payment and refresh its plan's payment summary (and the
+        analytics rollup, if dated on a sealed day) in the same transaction.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            rows = await self.model._meta.db.execute_query_dict(
+                'DELETE FROM "payment" WHERE "payment_id" = $1 RETURNING "plan_id", "date"', [id]
+            )
+            if rows:
+                await crud_plan.refresh_payment_summary(plan_ids=[rows[0]["plan_id"]])
+                await crud_daily_store_metrics.refresh_sealed_days(moments=[rows[0]["date"]])
+        return bool(rows)
+
 
 crud_payment = CRUDPayment(model=Payment)
@@ -1,8 +1,281 @@
-from app.infra.postgres.crud.base import CRUDBase
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
+from app.infra.postgres.crud.base import CRUDBase, decode_cursor, encode_cursor
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
 from app.infra.postgres.models.payment import Plan
 from app.schemas.payment import PlanCreate, PlanUpdate
 
+# Calendario de cuotas: la cuota k (1..quotas) vence en initial_date +
+# (k - 1) * period días (period nulo = 30) y vale value / quotas; la última
+# absorbe el redondeo. Los pagos aprobados hasta la fecha de corte ($1) se
+# aplican a las cuotas en orden.
+PLAN_STATUS_SQL = """
+SELECT
+    p."plan_id", p."user_id", p."vendor_id", p."device_id", p."initial_date",
+    p."quotas", s.period, p."value", s.installment_value,
+    s.installments_due, s.installments_paid,
+    s.installments_due - s.installments_paid AS overdue_installments,
+    s.paid_amount,
+    GREATEST(s.amount_due - s.paid_amount, 0) AS overdue_amount,
+    p."initial_date" + s.installments_paid * s.period AS first_unpaid_due_date,
+    $1::date - (p."initial_date" + s.installments_paid * s.period) AS days_overdue,
+    s.last_payment_at
+FROM "plan" p
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(pay."value"), 0) AS paid_amount, MAX(pay."date") AS last_payment_at
+    FROM "payment" pay
+    WHERE pay."plan_id" = p."plan_id"
+      AND pay."state" = 'Approved'
+      AND pay."date" < $1::date + 1
+) paid
+CROSS JOIN LATERAL (
+    SELECT
+        d.period, d.installment_value, d.installments_due, paid.paid_amount,
+        paid.last_payment_at,
+        CASE WHEN d.installments_due = p."quotas" THEN p."value"
+             ELSE d.installments_due * d.installment_value END AS amount_due,
+        CASE WHEN paid.paid_amount >= p."value" THEN p."quotas"
+             -- Cuotas de 0 (valor menor que 0.005 por cuota): ninguna pagada
+             ELSE LEAST(p."quotas", COALESCE(FLOOR(paid.paid_amount / NULLIF(d.installment_value, 0)), 0))::int
+        END AS installments_paid
+    FROM (
+        SELECT
+            COALESCE(p."period", 30) AS period,
+            ROUND(p."value" / p."quotas", 2) AS installment_value,
+            CASE WHEN $1::date < p."initial_date" THEN 0
+                 ELSE LEAST(p."quotas", ($1::date - p."initial_date") / COALESCE(p."period", 30) + 1)
+            END AS installments_due
+    ) d
+) s
+WHERE p."quotas" > 0 AND COALESCE(p."period", 30) > 0
+"""
+
+# Cuotas vencidas sin pagar desde hace al menos $2 días
+OVERDUE_FILTER_SQL = """
+  AND s.installments_paid < s.installments_due
+  AND $1::date - (p."initial_date" + s.installments_paid * s.period) >= $2
+"""
+
+STORE_FILTER_SQL = """
+  AND EXISTS (
+      SELECT 1 FROM "user" u
+      WHERE u."user_id" IN (p."user_id", p."vendor_id") AND u."store_id" = ${param}
+  )
+"""
+
+# Planes en mora en orden de plan_id para la paginación por cursor ($3
+# límite, $4 último plan_id; $5 tienda)
+OVERDUE_PLANS_SQL = PLAN_STATUS_SQL + OVERDUE_FILTER_SQL + """
+  AND ($4::uuid IS NULL OR p."plan_id" > $4::uuid)
+{store_filter}
+ORDER BY p."plan_id"
+LIMIT $3
+"""
+
+# Dispositivos con algún plan en mora ($3 tienda)
+OVERDUE_DEVICES_SQL = (
+    "SELECT DISTINCT overdue.device_id FROM ("
+    + PLAN_STATUS_SQL + OVERDUE_FILTER_SQL + "{store_filter}) overdue"
+)
+
+PLAN_SCHEDULE_SQL = """
+WITH plan_status AS (""" + PLAN_STATUS_SQL + """  AND p."plan_id" = $2
+)
+SELECT
+    k AS number,
+    ps."initial_date" + (k - 1) * ps.period AS due_date,
+    CASE WHEN k = ps."quotas" THEN ps."value" - ps.installment_value * (ps."quotas" - 1)
+         ELSE ps.installment_value END AS amount,
+    CASE WHEN k <= ps.installments_paid THEN 'paid'
+         WHEN k <= ps.installments_due THEN 'overdue'
+         ELSE 'upcoming' END AS status
+FROM plan_status ps
+CROSS JOIN generate_series(1, ps."quotas") AS k
+ORDER BY k
+"""
+
+# Bloquea los planes antes de recalcular su resumen. Debe ser una sentencia
+# aparte: así el recálculo toma una instantánea posterior al commit de
+# cualquier otra transacción que estuviera escribiendo pagos del mismo plan.
+# NO KEY UPDATE no choca con el KEY SHARE que toman los INSERT en payment.
+LOCK_PLANS_SQL = """
+SELECT "plan_id" FROM "plan"
+WHERE "plan_id" = ANY($1::uuid[])
+ORDER BY "plan_id"
+FOR NO KEY UPDATE
+"""
+
+# Recalcula el resumen de pagos aprobados de los planes dados; solo escribe
+# (y devuelve) los que cambian.
+REFRESH_PAYMENT_SUMMARY_SQL = """
+UPDATE "plan" p
+SET "paid_amount" = s.paid_amount,
+    "approved_payments" = s.approved_payments,
+    "last_payment_at" = s.last_payment_at
+FROM (
+    SELECT t.plan_id,
+           COALESCE(SUM(pay."value"), 0) AS paid_amount,
+           COUNT(pay."payment_id") AS approved_payments,
+           MAX(pay."date") AS last_payment_at
+    FROM unnest($1::uuid[]) AS t(plan_id)
+    LEFT JOIN "payment" pay ON pay."plan_id" = t.plan_id AND pay."state" = 'Approved'
+    GROUP BY t.plan_id
+) s
+WHERE p."plan_id" = s.plan_id
+  AND (p."paid_amount", p."approved_payments", p."last_payment_at")
+      IS DISTINCT FROM (s.paid_amount, s.approved_payments, s.last_payment_at)
+RETURNING p."plan_id"
+"""
+
+
 class CRUDPlan(CRUDBase[Plan, PlanCreate, PlanUpdate]):
-    pass
+    store_scope_fields = ("user__store_id", "vendor__store_id")
+    # Relaciones que necesita PlanResponse tras crear o actualizar
+    response_related_fields = ("user", "vendor", "device")
+
+    def list_query(self, *, payload=None, store_id=None):
+        # Relaciones que necesita el listado de planes
+        return self.filter_query(payload=payload, store_id=store_id).prefetch_related(
+            "user", "user__role", "user__store",
+            "vendor", "vendor__role", "vendor__store",
+            "device", "device__enrolment",
+            "device__enrolment__user", "device__enrolment__user__role",
+            "device__enrolment__vendor", "device__enrolment__vendor__role",
+        )
+
+    async def get_overdue(
+        self,
+        *,
+        as_of: date,
+        store_id: Optional[UUID] = None,
+        min_days_overdue: int = 0,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Delinquency status of the plans with unpaid installments due on
+        `as_of`, computed in one query. Keyset-paginated by plan_id; returns
+        the page and the cursor of the next one. Raises ValueError if the
+        cursor is invalid.
+        """
+        after: Optional[UUID] = None
+        if cursor:
+            values = decode_cursor(cursor)
+            try:
+                after = UUID(values[0])
+            except (IndexError, TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+        params: List[Any] = [as_of, min_days_overdue, limit + 1, after]
+        store_filter = ""
+        if store_id:
+            store_filter = STORE_FILTER_SQL.format(param=5)
+            params.append(store_id)
+        rows = await self.model._meta.db.execute_query_dict(
+            OVERDUE_PLANS_SQL.format(store_filter=store_filter), params
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1]["plan_id"]])
+        return rows, next_cursor
+
+    async def get_overdue_device_ids(
+        self, *, as_of: date, store_id: Optional[UUID] = None, min_days_overdue: int = 0
+    ) -> List[UUID]:
+        """
+        Devices with at least one overdue plan on `as_of`.
+        """
+        params: List[Any] = [as_of, min_days_overdue]
+        store_filter = ""
+        if store_id:
+            store_filter = STORE_FILTER_SQL.format(param=3)
+            params.append(store_id)
+        rows = await self.model._meta.db.execute_query_dict(
+            OVERDUE_DEVICES_SQL.format(store_filter=store_filter), params
+        )
+        return [row["device_id"] for row in rows]
+
+    async def get_schedule(self, *, plan_id: UUID, as_of: date) -> List[Dict[str, Any]]:
+        """
+        Installment calendar of a plan with the status of each installment
+        on `as_of` (paid, overdue or upcoming). Empty if the plan does not exist.
+        """
+        return await self.model._meta.db.execute_query_dict(PLAN_SCHEDULE_SQL, [as_of, plan_id])
+
+    async def update(
+        self, *, id: Any, obj_in: Union[PlanUpdate, Dict[str, Any]]
+    ) -> Optional[Plan]:
+        """
+        Update a plan. Changing its customer moves its payments to another
+        store, so the sealed analytics days of its payments are refreshed in
+        the same transaction.
+        """
+        update_data = dict(
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_none=True)
+        )
+        if "user_id" not in update_data:
+            return await super().update(id=id, obj_in=update_data)
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(plan_ids=[id])
+            plan = await self._update_returning(id=id, values=update_data)
+            if plan is None:
+                return None
+            await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return await self.get_for_response(id=id)
+
+    async def delete(self, *, id: Any) -> bool:
+        """
+        Delete a plan with its payments and refresh the sealed analytics
+        days of those payments in the same transaction.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(plan_ids=[id])
+            deleted = await super().delete(id=id)
+            if deleted:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return deleted
+
+    async def refresh_payment_summary(self, *, plan_ids: Sequence[UUID]) -> List[UUID]:
+        """
+        Recompute the approved-payments summary of the given plans. Call it
+        inside the transaction that wrote their payments. Returns the plans
+        whose summary changed.
+        """
+        plan_ids = sorted(set(plan_ids))
+        if not plan_ids:
+            return []
+        db = self.model._meta.db
+        await db.execute_query(LOCK_PLANS_SQL, [plan_ids])
+        rows = await db.execute_query_dict(REFRESH_PAYMENT_SUMMARY_SQL, [plan_ids])
+        return [row["plan_id"] for row in rows]
+
+    async def reconcile_payment_summaries(self, *, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Rebuild the payment summary of every plan from the payment table,
+        `batch_size` plans per transaction in plan_id order. Returns how many
+        plans were checked and how many had to be corrected.
+        """
+        checked = corrected = 0
+        after: Optional[UUID] = None
+        while True:
+            query = self.model.all()
+            if after is not None:
+                query = query.filter(plan_id__gt=after)
+            plan_ids = await query.order_by("plan_id").limit(batch_size).values_list(
+                "plan_id", flat=True
+            )
+            if not plan_ids:
+                break
+            async with in_transaction(connection_name=PRIMARY):
+                corrected += len(await self.refresh_payment_summary(plan_ids=plan_ids))
+            checked += len(plan_ids)
+            after = plan_ids[-1]
+        return {"checked": checked, "corrected": corrected}
+
 
 crud_plan = CRUDPlan(model=Plan)
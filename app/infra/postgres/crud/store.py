@@ -7,6 +7,14 @@ from app.schemas.store import StoreCreate, StoreUpdate, StoreDB
 
 
 class CRUDStore(CRUDBase[Store, StoreCreate, StoreUpdate]):
+    # Relaciones que necesita StoreDB tras crear o actualizar
+    response_related_fields = ("admin__role", "country")
+
+    def list_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Optional[Any] = None
+    ):
+        return self.filter_query(payload=payload).prefetch_related("admin", "country")
+
     async def get_with_country(self, *, id: UUID, admin_id: Optional[UUID] = None) -> Optional[StoreDB]:
         """
         Retrieve a single store by its ID with country information.
@@ -1,13 +1,23 @@
 from typing import Any, Dict, List, Optional
 
 from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
+from app.core.database import PRIMARY
 from app.infra.postgres.crud.base import CRUDBase
-from app.infra.postgres.models import Store, User
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
+from app.infra.postgres.models import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# Campos que cambian la atribución del usuario (y de sus dispositivos y pagos)
+# en daily_store_metrics
+ROLLUP_FIELDS = {"store_id", "role_id"}
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    # Relaciones que necesita UserOut tras crear o actualizar
+    response_related_fields = ("role", "city", "city__region", "city__region__country", "store")
+
     async def get(self, *, id: Any) -> Optional[User]:
         """
         Obtiene un usuario por su ID, con las relaciones 'role', 'city', 'city__region', 'city__region__country' y 'store' precargadas.
@@ -24,44 +34,57 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         Obtiene una lista de usuarios, con las relaciones 'role', 'city', 'city__region', 'city__region__country' y 'store' precargadas.
         """
-        query = self.model.all().select_related("role", "city", "city__region", "city__region__country", "store")
-        if filters:
-            query = query.filter(**filters)
+        query = self.list_query(payload=filters)
         return await query.offset(skip).limit(limit)
 
-    async def create(self, *, obj_in: UserCreate) -> User:
-        """
-        Crea un nuevo usuario y devuelve la instancia con las relaciones precargadas.
-        """
-        created_user = await super().create(obj_in=obj_in)
-        # Re-obtenemos el usuario para cargar las relaciones
-        return await self.get(id=created_user.pk)
+    def list_query(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Optional[Any] = None
+    ):
+        return self.filter_query(payload=payload).select_related(
+            "role", "city", "city__region", "city__region__country", "store"
+        )
 
     async def update(self, *, id: Any, obj_in: UserUpdate) -> Optional[User]:
         """
         Actualiza un usuario y devuelve la instancia con las relaciones precargadas.
         """
-        # El método update de la base no devuelve el objeto, así que no usamos super()
-        db_obj = await self.get(id=id)
-        if not db_obj:
-            return None
-        
-        obj_data = obj_in.dict(exclude_unset=True)
+        # exclude_unset permite desasociar la tienda enviando store_id=None
+        obj_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        if not ROLLUP_FIELDS.intersection(obj_data):
+            return await super().update(id=id, obj_in=obj_data)
+        # Cambiar de tienda o de rol mueve sus métricas en los días ya consolidados
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(user_ids=[id])
+            user = await super().update(id=id, obj_in=obj_data)
+            if user is not None:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return user
 
-        # Handle store assignment separately
-        if "store_id" in obj_data:
-            store_id = obj_data.pop("store_id")
-            if store_id:
-                store_obj = await Store.get_or_none(id=store_id)
-                db_obj.store = store_obj
-            else:
-                db_obj.store = None
+    async def delete(self, *, id: Any) -> bool:
+        """
+        Delete a user (with its enrolments, devices, plans and payments, in
+        cascade) and refresh the sealed analytics days they were counted in.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            moments = await crud_daily_store_metrics.get_affected_moments(
+                user_ids=[id], vendor_ids=[id]
+            )
+            deleted = await super().delete(id=id)
+            if deleted:
+                await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return deleted
 
-        for field, value in obj_data.items():
-            setattr(db_obj, field, value)
-        
-        await db_obj.save()
-        return db_obj
+    async def detach_store(self, *, store_id: Any) -> int:
+        """
+        Leave the users of a store without store, refreshing the sealed
+        analytics days they were counted in under it.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            user_ids = await self.model.filter(store_id=store_id).values_list("user_id", flat=True)
+            moments = await crud_daily_store_metrics.get_affected_moments(user_ids=user_ids)
+            updated = await self.model.filter(store_id=store_id).update(store_id=None)
+            await crud_daily_store_metrics.refresh_sealed_days(moments=moments)
+        return updated
         
     async def get_by_dni(self, *, dni: str) -> Optional[User]:
         """
@@ -5,7 +5,7 @@ from app.infra.postgres.models.country import Country
 from app.infra.postgres.models.device import Device
 from app.infra.postgres.models.enrolment import Enrolment
 from app.infra.postgres.models.factory_reset_protection import FactoryResetProtection
-from app.infra.postgres.models.location import Location
+from app.infra.postgres.models.location import DeviceLastLocation, Location
 from app.infra.postgres.models.payment import Payment, Plan
 from app.infra.postgres.models.region import Region
 from app.infra.postgres.models.role import Role
@@ -20,6 +20,7 @@ __all__ = [
     "Device",
     "Enrolment",
     "Location",
+    "DeviceLastLocation",
     "Region",
     "Role",
     "Sim",
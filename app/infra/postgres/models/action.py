@@ -7,6 +7,8 @@ from tortoise.models import Model
 class ActionState(str, Enum):
     APPLIED = "applied"
     PENDING = "pending"
+    # Reclamada por un despachador (claim_pending) y aún sin confirmar
+    CLAIMED = "claimed"
     FAILED = "failed"
 
 
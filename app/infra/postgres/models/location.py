@@ -39,6 +39,28 @@ class Location(Model):
 
     class Meta:
         table = "location"
+        # En PostgreSQL la tabla está particionada por mes según created_at
+        # (db/migrations/20261018110000_partition_location_by_month.sql)
+        indexes = (("device_id", "created_at"),)
 
     def __str__(self):
         return f"Location for device {self.device_id} at {self.created_at}"
+
+
+class DeviceLastLocation(Model):
+    """
+    Última ubicación conocida de cada dispositivo. Se mantiene en la misma
+    sentencia o transacción que inserta en location (ver CRUDLocation).
+    """
+
+    device_id = fields.UUIDField(pk=True)
+    location_id = fields.UUIDField()
+    latitude = fields.FloatField()
+    longitude = fields.FloatField()
+    created_at = fields.DatetimeField()
+
+    class Meta:
+        table = "device_last_location"
+
+    def __str__(self):
+        return f"Last location for device {self.device_id} at {self.created_at}"
@@ -22,6 +22,10 @@ class Plan(Model):
     period = fields.IntField(null=True, description="Periodo en días")
     value = fields.DecimalField(max_digits=10, decimal_places=2)
     contract = fields.CharField(max_length=80)
+    # Resumen de los pagos aprobados, mantenido por CRUDPayment
+    paid_amount = fields.DecimalField(max_digits=12, decimal_places=2, default=0)
+    approved_payments = fields.IntField(default=0)
+    last_payment_at = fields.DatetimeField(null=True)
 
     class Meta:
         table = "plan"
@@ -1,9 +1,18 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api import api_router
+from app.api.routers import metrics_router
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import ReadConsistencyMiddleware, init_db, read_router
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware, monitor_event_loop_lag
+from app.services.analytics import analytics_service
+from app.services.cache_invalidation import invalidation_bus
+from app.services.location import location_service
+from app.services.password import password_service
 
 app = FastAPI(
     title=settings.WEP_APP_TITLE,
@@ -17,11 +26,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Server-Timing"],
 )
+app.add_middleware(ReadConsistencyMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+# La última añadida envuelve a las demás: mide la petición completa
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(metrics_router)
+
+
+background_tasks = []
 
 
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    background_tasks.append(
+        asyncio.ensure_future(location_service.run_partition_maintenance())
+    )
+    background_tasks.append(asyncio.ensure_future(invalidation_bus.run()))
+    background_tasks.append(asyncio.ensure_future(analytics_service.run_rollup()))
+    if read_router.enabled:
+        background_tasks.append(asyncio.ensure_future(read_router.run()))
+    if settings.REQUEST_METRICS_ENABLED:
+        background_tasks.append(asyncio.ensure_future(monitor_event_loop_lag()))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    password_service.shutdown()
@@ -1,9 +1,9 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conlist, root_validator
 
 from app.schemas.user import UserDB
 
@@ -11,6 +11,8 @@ from app.schemas.user import UserDB
 class ActionState(str, Enum):
     APPLIED = "applied"
     PENDING = "pending"
+    # Reclamada por un despachador (claim_pending) y aún sin confirmar
+    CLAIMED = "claimed"
     FAILED = "failed"
 
 
@@ -64,3 +66,49 @@ class ActionResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ActionBulkCreate(BaseModel):
+    # Dispositivos destino: una lista explícita o todos los de una tienda
+    device_ids: Optional[conlist(UUID, min_items=1, max_items=10000)] = None
+    store_id: Optional[UUID] = None
+    # Con store_id: solo los dispositivos con planes en mora (ver /plans/overdue)
+    overdue_only: bool = False
+    min_days_overdue: int = Field(0, ge=0)
+    applied_by_id: UUID
+    action: ActionType
+    description: Optional[str] = None
+    # No crear la acción si el dispositivo ya tiene una igual pendiente
+    skip_if_pending: bool = True
+
+    @root_validator(skip_on_failure=True)
+    def check_target(cls, values):
+        if (values.get("device_ids") is None) == (values.get("store_id") is None):
+            raise ValueError("Exactly one of device_ids or store_id is required")
+        if values.get("overdue_only") and values.get("store_id") is None:
+            raise ValueError("overdue_only requires store_id")
+        return values
+
+
+class ActionBulkCreateResponse(BaseModel):
+    created: int
+    action_ids: List[UUID]
+    # Dispositivos inexistentes o con una acción igual ya pendiente
+    skipped_device_ids: List[UUID]
+
+
+class ActionClaimRequest(BaseModel):
+    # Sin device_ids reclama las acciones pendientes de cualquier dispositivo
+    device_ids: Optional[conlist(UUID, min_items=1, max_items=1000)] = None
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class ActionBulkStateUpdate(BaseModel):
+    action_ids: conlist(UUID, min_items=1, max_items=10000)
+    state: ActionState
+    description: Optional[str] = None
+
+
+class ActionBulkStateResponse(BaseModel):
+    updated: int
+    action_ids: List[UUID]
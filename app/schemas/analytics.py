@@ -1,6 +1,6 @@
 from datetime import date
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
 
 class DailyAnalytics(BaseModel):
     date: date
@@ -8,10 +8,13 @@ class DailyAnalytics(BaseModel):
     devices: int
     payments: float
     vendors: int
+    # Valor de los pagos del día por estado (Approved, Pending, ...)
+    payments_by_state: Dict[str, float] = {}
 
 class AnalyticsResponse(BaseModel):
     total_customers: int
     total_devices: int
     total_payments: float
     total_vendors: int
+    total_payments_by_state: Dict[str, float] = {}
     daily_data: List[DailyAnalytics]
@@ -1,7 +1,10 @@
+from typing import List
 from uuid import UUID
 
 from pydantic import BaseModel
 
+from app.schemas.city import CityResponse
+
 
 class CountryBase(BaseModel):
     name: str
@@ -25,3 +28,13 @@ class CountryDB(CountryBase):
 
     class Config:
         orm_mode = True
+
+
+class RegionTree(BaseModel):
+    region_id: UUID
+    name: str
+    cities: List[CityResponse]
+
+
+class CountryTree(CountryDB):
+    regions: List[RegionTree]
@@ -0,0 +1,61 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, condecimal, conlist
+
+from app.schemas.device import DeviceBase
+
+
+class EnrolmentBulkSim(BaseModel):
+    icc_id: str = Field(..., max_length=30)
+    slot_index: str = Field(..., max_length=10)
+    operator: str = Field(..., max_length=50)
+    number: str = Field(..., max_length=20)
+    state: str = Field("Active", max_length=20)
+
+
+class EnrolmentBulkDevice(DeviceBase):
+    # Longitudes de las columnas de "device": un valor más largo haría fallar
+    # el INSERT de todo el lote
+    name: str = Field(..., max_length=80)
+    imei: str = Field(..., max_length=15)
+    imei_two: str = Field(..., max_length=15)
+    serial_number: str = Field(..., max_length=20)
+    model: str = Field(..., max_length=40)
+    brand: str = Field(..., max_length=40)
+    product_name: str = Field(..., max_length=40)
+
+
+class EnrolmentBulkPlan(BaseModel):
+    # Rangos de las columnas de "plan" (numeric(10,2), smallint, integer, varchar(80))
+    initial_date: date
+    value: condecimal(max_digits=10, decimal_places=2)
+    quotas: int = Field(..., ge=1, le=32767)
+    period: Optional[int] = Field(None, ge=1, le=2147483647)
+    contract: str = Field(..., max_length=80)
+
+
+class EnrolmentBulkItem(BaseModel):
+    # Una matrícula completa: enrolment + device + sims + plan
+    user_id: UUID
+    vendor_id: UUID
+    device: EnrolmentBulkDevice
+    sims: conlist(EnrolmentBulkSim, max_items=4) = []
+    plan: Optional[EnrolmentBulkPlan] = None
+
+
+class EnrolmentBulkItemResult(BaseModel):
+    index: int
+    status: str  # "created", "error" o "skipped"
+    enrolment_id: Optional[UUID] = None
+    device_id: Optional[UUID] = None
+    sim_ids: List[UUID] = []
+    plan_id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+class EnrolmentBulkResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[EnrolmentBulkItemResult]
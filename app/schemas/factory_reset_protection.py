@@ -1,8 +1,8 @@
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist, root_validator
 
 
 class FactoryResetProtectionState(str, Enum):
@@ -36,3 +36,21 @@ class FactoryResetProtectionInDB(FactoryResetProtectionBase):
 
 class FactoryResetProtectionResponse(FactoryResetProtectionInDB):
     pass
+
+
+class FactoryResetProtectionBatchQuery(BaseModel):
+    store_id: Optional[UUID] = None
+    account_ids: conlist(str, max_items=1000) = []
+    emails: conlist(str, max_items=1000) = []
+
+    @root_validator(skip_on_failure=True)
+    def check_not_empty(cls, values):
+        if not values.get("account_ids") and not values.get("emails"):
+            raise ValueError("account_ids or emails is required")
+        return values
+
+
+class FactoryResetProtectionBatchResponse(BaseModel):
+    found: List[FactoryResetProtectionResponse]
+    missing_account_ids: List[str]
+    missing_emails: List[str]
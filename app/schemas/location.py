@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 
 
 class CountryBase(BaseModel):
@@ -58,7 +58,7 @@ class CityUpdate(CityBase):
 
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class CityDB(CityBase):
     city_id: UUID
@@ -88,3 +88,25 @@ class LocationDB(LocationBase):
 
     class Config:
         orm_mode = True
+
+
+class LocationLatestRequest(BaseModel):
+    device_ids: conlist(UUID, min_items=1, max_items=1000)
+
+
+class LocationBulkItem(LocationBase):
+    # Momento en que el dispositivo tomó la posición; por defecto, la recepción
+    created_at: Optional[datetime] = None
+
+
+class LocationBulkItemResult(BaseModel):
+    index: int
+    status: str  # "created" o "error"
+    location_id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+class LocationBulkResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[LocationBulkItemResult]
@@ -1,10 +1,10 @@
 from datetime import date, datetime
-from decimal import Decimal
+from decimal import ROUND_FLOOR, ROUND_HALF_UP, Decimal
 from enum import Enum
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
 
 from app.schemas.device import DeviceDB
 from app.schemas.user import UserPaymentResponse
@@ -56,10 +56,60 @@ class PlanResponse(PlanBase):
     user: UserPaymentResponse
     vendor: UserPaymentResponse
     device: DeviceDB
+    # Resumen de pagos aprobados guardado en el plan
+    paid_amount: Decimal = Decimal("0")
+    approved_payments: int = 0
+    last_payment_at: Optional[datetime] = None
+    # Derivados del resumen con las mismas reglas que /plans/overdue
+    installments_paid: int = 0
+    balance: Optional[Decimal] = None
 
     class Config:
         orm_mode = True
 
+    @root_validator(skip_on_failure=True)
+    def summarize_payments(cls, values):
+        value, quotas, paid = values["value"], values["quotas"], values["paid_amount"]
+        values["balance"] = max(value - paid, Decimal("0"))
+        installment_value = (
+            (value / quotas).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            if quotas > 0 else Decimal("0")
+        )
+        if paid >= value:
+            values["installments_paid"] = quotas
+        elif installment_value > 0:
+            values["installments_paid"] = min(
+                quotas, int((paid / installment_value).to_integral_value(rounding=ROUND_FLOOR))
+            )
+        return values
+
+
+class PlanOverdue(BaseModel):
+    plan_id: UUID
+    user_id: UUID
+    vendor_id: UUID
+    device_id: UUID
+    initial_date: date
+    quotas: int
+    period: int
+    value: Decimal
+    installment_value: Decimal
+    installments_due: int
+    installments_paid: int
+    overdue_installments: int
+    paid_amount: Decimal
+    overdue_amount: Decimal
+    first_unpaid_due_date: date
+    days_overdue: int
+    last_payment_at: Optional[datetime] = None
+
+
+class PlanInstallment(BaseModel):
+    number: int
+    due_date: date
+    amount: Decimal
+    status: str  # "paid", "overdue" o "upcoming"
+
 
 class PaymentBase(BaseModel):
     device_id: UUID
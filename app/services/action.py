@@ -1,11 +1,132 @@
+import asyncio
+import uuid
+from datetime import date
+from typing import List
+
+from fastapi import HTTPException
+
+from app.core.config import settings
 from app.infra.postgres.crud.action import crud_action
-from app.infra.postgres.models.action import Action
-from app.schemas.action import ActionCreate, ActionUpdate
+from app.infra.postgres.crud.device import crud_device
+from app.infra.postgres.crud.plan import crud_plan
+from app.infra.postgres.models.action import Action, ActionState
+from app.schemas.action import (
+    ActionBulkCreate,
+    ActionBulkCreateResponse,
+    ActionBulkStateResponse,
+    ActionBulkStateUpdate,
+    ActionClaimRequest,
+    ActionCreate,
+    ActionUpdate,
+)
+from app.services.action_hub import action_hub
 from app.services.base import BaseService
 
+# Estados desde los que se permite cada transición masiva. "claimed" solo se
+# alcanza con claim_pending.
+STATE_TRANSITIONS = {
+    ActionState.APPLIED: (ActionState.PENDING, ActionState.CLAIMED),
+    ActionState.FAILED: (ActionState.PENDING, ActionState.CLAIMED),
+    ActionState.PENDING: (ActionState.CLAIMED, ActionState.FAILED),
+}
+
 
 class ActionService(BaseService[Action, ActionCreate, ActionUpdate]):
-    pass
+    async def create(self, *, obj_in: ActionCreate) -> Action:
+        action = await super().create(obj_in=obj_in)
+        if action.state == ActionState.PENDING:
+            await action_hub.notify([action.device_id])
+        return action
+
+    async def wait_for_actions(
+        self, *, device_id: uuid.UUID, timeout: float, claim: bool = False, limit: int = 100
+    ) -> List[Action]:
+        """
+        Long-poll: return the device's pending actions, waiting up to
+        `timeout` seconds for one to be created if there are none. With
+        `claim` the actions are claimed (see claim_pending) instead of only
+        listed. Returns an empty list on timeout.
+        """
+        # Se registra antes de consultar para no perder una acción creada entre ambos
+        event = action_hub.register(device_id)
+        try:
+            actions = await self._pending_for_device(device_id, claim=claim, limit=limit)
+            if actions or timeout <= 0:
+                return actions
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            return await self._pending_for_device(device_id, claim=claim, limit=limit)
+        finally:
+            action_hub.unregister(device_id, event)
+
+    async def _pending_for_device(self, device_id: uuid.UUID, *, claim: bool, limit: int) -> List[Action]:
+        if claim:
+            return await self.crud.claim_pending(
+                device_ids=[device_id],
+                limit=limit,
+                claim_timeout=settings.ACTION_CLAIM_TIMEOUT_SECONDS,
+            )
+        return await self.crud.get_pending_by_device(device_id=device_id, limit=limit)
+
+    async def bulk_create(self, *, obj_in: ActionBulkCreate) -> ActionBulkCreateResponse:
+        """
+        Queue the same action for many devices: an explicit list, every
+        device of a store or the store's devices with overdue plans.
+        """
+        if obj_in.overdue_only:
+            device_ids = await crud_plan.get_overdue_device_ids(
+                as_of=date.today(),
+                store_id=obj_in.store_id,
+                min_days_overdue=obj_in.min_days_overdue,
+            )
+        elif obj_in.store_id is not None:
+            device_ids = await crud_device.filter_query(store_id=obj_in.store_id).distinct().values_list(
+                "device_id", flat=True
+            )
+        else:
+            device_ids = list(dict.fromkeys(obj_in.device_ids))
+        rows = await self.crud.bulk_create(
+            action_ids=[uuid.uuid4() for _ in device_ids],
+            device_ids=device_ids,
+            applied_by_id=obj_in.applied_by_id,
+            action=obj_in.action.value,
+            description=obj_in.description,
+            skip_if_pending=obj_in.skip_if_pending,
+        )
+        queued = {row["device_id"] for row in rows}
+        await action_hub.notify(queued)
+        return ActionBulkCreateResponse(
+            created=len(rows),
+            action_ids=[row["action_id"] for row in rows],
+            skipped_device_ids=[device_id for device_id in device_ids if device_id not in queued],
+        )
+
+    async def claim_pending(self, *, obj_in: ActionClaimRequest) -> List[Action]:
+        return await self.crud.claim_pending(
+            device_ids=obj_in.device_ids,
+            limit=obj_in.limit,
+            claim_timeout=settings.ACTION_CLAIM_TIMEOUT_SECONDS,
+        )
+
+    async def bulk_update_state(self, *, obj_in: ActionBulkStateUpdate) -> ActionBulkStateResponse:
+        from_states = STATE_TRANSITIONS.get(obj_in.state)
+        if from_states is None:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Actions cannot be moved to '{obj_in.state.value}' in bulk",
+            )
+        action_ids = await self.crud.bulk_update_state(
+            action_ids=list(dict.fromkeys(obj_in.action_ids)),
+            state=obj_in.state.value,
+            from_states=[state.value for state in from_states],
+            description=obj_in.description,
+        )
+        if obj_in.state == ActionState.PENDING and action_ids:
+            # Acciones devueltas a la cola: despertar a sus dispositivos
+            await action_hub.notify(await self.crud.get_device_ids(action_ids=action_ids))
+        return ActionBulkStateResponse(updated=len(action_ids), action_ids=action_ids)
 
 
 action_service = ActionService(crud_action)
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+from uuid import UUID
+
+from app.services.cache_invalidation import invalidation_bus
+
+NOTIFICATION_TOPIC = "action"
+# Ids por mensaje, para no pasar del límite de 8000 bytes de NOTIFY
+DEVICES_PER_MESSAGE = 150
+
+
+class ActionNotificationHub:
+    """
+    Wakes up the requests waiting for new actions of a device.
+
+    Waiters register an asyncio.Event per device. Action writes call
+    notify() with the affected devices; the message goes through the
+    invalidation bus, so waiters on other replicas are woken up too (with
+    the Postgres backend). A message without devices, sent when the bus
+    reconnects, wakes every waiter so none misses an action.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+
+    def register(self, device_id: UUID) -> asyncio.Event:
+        event = asyncio.Event()
+        self._waiters.setdefault(str(device_id), set()).add(event)
+        return event
+
+    def unregister(self, device_id: UUID, event: asyncio.Event) -> None:
+        key = str(device_id)
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.discard(event)
+        if not waiters:
+            del self._waiters[key]
+
+    def _wake(self, key: Optional[str]) -> None:
+        if key is None:
+            device_ids: Iterable[str] = list(self._waiters)
+        else:
+            device_ids = key.split(",")
+        for device_id in device_ids:
+            for event in self._waiters.get(device_id, ()):
+                event.set()
+
+    async def notify(self, device_ids: Iterable[UUID]) -> None:
+        device_ids = [str(device_id) for device_id in dict.fromkeys(device_ids)]
+        for start in range(0, len(device_ids), DEVICES_PER_MESSAGE):
+            await invalidation_bus.publish(
+                NOTIFICATION_TOPIC, ",".join(device_ids[start:start + DEVICES_PER_MESSAGE])
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "devices": len(self._waiters),
+            "waiters": sum(len(waiters) for waiters in self._waiters.values()),
+        }
+
+
+action_hub = ActionNotificationHub()
+invalidation_bus.subscribe(NOTIFICATION_TOPIC, action_hub._wake)
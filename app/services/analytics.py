@@ -1,20 +1,230 @@
+import asyncio
+import logging
 from datetime import date, datetime, timedelta
-from io import BytesIO
-from typing import List, Optional
+from functools import partial
+from tempfile import TemporaryFile
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from uuid import UUID
 
+from fastapi.concurrency import run_in_threadpool
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
+from app.core.config import settings
+from app.core.database import PRIMARY, read_db
+from app.infra.postgres.crud.daily_store_metrics import (
+    CUSTOMER_ROLE,
+    PAYMENT_STATE_COLUMNS,
+    PAYMENT_STATE_SUMS,
+    VENDOR_ROLE,
+    crud_daily_store_metrics,
+    date_batches,
+)
 from app.infra.postgres.models.device import Device
 from app.infra.postgres.models.payment import Payment
 from app.infra.postgres.models.role import Role
 from app.infra.postgres.models.user import User
 from app.schemas.analytics import AnalyticsResponse, DailyAnalytics
 
+logger = logging.getLogger(__name__)
+
+# Exportación a Excel: filas por página, tamaño de cada chunk enviado y ancho máximo
+EXPORT_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+MAX_COLUMN_WIDTH = 50
+
+# Conteos diarios de clientes y vendedores en una sola pasada sobre "user"
+DAILY_USERS_SQL = """
+SELECT date_trunc('day', u.created_at)::date AS day,
+       COUNT(*) FILTER (WHERE r.name = $3) AS customers,
+       COUNT(*) FILTER (WHERE r.name = $4) AS vendors
+FROM "user" u
+JOIN "role" r ON r.role_id = u.role_id
+WHERE u.created_at >= $1 AND u.created_at <= $2
+  AND r.name IN ($3, $4)
+  {store_filter}
+GROUP BY 1
+"""
+
+# Dispositivos creados por día; la tienda se resuelve por el usuario del enrolamiento
+DAILY_DEVICES_SQL = """
+SELECT date_trunc('day', d.created_at)::date AS day,
+       COUNT(*) AS devices
+FROM "device" d
+{store_join}
+WHERE d.created_at >= $1 AND d.created_at <= $2
+  {store_filter}
+GROUP BY 1
+"""
+
+# Valor total de pagos por día y por estado; la tienda se resuelve por el
+# usuario del plan
+DAILY_PAYMENTS_SQL = f"""
+SELECT date_trunc('day', p.date)::date AS day,
+       COALESCE(SUM(p.value), 0) AS payments,
+       {PAYMENT_STATE_SUMS}
+FROM "payment" p
+{{store_join}}
+WHERE p.date >= $1 AND p.date <= $2
+  {{store_filter}}
+GROUP BY 1
+"""
+
 
 class AnalyticsService:
+    @staticmethod
+    async def _fetch_daily(sql: str, params: list) -> Dict[date, dict]:
+        """
+        Run a grouped daily query and index its rows by day.
+        """
+        rows = await read_db().execute_query_dict(sql, params)
+        return {row["day"]: row for row in rows}
+
+    @staticmethod
+    async def _fetch_daily_metrics(
+        start_datetime: datetime,
+        end_datetime: datetime,
+        store_id: Optional[UUID] = None,
+    ) -> Tuple[Dict[date, dict], Dict[date, dict], Dict[date, dict]]:
+        """
+        Fetch users, devices and payments grouped by day for a datetime range.
+        """
+        params = [start_datetime, end_datetime]
+        users_params = params + [CUSTOMER_ROLE, VENDOR_ROLE]
+
+        # Filter by store_id if provided
+        if store_id:
+            users_sql = DAILY_USERS_SQL.format(store_filter="AND u.store_id = $5")
+            devices_sql = DAILY_DEVICES_SQL.format(
+                store_join=(
+                    'JOIN "enrolment" e ON e.enrolment_id = d.enrolment_id\n'
+                    'JOIN "user" u ON u.user_id = e.user_id'
+                ),
+                store_filter="AND u.store_id = $3",
+            )
+            payments_sql = DAILY_PAYMENTS_SQL.format(
+                store_join=(
+                    'JOIN "plan" pl ON pl.plan_id = p.plan_id\n'
+                    'JOIN "user" u ON u.user_id = pl.user_id'
+                ),
+                store_filter="AND u.store_id = $3",
+            )
+            users_params.append(store_id)
+            params.append(store_id)
+        else:
+            users_sql = DAILY_USERS_SQL.format(store_filter="")
+            devices_sql = DAILY_DEVICES_SQL.format(store_join="", store_filter="")
+            payments_sql = DAILY_PAYMENTS_SQL.format(store_join="", store_filter="")
+
+        users_by_day = await AnalyticsService._fetch_daily(users_sql, users_params)
+        devices_by_day = await AnalyticsService._fetch_daily(devices_sql, params)
+        payments_by_day = await AnalyticsService._fetch_daily(payments_sql, params)
+        return users_by_day, devices_by_day, payments_by_day
+
+    @staticmethod
+    async def _fetch_metrics_by_day(
+        start_date: date, end_date: date, store_id: Optional[UUID] = None
+    ) -> Dict[date, dict]:
+        """
+        Metrics per day for a date range: sealed days are read from the
+        daily_store_metrics rollup and only the days after it (normally just
+        today) are computed from the raw tables.
+        """
+        metrics_by_day: Dict[date, dict] = {}
+        live_start = start_date
+        sealed_through = await crud_daily_store_metrics.get_sealed_through()
+        if sealed_through is not None and start_date <= sealed_through:
+            metrics_by_day.update(
+                await crud_daily_store_metrics.get_daily(
+                    start_date=start_date,
+                    end_date=min(end_date, sealed_through),
+                    store_id=store_id,
+                )
+            )
+            live_start = sealed_through + timedelta(days=1)
+        if live_start > end_date:
+            return metrics_by_day
+
+        users_by_day, devices_by_day, payments_by_day = (
+            await AnalyticsService._fetch_daily_metrics(
+                datetime.combine(live_start, datetime.min.time()),
+                datetime.combine(end_date, datetime.max.time()),
+                store_id,
+            )
+        )
+        for day in set(users_by_day) | set(devices_by_day) | set(payments_by_day):
+            metrics_by_day[day] = {
+                **users_by_day.get(day, {}),
+                **devices_by_day.get(day, {}),
+                **payments_by_day.get(day, {}),
+            }
+        return metrics_by_day
+
+    @staticmethod
+    async def refresh_rollup() -> Dict[str, Any]:
+        """
+        Seal the days up to yesterday into daily_store_metrics. Every pass
+        also recomputes the last ANALYTICS_ROLLUP_RESEAL_DAYS sealed days to
+        pick up late writes. Only one process runs it at a time; the others
+        skip the pass.
+        """
+        async with in_transaction(connection_name=PRIMARY):
+            state = await crud_daily_store_metrics.lock_state(wait=False)
+            if state is None:
+                return {"skipped": True, "days": 0}
+            yesterday = state["yesterday"]
+            if state["sealed_through"] is None:
+                start_date = await crud_daily_store_metrics.get_first_day() or yesterday
+            else:
+                start_date = state["sealed_through"] - timedelta(
+                    days=max(settings.ANALYTICS_ROLLUP_RESEAL_DAYS, 0) - 1
+                )
+            start_date = min(start_date, yesterday)
+
+        days = 0
+        for batch_start, batch_end in date_batches(
+            start_date, yesterday, max(settings.ANALYTICS_ROLLUP_BATCH_DAYS, 1)
+        ):
+            async with in_transaction(connection_name=PRIMARY):
+                if await crud_daily_store_metrics.lock_state(wait=False) is None:
+                    return {"skipped": True, "days": days}
+                await crud_daily_store_metrics.rollup_days(
+                    start_date=batch_start, end_date=batch_end
+                )
+                await crud_daily_store_metrics.seal(through=batch_end)
+            days += (batch_end - batch_start).days + 1
+        return {"skipped": False, "days": days, "sealed_through": yesterday}
+
+    @staticmethod
+    async def run_rollup() -> None:
+        """
+        Run refresh_rollup now and then every ANALYTICS_ROLLUP_INTERVAL_SECONDS
+        (0 = only once).
+        """
+        while True:
+            try:
+                await AnalyticsService.refresh_rollup()
+            except Exception as e:
+                logger.warning(f"No se pudo consolidar daily_store_metrics: {e}")
+            if settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+
     @staticmethod
     async def get_analytics_by_date_range(
         start_date: date, end_date: date = None, store_id: Optional[UUID] = None
@@ -23,6 +233,10 @@ class AnalyticsService:
         Get analytics data for a date range with daily breakdowns.
         If end_date is None, use current date.
         Returns daily counts and totals for the date range.
+
+        Sealed days come from the daily_store_metrics rollup and the rest
+        (normally just today) from one grouped query per metric; days without
+        activity are filled with zeros in memory.
         """
         if end_date is None:
             end_date = date.today()
@@ -31,106 +245,207 @@ class AnalyticsService:
         if start_date > end_date:
             start_date, end_date = end_date, start_date
 
-        # Convert dates to datetime for comparison
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
+        metrics_by_day = await AnalyticsService._fetch_metrics_by_day(
+            start_date, end_date, store_id
+        )
 
         # Initialize daily data list
         daily_data = []
         current_date = start_date
-        
+
         # Calculate totals and daily breakdowns
         total_customers = 0
         total_devices = 0
         total_payments = 0.0
         total_vendors = 0
-        
+        total_payments_by_state = {state: 0.0 for state in PAYMENT_STATE_COLUMNS}
+
         while current_date <= end_date:
-            current_datetime_start = datetime.combine(current_date, datetime.min.time())
-            current_datetime_end = datetime.combine(current_date, datetime.max.time())
-            
-            # Get customers count for the day
-            customer_query = User.filter(
-                role__name="Cliente",
-                created_at__gte=current_datetime_start,
-                created_at__lte=current_datetime_end
-            )
-            
-            # Filter by store_id if provided
-            if store_id:
-                customer_query = customer_query.filter(store_id=store_id)
-                
-            customers = await customer_query.count()
-            
-            # Get vendors count for the day
-            vendor_query = User.filter(
-                role__name="Vendedor",
-                created_at__gte=current_datetime_start,
-                created_at__lte=current_datetime_end
-            )
-            
-            # Filter by store_id if provided
-            if store_id:
-                vendor_query = vendor_query.filter(store_id=store_id)
-                
-            vendors = await vendor_query.count()
-            
-            # Get devices count for the day
-            device_query = Device.filter(
-                created_at__gte=current_datetime_start,
-                created_at__lte=current_datetime_end
-            )
-            
-            # Filter by store_id if provided - devices are linked to users through enrolment
-            if store_id:
-                device_query = device_query.filter(enrolment__user__store_id=store_id)
-                
-            devices = await device_query.count()
-            
-            # Get payments value for the day
-            payment_query = Payment.filter(
-                date__gte=current_datetime_start,
-                date__lte=current_datetime_end
-            )
-            
-            # Filter by store_id if provided
-            if store_id:
-                payment_query = payment_query.filter(plan__user__store_id=store_id)
-                
-            payments = await payment_query.all()
-            payments_value = sum(float(payment.value) for payment in payments)
-            
+            metrics = metrics_by_day.get(current_date, {})
+            customers = metrics.get("customers", 0)
+            vendors = metrics.get("vendors", 0)
+            devices = metrics.get("devices", 0)
+            payments_value = float(metrics.get("payments", 0))
+            payments_by_state = {
+                state: float(metrics.get(column, 0))
+                for state, column in PAYMENT_STATE_COLUMNS.items()
+            }
+
             # Add to totals
             total_customers += customers
             total_vendors += vendors
             total_devices += devices
             total_payments += payments_value
-            
+            for state, value in payments_by_state.items():
+                total_payments_by_state[state] += value
+
             # Add daily data
             daily_data.append(DailyAnalytics(
                 date=current_date,
                 customers=customers,
                 devices=devices,
                 payments=payments_value,
-                vendors=vendors
+                vendors=vendors,
+                payments_by_state=payments_by_state,
             ))
-            
+
             current_date += timedelta(days=1)
-        
+
         return AnalyticsResponse(
             total_customers=total_customers,
             total_devices=total_devices,
             total_payments=total_payments,
             total_vendors=total_vendors,
+            total_payments_by_state=total_payments_by_state,
             daily_data=daily_data
         )
 
+    @staticmethod
+    async def _iter_pages(
+        query: QuerySet,
+        order_field: str,
+        pk_field: str,
+        fields: List[str],
+        to_row: Callable[[dict], tuple],
+    ) -> AsyncIterator[List[tuple]]:
+        """
+        Iterate a queryset in pages using keyset pagination on
+        (order_field, pk_field), yielding each page already mapped to rows.
+        """
+        last = None
+        while True:
+            page_query = query
+            if last is not None:
+                page_query = page_query.filter(
+                    Q(**{f"{order_field}__gt": last[0]})
+                    | Q(**{order_field: last[0], f"{pk_field}__gt": last[1]})
+                )
+            records = (
+                await page_query.order_by(order_field, pk_field)
+                .limit(EXPORT_PAGE_SIZE)
+                .values(*fields)
+            )
+            if not records:
+                return
+            yield [to_row(record) for record in records]
+            if len(records) < EXPORT_PAGE_SIZE:
+                return
+            last = (records[-1][order_field], records[-1][pk_field])
+
+    @staticmethod
+    def _export_queries(
+        start_datetime: datetime, end_datetime: datetime, store_id: Optional[UUID]
+    ) -> Tuple[QuerySet, QuerySet, QuerySet, QuerySet]:
+        """
+        Customer, vendor, device and payment queries of the Excel report,
+        limited to the range and to the store if given.
+        """
+        customer_query = User.filter(
+            created_at__gte=start_datetime,
+            created_at__lte=end_datetime,
+            role__name=CUSTOMER_ROLE
+        )
+        vendor_query = User.filter(
+            created_at__gte=start_datetime,
+            created_at__lte=end_datetime,
+            role__name=VENDOR_ROLE
+        )
+        device_query = Device.filter(
+            created_at__gte=start_datetime,
+            created_at__lte=end_datetime
+        )
+        payment_query = Payment.filter(
+            date__gte=start_datetime,
+            date__lte=end_datetime
+        )
+
+        # Filter by store_id if provided
+        if store_id:
+            customer_query = customer_query.filter(store_id=store_id)
+            vendor_query = vendor_query.filter(store_id=store_id)
+            device_query = device_query.filter(enrolment__user__store_id=store_id)
+            payment_query = payment_query.filter(plan__user__store_id=store_id)
+
+        # El informe solo lee: va a la réplica si está disponible
+        db = read_db()
+        return (
+            customer_query.using_db(db),
+            vendor_query.using_db(db),
+            device_query.using_db(db),
+            payment_query.using_db(db),
+        )
+
+    @staticmethod
+    def _user_row(user: dict) -> tuple:
+        return (
+            user["dni"],
+            f"{user['first_name']} {user['last_name']}",
+            user["email"],
+            f"{user['prefix']}{user['phone']}",
+            user["city__name"] or "N/A",
+            user["created_at"].strftime('%Y-%m-%d %H:%M'),
+        )
+
+    @staticmethod
+    def _device_row(device: dict) -> tuple:
+        return (
+            device["imei"],
+            device["name"],
+            device["brand"],
+            device["model"],
+            getattr(device["state"], "value", device["state"]),
+            device["created_at"].strftime('%Y-%m-%d %H:%M'),
+        )
+
+    @staticmethod
+    def _payment_row(payment: dict) -> tuple:
+        return (
+            payment["reference"],
+            float(payment["value"]),
+            payment["method"],
+            getattr(payment["state"], "value", payment["state"]),
+            payment["date"].strftime('%Y-%m-%d %H:%M'),
+        )
+
+    @staticmethod
+    def _styled_cell(ws, value=None, font=None, fill=None, alignment=None) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        return cell
+
+    @staticmethod
+    async def _first_page(pages: AsyncIterator[list]) -> list:
+        try:
+            return await pages.__anext__()
+        except StopAsyncIteration:
+            return []
+
+    @staticmethod
+    def _column_widths(rows: List[list]) -> Dict[int, int]:
+        """Length of the longest value of each column (1-based)."""
+        widths: Dict[int, int] = {}
+        for row in rows:
+            for col, value in enumerate(row, 1):
+                widths[col] = max(widths.get(col, 0), len(str(value)))
+        return widths
+
     @staticmethod
     async def generate_analytics_excel(
         start_date: date, end_date: date = None, store_id: Optional[UUID] = None
-    ) -> BytesIO:
+    ) -> BinaryIO:
         """
         Generate Excel file with detailed analytics data for a date range.
+
+        Rows are paged from the database with keyset pagination and written
+        through openpyxl's write-only mode into a temporary file, so memory
+        stays bounded regardless of the range. Column widths are sized from
+        the first page of every section. The returned file is positioned at
+        the start and must be closed by the caller (see iter_excel_chunks).
         """
         if end_date is None:
             end_date = date.today()
@@ -143,209 +458,150 @@ class AnalyticsService:
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
 
-        # Create workbook and worksheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Analytics Report"
+        # Create write-only workbook and worksheet
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Analytics Report")
 
         # Define styles
         header_font = Font(bold=True, color="FFFFFF")
         header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         center_alignment = Alignment(horizontal="center")
 
-        # Get detailed data
-        customer_query = User.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime,
-            role__name="Cliente"
-        )
-        
-        # Filter by store_id if provided
-        if store_id:
-            customer_query = customer_query.filter(store_id=store_id)
-            
-        customers = await customer_query.prefetch_related("role", "city")
+        styled = partial(AnalyticsService._styled_cell, ws)
 
-        vendor_query = User.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime,
-            role__name="Vendedor"
-        )
-        
-        # Filter by store_id if provided
-        if store_id:
-            vendor_query = vendor_query.filter(store_id=store_id)
-            
-        vendors = await vendor_query.prefetch_related("role", "city")
+        def section_title(title: str, columns: int) -> list:
+            return [styled(title, font=header_font, fill=header_fill)] + [
+                styled(fill=header_fill) for _ in range(columns - 1)
+            ]
 
-        device_query = Device.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime
+        def header_row(headers: List[str]) -> list:
+            return [
+                styled(header, font=header_font, fill=header_fill, alignment=center_alignment)
+                for header in headers
+            ]
+
+        customer_query, vendor_query, device_query, payment_query = (
+            AnalyticsService._export_queries(start_datetime, end_datetime, store_id)
         )
-        
-        # Filter by store_id if provided
-        if store_id:
-            device_query = device_query.filter(enrolment__user__store_id=store_id)
-            
-        devices = await device_query.prefetch_related("enrolment")
 
-        payment_query = Payment.filter(
-            date__gte=start_datetime,
-            date__lte=end_datetime
+        # Summary totals come from the rollup plus the live days
+        metrics_by_day = await AnalyticsService._fetch_metrics_by_day(
+            start_date, end_date, store_id
+        )
+        total_customers = sum(row.get("customers", 0) for row in metrics_by_day.values())
+        total_vendors = sum(row.get("vendors", 0) for row in metrics_by_day.values())
+        total_devices = sum(row.get("devices", 0) for row in metrics_by_day.values())
+        total_payments = float(
+            sum(row.get("payments", 0) for row in metrics_by_day.values())
         )
-        
-        # Filter by store_id if provided
-        if store_id:
-            payment_query = payment_query.filter(plan__user__store_id=store_id)
-            
-        payments = await payment_query.prefetch_related("device", "plan")
 
-        # Summary section
-        ws["A1"] = "REPORTE DE ANALYTICS"
-        ws["A1"].font = Font(bold=True, size=16)
-        ws["A2"] = f"Período: {start_date.strftime('%Y-%m-%d')} al {end_date.strftime('%Y-%m-%d')}"
-        ws["A2"].font = Font(bold=True)
-
-        # Summary totals
-        ws["A4"] = "RESUMEN"
-        ws["A4"].font = header_font
-        ws["A4"].fill = header_fill
-        ws["B4"].fill = header_fill
-        
-        ws["A5"] = "Total Clientes:"
-        ws["B5"] = len(customers)
-        ws["A6"] = "Total Vendedores:"
-        ws["B6"] = len(vendors)
-        ws["A7"] = "Total Dispositivos:"
-        ws["B7"] = len(devices)
-        ws["A8"] = "Total Pagos:"
-        ws["B8"] = sum(float(payment.value) for payment in payments)
-
-        # Customers detail
-        current_row = 11
-        ws[f"A{current_row}"] = "DETALLE DE CLIENTES"
-        ws[f"A{current_row}"].font = header_font
-        ws[f"A{current_row}"].fill = header_fill
-        for col in range(1, 7):
-            ws[f"{get_column_letter(col)}{current_row}"].fill = header_fill
-        
-        current_row += 1
+        user_fields = [
+            "user_id", "created_at", "dni", "first_name", "last_name",
+            "email", "prefix", "phone", "city__name",
+        ]
+        device_fields = [
+            "device_id", "created_at", "imei", "name", "brand", "model", "state",
+        ]
+        payment_fields = [
+            "payment_id", "date", "reference", "value", "method", "state",
+        ]
+
         headers = ["DNI", "Nombre Completo", "Email", "Teléfono", "Ciudad", "Fecha Creación"]
-        for col, header in enumerate(headers, 1):
-            cell = ws[f"{get_column_letter(col)}{current_row}"]
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-
-        current_row += 1
-        for customer in customers:
-            ws[f"A{current_row}"] = customer.dni
-            ws[f"B{current_row}"] = f"{customer.first_name} {customer.last_name}"
-            ws[f"C{current_row}"] = customer.email
-            ws[f"D{current_row}"] = f"{customer.prefix}{customer.phone}"
-            ws[f"E{current_row}"] = customer.city.name if customer.city else "N/A"
-            ws[f"F{current_row}"] = customer.created_at.strftime('%Y-%m-%d %H:%M')
-            current_row += 1
-
-        # Vendors detail
-        current_row += 2
-        ws[f"A{current_row}"] = "DETALLE DE VENDEDORES"
-        ws[f"A{current_row}"].font = header_font
-        ws[f"A{current_row}"].fill = header_fill
-        for col in range(1, 7):
-            ws[f"{get_column_letter(col)}{current_row}"].fill = header_fill
-        
-        current_row += 1
-        for col, header in enumerate(headers, 1):
-            cell = ws[f"{get_column_letter(col)}{current_row}"]
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-
-        current_row += 1
-        for vendor in vendors:
-            ws[f"A{current_row}"] = vendor.dni
-            ws[f"B{current_row}"] = f"{vendor.first_name} {vendor.last_name}"
-            ws[f"C{current_row}"] = vendor.email
-            ws[f"D{current_row}"] = f"{vendor.prefix}{vendor.phone}"
-            ws[f"E{current_row}"] = vendor.city.name if vendor.city else "N/A"
-            ws[f"F{current_row}"] = vendor.created_at.strftime('%Y-%m-%d %H:%M')
-            current_row += 1
-
-        # Devices detail
-        current_row += 2
-        ws[f"A{current_row}"] = "DETALLE DE DISPOSITIVOS"
-        ws[f"A{current_row}"].font = header_font
-        ws[f"A{current_row}"].fill = header_fill
-        for col in range(1, 7):
-            ws[f"{get_column_letter(col)}{current_row}"].fill = header_fill
-        
-        current_row += 1
         device_headers = ["IMEI", "Nombre", "Marca", "Modelo", "Estado", "Fecha Creación"]
-        for col, header in enumerate(device_headers, 1):
-            cell = ws[f"{get_column_letter(col)}{current_row}"]
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-
-        current_row += 1
-        for device in devices:
-            ws[f"A{current_row}"] = device.imei
-            ws[f"B{current_row}"] = device.name
-            ws[f"C{current_row}"] = device.brand
-            ws[f"D{current_row}"] = device.model
-            ws[f"E{current_row}"] = device.state.value
-            ws[f"F{current_row}"] = device.created_at.strftime('%Y-%m-%d %H:%M')
-            current_row += 1
-
-        # Payments detail
-        current_row += 2
-        ws[f"A{current_row}"] = "DETALLE DE PAGOS"
-        ws[f"A{current_row}"].font = header_font
-        ws[f"A{current_row}"].fill = header_fill
-        for col in range(1, 6):
-            ws[f"{get_column_letter(col)}{current_row}"].fill = header_fill
-        
-        current_row += 1
         payment_headers = ["Referencia", "Valor", "Método", "Estado", "Fecha"]
-        for col, header in enumerate(payment_headers, 1):
-            cell = ws[f"{get_column_letter(col)}{current_row}"]
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-
-        current_row += 1
-        for payment in payments:
-            ws[f"A{current_row}"] = payment.reference
-            ws[f"B{current_row}"] = float(payment.value)
-            ws[f"C{current_row}"] = payment.method
-            ws[f"D{current_row}"] = payment.state.value
-            ws[f"E{current_row}"] = payment.date.strftime('%Y-%m-%d %H:%M')
-            current_row += 1
-
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Save to BytesIO
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-        
-        return excel_buffer
+
+        sections = [
+            (
+                "DETALLE DE CLIENTES", headers,
+                AnalyticsService._iter_pages(customer_query, "created_at", "user_id", user_fields, AnalyticsService._user_row),
+            ),
+            (
+                "DETALLE DE VENDEDORES", headers,
+                AnalyticsService._iter_pages(vendor_query, "created_at", "user_id", user_fields, AnalyticsService._user_row),
+            ),
+            (
+                "DETALLE DE DISPOSITIVOS", device_headers,
+                AnalyticsService._iter_pages(device_query, "created_at", "device_id", device_fields, AnalyticsService._device_row),
+            ),
+            (
+                "DETALLE DE PAGOS", payment_headers,
+                AnalyticsService._iter_pages(payment_query, "date", "payment_id", payment_fields, AnalyticsService._payment_row),
+            ),
+        ]
+
+        summary_rows = [
+            [styled("REPORTE DE ANALYTICS", font=Font(bold=True, size=16))],
+            [styled(
+                f"Período: {start_date.strftime('%Y-%m-%d')} al {end_date.strftime('%Y-%m-%d')}",
+                font=Font(bold=True),
+            )],
+            [],
+            [styled("RESUMEN", font=header_font, fill=header_fill), styled(fill=header_fill)],
+            ["Total Clientes:", total_customers],
+            ["Total Vendedores:", total_vendors],
+            ["Total Dispositivos:", total_devices],
+            ["Total Pagos:", total_payments],
+        ]
+
+        # Fetch the first page of every section to size the columns; in
+        # write-only mode widths must be set before any row is written.
+        first_pages = [await AnalyticsService._first_page(pages) for _, _, pages in sections]
+
+        sample = [
+            [getattr(cell, "value", cell) for cell in row] for row in summary_rows
+        ]
+        for (title, section_headers, _), first_page in zip(sections, first_pages):
+            sample += [[title], section_headers] + first_page
+        for col, width in AnalyticsService._column_widths(sample).items():
+            ws.column_dimensions[get_column_letter(col)].width = min(
+                width + 2, MAX_COLUMN_WIDTH
+            )
+
+        # Summary section
+        for row in summary_rows:
+            ws.append(row)
+        ws.append([])
+        ws.append([])
+
+        # Detail sections
+        for index, ((title, section_headers, pages), first_page) in enumerate(
+            zip(sections, first_pages)
+        ):
+            if index:
+                ws.append([])
+                ws.append([])
+            ws.append(section_title(title, len(section_headers)))
+            ws.append(header_row(section_headers))
+            for row in first_page:
+                ws.append(row)
+            async for page in pages:
+                for row in page:
+                    ws.append(row)
+
+        # Save to a temporary file off the event loop
+        excel_file = TemporaryFile()
+        try:
+            await run_in_threadpool(wb.save, excel_file)
+        except Exception:
+            excel_file.close()
+            raise
+        excel_file.seek(0)
+
+        return excel_file
+
+    @staticmethod
+    def iter_excel_chunks(excel_file: BinaryIO) -> Iterator[bytes]:
+        """
+        Yield the generated Excel file in fixed-size chunks and close it.
+        """
+        try:
+            while True:
+                chunk = excel_file.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            excel_file.close()
 
 
 analytics_service = AnalyticsService()
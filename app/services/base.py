@@ -1,4 +1,4 @@
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
 
 from fastapi import HTTPException
 from tortoise.exceptions import IntegrityError
@@ -21,11 +21,14 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         limit: int = 100,
         payload: Optional[Dict[str, Any]] = None,
         prefetch_fields: Optional[List[str]] = None,
+        store_id: Optional[Any] = None,
     ) -> List[ModelType]:
         # Parámetros básicos que todas las implementaciones de CRUD aceptan
         base_params = {"skip": skip, "limit": limit}
         if prefetch_fields:
             base_params["prefetch_fields"] = prefetch_fields
+        if store_id:
+            base_params["store_id"] = store_id
             
         # Si no hay filtros, simplemente llamamos al método con los parámetros básicos
         if payload is None:
@@ -48,6 +51,27 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 direct_params.update(payload)
                 return await self.crud.get_all(**direct_params)
 
+    async def get_page(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        payload: Optional[Dict[str, Any]] = None,
+        store_id: Optional[Any] = None,
+        q_filter: Optional[Any] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Página por cursor: devuelve los registros y el cursor de la siguiente página."""
+        try:
+            return await self.crud.get_page(
+                cursor=cursor,
+                limit=limit,
+                payload=payload,
+                store_id=store_id,
+                q_filter=q_filter,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     async def get(self, id: Any) -> Optional[ModelType]:
         return await self.crud.get(id=id)
 
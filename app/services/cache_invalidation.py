@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from tortoise import Tortoise
+from tortoise.backends.base.config_generator import expand_db_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# handler(key): key es lo que se invalidó dentro del tema, o None para todo
+InvalidationHandler = Callable[[Optional[str]], None]
+
+
+class LocalInvalidationBackend:
+    """
+    In-process only: nothing is sent to other workers. For single-worker
+    deployments and local runs without a database channel.
+    """
+
+    async def publish(self, message: str) -> None:
+        return None
+
+    async def listen(
+        self, on_message: Callable[[str], None], on_connect: Callable[[], None]
+    ) -> None:
+        # No hay canal que escuchar; la tarea queda inactiva hasta cancelarse
+        await asyncio.Event().wait()
+
+
+class PostgresInvalidationBackend:
+    """
+    Sends invalidations with NOTIFY on `channel` and receives them on a
+    dedicated LISTEN connection. The listener reconnects after connection
+    loss; on each (re)connection on_connect runs so subscribers drop state
+    that may have changed while notifications were being missed.
+    """
+
+    def __init__(self, *, db_url: str, channel: str, healthcheck_interval: float) -> None:
+        self.db_url = db_url
+        self.channel = channel
+        self.healthcheck_interval = healthcheck_interval
+
+    async def publish(self, message: str) -> None:
+        await Tortoise.get_connection("default").execute_query(
+            "SELECT pg_notify($1, $2)", [self.channel, message]
+        )
+
+    async def _connect(self):
+        import asyncpg
+
+        credentials = expand_db_url(self.db_url)["credentials"]
+        return await asyncpg.connect(
+            host=credentials.get("host"),
+            port=credentials.get("port"),
+            user=credentials.get("user"),
+            password=credentials.get("password"),
+            database=credentials.get("database"),
+        )
+
+    async def listen(
+        self, on_message: Callable[[str], None], on_connect: Callable[[], None]
+    ) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await self._connect()
+                await connection.add_listener(
+                    self.channel, lambda _conn, _pid, _channel, payload: on_message(payload)
+                )
+                on_connect()
+                # Un SELECT periódico detecta conexiones caídas que no avisan
+                while True:
+                    await asyncio.sleep(self.healthcheck_interval)
+                    await connection.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "Cache invalidation listener on %s lost its connection",
+                    self.channel,
+                    exc_info=True,
+                )
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.healthcheck_interval)
+
+
+class InvalidationBus:
+    """
+    Routes cache invalidations (and other change notifications) by topic.
+
+    publish() runs the local subscribers right away and forwards the message
+    through the backend, which delivers it to the other processes. Each
+    process tags its messages with a random origin so it skips its own.
+    """
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[InvalidationHandler]] = {}
+        self._received = 0
+        self._published = 0
+        self._publish_errors = 0
+
+    def subscribe(self, topic: str, handler: InvalidationHandler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def _dispatch(self, topic: str, key: Optional[str]) -> None:
+        for handler in self._handlers.get(topic, []):
+            handler(key)
+
+    async def publish(self, topic: str, key: Optional[str] = None) -> None:
+        self._dispatch(topic, key)
+        message = json.dumps({"origin": self.origin, "topic": topic, "key": key})
+        try:
+            await self.backend.publish(message)
+            self._published += 1
+        except Exception:
+            # La escritura ya se hizo; los demás procesos se ponen al día por TTL
+            self._publish_errors += 1
+            logger.warning("Could not publish cache invalidation for %s", topic, exc_info=True)
+
+    def _on_message(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed cache invalidation: %r", payload)
+            return
+        if message.get("origin") == self.origin:
+            return
+        self._received += 1
+        self._dispatch(message.get("topic"), message.get("key"))
+
+    def _on_connect(self) -> None:
+        for topic in self._handlers:
+            self._dispatch(topic, None)
+
+    async def run(self) -> None:
+        """
+        Listen for invalidations from other processes until cancelled.
+        """
+        await self.backend.listen(self._on_message, self._on_connect)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "topics": sorted(self._handlers),
+            "published": self._published,
+            "publish_errors": self._publish_errors,
+            "received": self._received,
+        }
+
+
+def _build_backend() -> Any:
+    if settings.CACHE_INVALIDATION_BACKEND == "postgres":
+        return PostgresInvalidationBackend(
+            db_url=settings.POSTGRES_DATABASE_URL,
+            channel=settings.CACHE_INVALIDATION_CHANNEL,
+            healthcheck_interval=settings.CACHE_INVALIDATION_HEALTHCHECK_SECONDS,
+        )
+    if settings.CACHE_INVALIDATION_BACKEND == "local":
+        return LocalInvalidationBackend()
+    raise ValueError(
+        f"Unsupported cache invalidation backend: {settings.CACHE_INVALIDATION_BACKEND}"
+    )
+
+
+invalidation_bus = InvalidationBus(_build_backend())
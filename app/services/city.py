@@ -1,9 +1,19 @@
+from typing import Any, Dict, Optional
+
 from app.infra.postgres.crud.city import crud_city
-from app.services.base import BaseService
+from app.services.geography_cache import GeographyService, geography_cache
+
 
+class CityService(GeographyService):
+    async def get_all(self, *, skip: int = 0, limit: int = 100, payload: Optional[Dict[str, Any]] = None, **kwargs):
+        """Ciudades desde la caché de geografía, filtradas por región y/o nombre"""
+        payload = payload or {}
+        return await geography_cache.cities(
+            region_id=payload.get("region_id"), name=payload.get("name__icontains")
+        )
 
-class CityService(BaseService):
-    pass
+    async def get(self, id: Any) -> Optional[Dict[str, Any]]:
+        return await geography_cache.get_city(id)
 
 
 city_service = CityService(crud=crud_city)
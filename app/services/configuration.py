@@ -1,9 +1,100 @@
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
 from app.infra.postgres.crud.configuration import crud_configuration
 from app.services.base import BaseService
+from app.services.cache_invalidation import invalidation_bus
+from app.services.configuration_cache import (
+    INVALIDATION_TOPIC,
+    configuration_cache,
+    invalidation_key,
+)
+
+TRUE_VALUES = ("1", "true", "yes", "on", "si", "sí")
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in TRUE_VALUES
 
 
 class ConfigurationService(BaseService):
-    pass
+    async def get_all(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        payload: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ):
+        """
+        Las consultas por tienda se sirven desde la caché; el listado sin
+        tienda (back office) va a la base de datos.
+        """
+        store_id = payload.get("store_id") if payload else None
+        if store_id is None:
+            return await super().get_all(skip=skip, limit=limit, payload=payload, **kwargs)
+        entries = await configuration_cache.store_entries(store_id)
+        key = payload.get("key")
+        if key is not None:
+            rows = [entries[key]] if key in entries else []
+        else:
+            rows = list(entries.values())
+        return rows[skip:skip + limit]
+
+    async def resolve(
+        self, *, store_id: Optional[UUID] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Effective configurations of a store: its own value for each key,
+        falling back to the global one.
+        """
+        resolved = await configuration_cache.resolve(store_id)
+        if key is not None:
+            return [resolved[key]] if key in resolved else []
+        return list(resolved.values())
+
+    async def get_value(
+        self,
+        key: str,
+        *,
+        store_id: Optional[UUID] = None,
+        default: Any = None,
+        cast: Callable[[str], Any] = str,
+    ) -> Any:
+        """
+        Typed lookup of one key with store -> global fallback. `cast` converts
+        the stored string (bool accepts 1/true/yes/on/si); returns `default`
+        if the key is not defined or the value cannot be converted.
+        """
+        row = (await configuration_cache.resolve(store_id)).get(key)
+        if row is None:
+            return default
+        try:
+            return _to_bool(row["value"]) if cast is bool else cast(row["value"])
+        except (TypeError, ValueError):
+            return default
+
+    async def _invalidate(self, store_id: Optional[Any]) -> None:
+        await invalidation_bus.publish(INVALIDATION_TOPIC, invalidation_key(store_id))
+
+    async def create(self, *, obj_in: Any) -> Any:
+        configuration = await super().create(obj_in=obj_in)
+        await self._invalidate(configuration.store_id)
+        return configuration
+
+    async def update(self, *, id: Any, obj_in: Any) -> Any:
+        configuration = await super().update(id=id, obj_in=obj_in)
+        if configuration:
+            await self._invalidate(configuration.store_id)
+        return configuration
+
+    async def delete(self, *, id: Any) -> bool:
+        configuration = await self.crud.get(id=id)
+        if configuration is None:
+            return False
+        deleted = await super().delete(id=id)
+        await self._invalidate(configuration.store_id)
+        return deleted
 
 
 configuration_service = ConfigurationService(crud=crud_configuration)
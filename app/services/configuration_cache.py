@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.infra.postgres.models.configuration import Configuration
+from app.services.cache_invalidation import invalidation_bus
+
+INVALIDATION_TOPIC = "configuration"
+# Clave de invalidación de las configuraciones globales (store_id NULL)
+GLOBAL_KEY = "global"
+
+CONFIGURATION_FIELDS = ("configuration_id", "key", "value", "description", "store_id")
+
+
+def invalidation_key(store_id: Optional[Any]) -> str:
+    return str(store_id) if store_id else GLOBAL_KEY
+
+
+class ConfigurationCache:
+    """
+    Lazily loaded, in-process map of configurations per store.
+
+    Each store's rows (and the global rows, store_id NULL, under None) are
+    loaded with one query the first time they are read and kept for `ttl`
+    seconds as {key: row}. Writes invalidate the affected store through the
+    invalidation bus, which also reaches the other processes.
+    """
+
+    def __init__(self, *, ttl: float) -> None:
+        self.ttl = ttl
+        # store_id (None = globales) -> (expires_at, {key: row})
+        self._stores: Dict[Optional[UUID], Tuple[float, Dict[str, Dict[str, Any]]]] = {}
+        self._locks: Dict[Optional[UUID], asyncio.Lock] = {}
+        # Se incrementa en cada invalidación; una carga iniciada antes de una
+        # invalidación no se guarda.
+        self.generation = 0
+        self._hits = 0
+        self._loads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _fresh(self, store_id: Optional[UUID]) -> Optional[Dict[str, Dict[str, Any]]]:
+        entry = self._stores.get(store_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    async def _load(self, store_id: Optional[UUID]) -> Dict[str, Dict[str, Any]]:
+        generation = self.generation
+        if store_id is None:
+            query = Configuration.filter(store_id__isnull=True)
+        else:
+            query = Configuration.filter(store_id=store_id)
+        rows = await query.order_by("key").values(*CONFIGURATION_FIELDS)
+        self._loads += 1
+        entries = {row["key"]: row for row in rows}
+        if self.enabled and generation == self.generation:
+            self._stores[store_id] = (time.monotonic() + self.ttl, entries)
+        return entries
+
+    async def store_entries(self, store_id: Optional[UUID]) -> Dict[str, Dict[str, Any]]:
+        """
+        Rows defined for one store (None = global rows), keyed by configuration key.
+        """
+        entries = self._fresh(store_id)
+        if entries is not None:
+            self._hits += 1
+            return entries
+        if not self.enabled:
+            return await self._load(store_id)
+        lock = self._locks.setdefault(store_id, asyncio.Lock())
+        async with lock:
+            entries = self._fresh(store_id)
+            if entries is not None:
+                self._hits += 1
+                return entries
+            return await self._load(store_id)
+
+    async def resolve(self, store_id: Optional[UUID]) -> Dict[str, Dict[str, Any]]:
+        """
+        Effective configuration of a store: its own rows over the global ones.
+        """
+        resolved = dict(await self.store_entries(None))
+        if store_id is not None:
+            resolved.update(await self.store_entries(store_id))
+        return resolved
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Drop one store (invalidation key from invalidation_key()) or, with
+        None, every store.
+        """
+        self.generation += 1
+        if key is None:
+            self._stores.clear()
+        elif key == GLOBAL_KEY:
+            self._stores.pop(None, None)
+        else:
+            try:
+                self._stores.pop(UUID(key), None)
+            except ValueError:
+                self._stores.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stores": len(self._stores),
+            "hits": self._hits,
+            "loads": self._loads,
+        }
+
+
+configuration_cache = ConfigurationCache(ttl=settings.CONFIGURATION_CACHE_TTL_SECONDS)
+invalidation_bus.subscribe(INVALIDATION_TOPIC, configuration_cache.invalidate)
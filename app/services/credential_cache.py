@@ -0,0 +1,180 @@
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache_invalidation import invalidation_bus
+
+INVALIDATION_TOPIC = "credentials"
+
+# Resultado cacheado de una verificación negativa
+INVALID = object()
+
+
+class CredentialCache:
+    """
+    Short-lived, size-bounded LRU cache of /auth/verify results.
+
+    Entries are keyed by username plus an HMAC of the presented password
+    under a per-process random key, so plain passwords are never kept in
+    memory. Successful verifications live for `ttl` seconds; failed ones
+    live for `negative_ttl` seconds. A wrong password is cached for that
+    exact (username, password) pair, which absorbs clients retrying the
+    same bad credentials but not guesses with different passwords; an
+    unknown username is cached for any password.
+
+    User writes publish an invalidation on the "credentials" topic of the
+    invalidation bus (see publish_invalidation), so a password or state
+    change takes effect in every process; the TTLs bound staleness if an
+    invalidation is lost.
+    """
+
+    def __init__(self, *, ttl: float, negative_ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._secret = os.urandom(32)
+        # key -> (expires_at, value, user_id)
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        # Se incrementa en cada invalidación; un resultado calculado antes de
+        # una invalidación no se guarda (ver set_valid/set_invalid).
+        self.generation = 0
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _key(self, username: str, password: Optional[str]) -> Tuple[str, bytes]:
+        # Sin contraseña la entrada representa "usuario inexistente"
+        if password is None:
+            return (username, b"")
+        digest = hmac.new(
+            self._secret, password.encode("utf-8"), hashlib.sha256
+        ).digest()
+        return (username, digest)
+
+    def get(self, username: str, password: str) -> Optional[Any]:
+        """
+        Return the cached result (a user payload or INVALID), or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        for key in (self._key(username, None), self._key(username, password)):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            expires_at, value, _ = entry
+            if expires_at <= now:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            if value is INVALID:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return value
+        self._misses += 1
+        return None
+
+    def _set(
+        self,
+        key: Tuple[str, bytes],
+        value: Any,
+        ttl: float,
+        user_id: Optional[str],
+        generation: Optional[int],
+    ) -> None:
+        if not self.enabled or ttl <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value, user_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set_valid(
+        self,
+        username: str,
+        password: str,
+        user: Dict[str, Any],
+        generation: Optional[int] = None,
+    ) -> None:
+        self._set(
+            self._key(username, password), user, self.ttl, user.get("user_id"), generation
+        )
+
+    def set_invalid(
+        self, username: str, password: str, generation: Optional[int] = None
+    ) -> None:
+        self._set(
+            self._key(username, password), INVALID, self.negative_ttl, None, generation
+        )
+
+    def set_unknown_user(self, username: str, generation: Optional[int] = None) -> None:
+        self._set(self._key(username, None), INVALID, self.negative_ttl, None, generation)
+
+    def invalidate(self, *, username: Optional[str] = None, user_id: Any = None) -> None:
+        """
+        Drop every entry of a username and/or of a user id.
+        """
+        self.generation += 1
+        user_id = str(user_id) if user_id is not None else None
+        stale = [
+            key
+            for key, (_, _, entry_user_id) in self._entries.items()
+            if (username is not None and key[0] == username)
+            or (user_id is not None and entry_user_id == user_id)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def handle_invalidation(self, key: Optional[str]) -> None:
+        """
+        Invalidation bus handler: key is "username:<username>",
+        "user_id:<user_id>" or None to drop everything.
+        """
+        if key is None:
+            self.clear()
+        elif key.startswith("username:"):
+            self.invalidate(username=key[len("username:"):])
+        elif key.startswith("user_id:"):
+            self.invalidate(user_id=key[len("user_id:"):])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+        }
+
+
+credential_cache = CredentialCache(
+    ttl=settings.CREDENTIAL_CACHE_TTL_SECONDS,
+    negative_ttl=settings.CREDENTIAL_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=settings.CREDENTIAL_CACHE_MAX_ENTRIES,
+)
+invalidation_bus.subscribe(INVALIDATION_TOPIC, credential_cache.handle_invalidation)
+
+
+async def publish_invalidation(*, username: Optional[str] = None, user_id: Any = None) -> None:
+    """
+    Drop the cached verifications of a user in every process.
+    """
+    if username is not None:
+        await invalidation_bus.publish(INVALIDATION_TOPIC, f"username:{username}")
+    if user_id is not None:
+        await invalidation_bus.publish(INVALIDATION_TOPIC, f"user_id:{user_id}")
@@ -29,14 +29,16 @@ class DeviceService(BaseService[Device, DeviceCreate, DeviceUpdate]):
                 detail=f"Database integrity error: {e}",
             )
             
-    async def count(self) -> int:
+    async def count(
+        self, *, payload: Optional[Dict[str, Any]] = None, store_id: Optional[Any] = None
+    ) -> int:
         """
         Count the total number of devices in the system.
         
         Returns:
             int: The total count of devices
         """
-        return await self.crud.count(payload={})
+        return await self.crud.count(payload=payload or {}, store_id=store_id)
 
 
 device_service = DeviceService(crud_device)
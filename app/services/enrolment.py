@@ -1,9 +1,169 @@
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from tortoise import timezone as tortoise_timezone
+from tortoise.exceptions import IntegrityError, OperationalError
+
 from app.infra.postgres.crud.enrolment import crud_enrolment
+from app.schemas.enrolment_bulk import (
+    EnrolmentBulkItem,
+    EnrolmentBulkItemResult,
+    EnrolmentBulkResponse,
+)
 from app.services.base import BaseService
 
 
+Parsed = List[Tuple[EnrolmentBulkItemResult, EnrolmentBulkItem]]
+
+
+def _parse_items(items: List[Any]) -> Tuple[List[EnrolmentBulkItemResult], Parsed]:
+    """
+    Validate each raw item; the invalid ones get an error result.
+    """
+    results: List[EnrolmentBulkItemResult] = []
+    parsed: Parsed = []
+    for index, raw in enumerate(items):
+        try:
+            item = EnrolmentBulkItem.parse_obj(raw)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in e.errors()
+            )
+            results.append(EnrolmentBulkItemResult(index=index, status="error", detail=detail))
+            continue
+        result = EnrolmentBulkItemResult(index=index, status="created")
+        results.append(result)
+        parsed.append((result, item))
+    return results, parsed
+
+
+def _item_errors(
+    item: EnrolmentBulkItem,
+    found: Dict[str, Set[str]],
+    imei_counts: Counter,
+    icc_counts: Counter,
+) -> List[str]:
+    """
+    Reasons an item cannot be written: missing users, or IMEI/ICC IDs
+    already registered or repeated in the batch.
+    """
+    errors = []
+    if str(item.user_id) not in found["user_id"]:
+        errors.append("User not found")
+    if str(item.vendor_id) not in found["user_id"]:
+        errors.append("Vendor not found")
+    if item.device.imei in found["imei"]:
+        errors.append(f"IMEI {item.device.imei} is already registered")
+    elif imei_counts[item.device.imei] > 1:
+        errors.append(f"IMEI {item.device.imei} is repeated in the batch")
+    for sim in item.sims:
+        if sim.icc_id in found["icc_id"]:
+            errors.append(f"ICC ID {sim.icc_id} is already registered")
+        elif icc_counts[sim.icc_id] > 1:
+            errors.append(f"ICC ID {sim.icc_id} is repeated in the batch")
+    return errors
+
+
+def _item_rows(result: EnrolmentBulkItemResult, item: EnrolmentBulkItem) -> Dict[str, List[Tuple]]:
+    """
+    Assign the ids of a valid item and build its rows for
+    CRUDEnrolment.bulk_create.
+    """
+    result.enrolment_id = uuid.uuid4()
+    result.device_id = uuid.uuid4()
+    device = item.device
+    rows: Dict[str, List[Tuple]] = {
+        "enrolments": [(result.enrolment_id, item.user_id, item.vendor_id)],
+        "devices": [(
+            result.device_id, result.enrolment_id, device.name, device.imei,
+            device.imei_two, device.serial_number, device.model, device.brand,
+            device.product_name, device.state.value,
+        )],
+        "sims": [],
+        "plans": [],
+    }
+    for sim in item.sims:
+        sim_id = uuid.uuid4()
+        result.sim_ids.append(sim_id)
+        rows["sims"].append((
+            sim_id, result.device_id, sim.icc_id, sim.slot_index,
+            sim.operator, sim.number, sim.state,
+        ))
+    if item.plan:
+        result.plan_id = uuid.uuid4()
+        plan = item.plan
+        rows["plans"].append((
+            result.plan_id, item.user_id, item.vendor_id, result.device_id,
+            plan.initial_date, plan.value, plan.quotas, plan.period, plan.contract,
+        ))
+    return rows
+
+
 class EnrolmentService(BaseService):
-    pass
+    async def bulk_create(
+        self, *, items: List[Any], all_or_nothing: bool = False
+    ) -> EnrolmentBulkResponse:
+        """
+        Validate and write a batch of complete enrollments (enrolment,
+        device, sims and plan) in one transaction.
+
+        Users, vendors, IMEIs and ICC IDs are checked for the whole batch in a
+        single query before writing; each item gets its own status. With
+        `all_or_nothing` a single invalid item rejects the batch.
+        """
+        results, parsed = _parse_items(items)
+
+        imei_counts = Counter(item.device.imei for _, item in parsed)
+        icc_counts = Counter(sim.icc_id for _, item in parsed for sim in item.sims)
+        found = await self.crud.bulk_lookup(
+            imeis=list(imei_counts),
+            icc_ids=list(icc_counts),
+            user_ids=list({user_id for _, item in parsed for user_id in (item.user_id, item.vendor_id)}),
+        )
+
+        valid: Parsed = []
+        for result, item in parsed:
+            errors = _item_errors(item, found, imei_counts, icc_counts)
+            if errors:
+                result.status = "error"
+                result.detail = "; ".join(errors)
+            else:
+                valid.append((result, item))
+
+        if all_or_nothing and len(valid) < len(results):
+            for result, _ in valid:
+                result.status = "skipped"
+                result.detail = "Batch rejected because other items have errors"
+            valid = []
+
+        rows: Dict[str, List[Tuple]] = {"enrolments": [], "devices": [], "sims": [], "plans": []}
+        for result, item in valid:
+            for table, item_rows in _item_rows(result, item).items():
+                rows[table].extend(item_rows)
+
+        try:
+            await self.crud.bulk_create(**rows, created_at=tortoise_timezone.now())
+        except IntegrityError as e:
+            # Otra escritura registró el mismo IMEI/ICC ID tras la prevalidación
+            raise HTTPException(
+                status_code=409,
+                detail=f"Conflicto al guardar el lote, no se guardó ninguna matrícula: {e}",
+            )
+        except OperationalError as e:
+            # Datos que la validación del esquema no rechazó (longitudes o rangos de columna)
+            raise HTTPException(
+                status_code=422,
+                detail=f"Datos no válidos en el lote, no se guardó ninguna matrícula: {e}",
+            )
+
+        created = len(valid)
+        return EnrolmentBulkResponse(
+            created=created, failed=len(results) - created, items=results
+        )
 
 
 enrolment_service = EnrolmentService(crud=crud_enrolment)
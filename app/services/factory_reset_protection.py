@@ -1,18 +1,99 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
 from app.infra.postgres.crud.factory_reset_protection import (
     crud_factory_reset_protection,
 )
-from app.infra.postgres.models.factory_reset_protection import FactoryResetProtection
 from app.services.base import BaseService
+from app.services.cache_invalidation import invalidation_bus
+from app.services.factory_reset_protection_cache import (
+    INVALIDATION_TOPIC,
+    factory_reset_protection_cache,
+)
+
+LOOKUP_FIELDS = ("account_id", "email")
 
 
 class FactoryResetProtectionService(BaseService):
     async def get_factory_reset_by_account_id(
-        self, id: UUID, store_id: Optional[UUID] = None
-    ) -> Optional[FactoryResetProtection]:
-        return await self.crud.get_by_account_id(account_id=id, store_id=store_id)
+        self, id: str, store_id: Optional[UUID] = None
+    ) -> Optional[Dict[str, Any]]:
+        found, _, _ = await self.lookup(account_ids=[id], store_id=store_id)
+        return found[0] if found else None
+
+    async def lookup(
+        self,
+        *,
+        account_ids: Sequence[str] = (),
+        emails: Sequence[str] = (),
+        store_id: Optional[UUID] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+        """
+        Resolve many account ids and emails at once: cached lookups are
+        answered from the cache and the rest in a single query.
+        Returns (rows found, missing account ids, missing emails).
+        """
+        cache = factory_reset_protection_cache
+        store_key = str(store_id) if store_id else ""
+        requested = {
+            "account_id": list(dict.fromkeys(account_ids)),
+            "email": list(dict.fromkeys(emails)),
+        }
+        results: Dict[Tuple[str, str], Tuple[Dict[str, Any], ...]] = {}
+        pending: Dict[str, List[str]] = {field: [] for field in LOOKUP_FIELDS}
+        for field in LOOKUP_FIELDS:
+            for value in requested[field]:
+                rows = cache.get((store_key, field, value))
+                if rows is None:
+                    pending[field].append(value)
+                else:
+                    results[(field, value)] = rows
+
+        if pending["account_id"] or pending["email"]:
+            generation = cache.generation
+            rows = await self.crud.get_by_account_ids(
+                account_ids=pending["account_id"],
+                emails=pending["email"],
+                store_id=store_id,
+            )
+            matches: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+            for row in rows:
+                for field in LOOKUP_FIELDS:
+                    matches.setdefault((field, row[field]), []).append(row)
+            for field in LOOKUP_FIELDS:
+                for value in pending[field]:
+                    found = tuple(matches.get((field, value), ()))
+                    results[(field, value)] = found
+                    cache.set((store_key, field, value), found, generation)
+
+        found_by_id: Dict[Any, Dict[str, Any]] = {}
+        missing: Dict[str, List[str]] = {field: [] for field in LOOKUP_FIELDS}
+        for field in LOOKUP_FIELDS:
+            for value in requested[field]:
+                rows = results[(field, value)]
+                if not rows:
+                    missing[field].append(value)
+                for row in rows:
+                    found_by_id.setdefault(row["factory_reset_protection_id"], row)
+        return list(found_by_id.values()), missing["account_id"], missing["email"]
+
+    async def create(self, *, obj_in: Any) -> Any:
+        try:
+            return await super().create(obj_in=obj_in)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
+
+    async def update(self, *, id: Any, obj_in: Any) -> Any:
+        try:
+            return await super().update(id=id, obj_in=obj_in)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
+
+    async def delete(self, *, id: Any) -> bool:
+        try:
+            return await super().delete(id=id)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
 
 
 # Instancia global a usar en routers
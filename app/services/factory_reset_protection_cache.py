@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache_invalidation import invalidation_bus
+
+INVALIDATION_TOPIC = "factory_reset_protection"
+
+# (tienda o "" para cualquiera, "account_id" | "email", valor)
+LookupKey = Tuple[str, str, str]
+
+
+class FactoryResetProtectionCache:
+    """
+    Short-lived, size-bounded LRU cache of FRP lookups by account id or email.
+
+    Each entry holds the rows found for one (store, field, value), including
+    the empty result, so repeated checks of unknown accounts are absorbed
+    too. Any FRP write clears the whole cache in every process through the
+    invalidation bus; `ttl` bounds staleness if an invalidation is lost.
+    """
+
+    def __init__(self, *, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[LookupKey, Tuple[float, Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+        # Se incrementa en cada invalidación; un resultado consultado antes de
+        # una invalidación no se guarda.
+        self.generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: LookupKey) -> Optional[Tuple[Dict[str, Any], ...]]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[1]
+
+    def set(self, key: LookupKey, rows: Tuple[Dict[str, Any], ...], generation: int) -> None:
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, rows)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, _key: Optional[str] = None) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+factory_reset_protection_cache = FactoryResetProtectionCache(
+    ttl=settings.FRP_LOOKUP_CACHE_TTL_SECONDS,
+    max_entries=settings.FRP_LOOKUP_CACHE_MAX_ENTRIES,
+)
+invalidation_bus.subscribe(INVALIDATION_TOPIC, factory_reset_protection_cache.clear)
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.infra.postgres.models.city import City
+from app.infra.postgres.models.country import Country
+from app.infra.postgres.models.region import Region
+from app.services.base import BaseService
+from app.services.cache_invalidation import invalidation_bus
+
+INVALIDATION_TOPIC = "geography"
+
+
+class _Snapshot:
+    """Países, regiones y ciudades cargados en una sola pasada, más el árbol serializado."""
+
+    def __init__(
+        self,
+        countries: List[Dict[str, Any]],
+        regions: List[Dict[str, Any]],
+        cities: List[Dict[str, Any]],
+        expires_at: float,
+    ) -> None:
+        self.countries = {c["country_id"]: c for c in countries}
+        self.regions = {r["region_id"]: r for r in regions}
+        self.cities = {c["city_id"]: c for c in cities}
+        self.expires_at = expires_at
+
+        cities_by_region: Dict[Any, List[Dict[str, Any]]] = {}
+        for city in cities:
+            cities_by_region.setdefault(city["region_id"], []).append(
+                {"city_id": city["city_id"], "name": city["name"]}
+            )
+        regions_by_country: Dict[Any, List[Dict[str, Any]]] = {}
+        for region in regions:
+            regions_by_country.setdefault(region["country_id"], []).append(
+                {
+                    "region_id": region["region_id"],
+                    "name": region["name"],
+                    "cities": cities_by_region.get(region["region_id"], []),
+                }
+            )
+        tree = [
+            {**country, "regions": regions_by_country.get(country["country_id"], [])}
+            for country in countries
+        ]
+        # El árbol se serializa una vez por carga; el ETag es el hash del cuerpo
+        self.tree_body = json.dumps(tree, default=str, separators=(",", ":")).encode("utf-8")
+        self.etag = '"%s"' % hashlib.sha1(self.tree_body).hexdigest()
+
+
+def _filter_by_name(rows: List[Dict[str, Any]], name: Optional[str]) -> List[Dict[str, Any]]:
+    if not name:
+        return rows
+    name = name.lower()
+    return [row for row in rows if name in row["name"].lower()]
+
+
+class GeographyCache:
+    """
+    Lazily loaded, in-process cache of the country -> region -> city hierarchy.
+
+    The first lookup loads the three tables (three queries, rows as plain
+    dicts) and builds the serialized tree and its ETag. Writes that go
+    through the country, region and city services invalidate it in every
+    process through the invalidation bus; the next lookup reloads. `ttl`
+    bounds staleness if an invalidation is lost.
+    """
+
+    def __init__(self, *, ttl: float) -> None:
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # Se incrementa en cada invalidación; una carga iniciada antes de una
+        # invalidación no se guarda.
+        self.generation = 0
+        self._hits = 0
+        self._loads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Se crea de forma diferida para quedar ligado al event loop en ejecución
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _fresh(self) -> Optional[_Snapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.expires_at > time.monotonic():
+            return snapshot
+        return None
+
+    async def _load(self) -> _Snapshot:
+        generation = self.generation
+        countries = await Country.all().order_by("name").values("country_id", "name", "code")
+        regions = await Region.all().order_by("name").values("region_id", "name", "country_id")
+        cities = await City.all().order_by("name").values("city_id", "name", "region_id")
+        self._loads += 1
+        snapshot = _Snapshot(countries, regions, cities, time.monotonic() + self.ttl)
+        if self.enabled and generation == self.generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    async def snapshot(self) -> _Snapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self._hits += 1
+            return snapshot
+        if not self.enabled:
+            return await self._load()
+        # Una sola carga aunque lleguen varias peticiones con la caché vacía
+        async with self._get_lock():
+            snapshot = self._fresh()
+            if snapshot is not None:
+                self._hits += 1
+                return snapshot
+            return await self._load()
+
+    async def countries(self, *, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        snapshot = await self.snapshot()
+        return _filter_by_name(list(snapshot.countries.values()), name)
+
+    async def regions(
+        self, *, country_id: Any = None, name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        snapshot = await self.snapshot()
+        rows = [
+            r for r in snapshot.regions.values()
+            if country_id is None or r["country_id"] == country_id
+        ]
+        return _filter_by_name(rows, name)
+
+    async def cities(
+        self, *, region_id: Any = None, name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        snapshot = await self.snapshot()
+        rows = [
+            c for c in snapshot.cities.values()
+            if region_id is None or c["region_id"] == region_id
+        ]
+        return _filter_by_name(rows, name)
+
+    async def get_country(self, country_id: Any) -> Optional[Dict[str, Any]]:
+        return (await self.snapshot()).countries.get(country_id)
+
+    async def get_region(self, region_id: Any) -> Optional[Dict[str, Any]]:
+        return (await self.snapshot()).regions.get(region_id)
+
+    async def get_city(self, city_id: Any) -> Optional[Dict[str, Any]]:
+        return (await self.snapshot()).cities.get(city_id)
+
+    async def tree(self) -> Tuple[bytes, str]:
+        """
+        Return the serialized country -> region -> city tree and its ETag.
+        """
+        snapshot = await self.snapshot()
+        return snapshot.tree_body, snapshot.etag
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "countries": len(snapshot.countries) if snapshot else 0,
+            "regions": len(snapshot.regions) if snapshot else 0,
+            "cities": len(snapshot.cities) if snapshot else 0,
+            "hits": self._hits,
+            "loads": self._loads,
+        }
+
+
+geography_cache = GeographyCache(ttl=settings.GEOGRAPHY_CACHE_TTL_SECONDS)
+invalidation_bus.subscribe(INVALIDATION_TOPIC, lambda _key: geography_cache.invalidate())
+
+
+class GeographyService(BaseService):
+    """
+    BaseService for country, region and city: writes invalidate the geography
+    cache in every process through the invalidation bus.
+    """
+
+    async def create(self, *, obj_in: Any) -> Any:
+        try:
+            return await super().create(obj_in=obj_in)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
+
+    async def update(self, *, id: Any, obj_in: Any) -> Any:
+        try:
+            return await super().update(id=id, obj_in=obj_in)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
+
+    async def delete(self, *, id: Any) -> bool:
+        try:
+            return await super().delete(id=id)
+        finally:
+            await invalidation_bus.publish(INVALIDATION_TOPIC)
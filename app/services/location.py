@@ -1,14 +1,29 @@
-from typing import Optional
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 
+from pydantic import ValidationError
+from tortoise import timezone as tortoise_timezone
+
+from app.core.config import settings
 from app.infra.postgres.crud.location import (
     city_crud,
     country_crud,
     location_crud,
     region_crud,
 )
-from app.infra.postgres.models.location import Location
+from app.infra.postgres.models.location import DeviceLastLocation
+from app.schemas.location import (
+    LocationBulkItem,
+    LocationBulkItemResult,
+    LocationBulkResponse,
+)
 from app.services.base import BaseService
 
+logger = logging.getLogger(__name__)
+
 
 class CountryService(BaseService):
     pass
@@ -23,9 +38,109 @@ class CityService(BaseService):
 
 
 class LocationService(BaseService):
-    async def get_last_by_device_id(self, device_id: int) -> Optional[Location]:
+    async def get_history(
+        self,
+        *,
+        device_id: Optional[uuid.UUID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[dict]:
+        payload = {"device_id": device_id} if device_id else {}
+        return await self.crud.get_all(
+            payload, skip=skip, limit=limit, since=since, until=until
+        )
+
+    async def maintain_partitions(self) -> Dict[str, Any]:
+        """
+        Create the upcoming monthly partitions of location and drop the ones
+        outside the retention window.
+        """
+        created = await self.crud.ensure_partitions(
+            months_ahead=settings.LOCATION_PARTITION_MONTHS_AHEAD
+        )
+        dropped: List[str] = []
+        if settings.LOCATION_RETENTION_MONTHS > 0:
+            dropped = await self.crud.drop_expired_partitions(
+                retention_months=settings.LOCATION_RETENTION_MONTHS
+            )
+        if created or dropped:
+            logger.info(
+                f"Particiones de location: {created} creadas, eliminadas: {dropped}"
+            )
+        return {"created": created, "dropped": dropped}
+
+    async def run_partition_maintenance(self) -> None:
+        """
+        Run maintain_partitions now and then every
+        LOCATION_PARTITION_MAINTENANCE_INTERVAL_SECONDS (0 = only once).
+        """
+        while True:
+            try:
+                await self.maintain_partitions()
+            except Exception as e:
+                logger.warning(f"No se pudo mantener las particiones de location: {e}")
+            if settings.LOCATION_PARTITION_MAINTENANCE_INTERVAL_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.LOCATION_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+    async def get_last_by_device_id(self, device_id: uuid.UUID) -> Optional[DeviceLastLocation]:
         return await self.crud.get_last_by_device_id(device_id)
 
+    async def get_last_by_device_ids(
+        self, device_ids: List[uuid.UUID]
+    ) -> List[DeviceLastLocation]:
+        return await self.crud.get_last_by_device_ids(device_ids)
+
+    async def bulk_create(self, *, items: List[Any]) -> LocationBulkResponse:
+        """
+        Validate and insert a batch of location pings in one statement.
+
+        Each element of `items` is a raw dict (or an already parsed error
+        string for undecodable NDJSON lines); the result keeps the input order
+        and reports a status per item.
+        """
+        results: List[LocationBulkItemResult] = []
+        rows = []
+        pending: Dict[uuid.UUID, LocationBulkItemResult] = {}
+        received_at = tortoise_timezone.now()
+
+        for index, raw in enumerate(items):
+            if isinstance(raw, str):
+                results.append(LocationBulkItemResult(index=index, status="error", detail=raw))
+                continue
+            try:
+                item = LocationBulkItem.parse_obj(raw)
+            except ValidationError as e:
+                detail = "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                )
+                results.append(LocationBulkItemResult(index=index, status="error", detail=detail))
+                continue
+
+            created_at = item.created_at or received_at
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            location_id = uuid.uuid4()
+            rows.append((location_id, item.device_id, item.latitude, item.longitude, created_at))
+            result = LocationBulkItemResult(index=index, status="created", location_id=location_id)
+            pending[location_id] = result
+            results.append(result)
+
+        inserted = await self.crud.bulk_create(rows=rows)
+        for location_id, result in pending.items():
+            if location_id not in inserted:
+                result.status = "error"
+                result.location_id = None
+                result.detail = "Device not found"
+
+        created = len(inserted)
+        return LocationBulkResponse(
+            created=created, failed=len(results) - created, items=results
+        )
+
 
 country_service = CountryService(crud=country_crud)
 region_service = RegionService(crud=region_crud)
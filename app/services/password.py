@@ -0,0 +1,132 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Contexto a nivel de módulo para que las funciones sean serializables en un
+# ProcessPoolExecutor (cada proceso crea su propio contexto al importar).
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordService:
+    """
+    Hashes and verifies passwords with bcrypt on a bounded worker pool.
+
+    bcrypt takes 100-300 ms per call; running it inside an async handler
+    blocks the event loop for every other request. Calls are sent to a
+    thread or process pool and an asyncio semaphore caps how many run at
+    once, so bursts queue up instead of saturating the pool. Queue depth and
+    timing counters are exposed through stats().
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        max_concurrency: int = 4,
+        executor_type: str = "thread",
+    ) -> None:
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unsupported executor type: {executor_type}")
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.executor_type = executor_type
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._max_waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Se crea de forma diferida para quedar ligado al event loop en ejecución
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        started_at = time.perf_counter()
+        self._wait_seconds += started_at - queued_at
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._running -= 1
+            self._run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_verify_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the pool state: queue depth, in-flight calls and timings.
+        """
+        finished = self._completed + self._failed
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "in_flight": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": (self._wait_seconds / finished * 1000) if finished else 0.0,
+            "avg_run_ms": (self._run_seconds / finished * 1000) if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._semaphore = None
+
+
+password_service = PasswordService(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+)
@@ -1,9 +1,19 @@
+from typing import Any, Dict, Optional
+
 from app.infra.postgres.crud.region import crud_region
-from app.services.base import BaseService
+from app.services.geography_cache import GeographyService, geography_cache
+
 
+class RegionService(GeographyService):
+    async def get_all(self, *, skip: int = 0, limit: int = 100, payload: Optional[Dict[str, Any]] = None, **kwargs):
+        """Regiones desde la caché de geografía, filtradas por país y/o nombre"""
+        payload = payload or {}
+        return await geography_cache.regions(
+            country_id=payload.get("country_id"), name=payload.get("name__icontains")
+        )
 
-class RegionService(BaseService):
-    pass
+    async def get(self, id: Any) -> Optional[Dict[str, Any]]:
+        return await geography_cache.get_region(id)
 
 
 region_service = RegionService(crud=crud_region)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 from fastapi import HTTPException, status
@@ -31,6 +31,18 @@ class SimService:
     async def get_all(self, *, skip: int = 0, limit: int = 100) -> List[Sim]:
         return await crud_sim.get_all(skip=skip, limit=limit)
 
+    async def get_page(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Sim], Optional[str]]:
+        try:
+            return await crud_sim.get_page(cursor=cursor, limit=limit, payload=payload)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     async def create(self, *, obj_in: SimCreate) -> Sim:
         try:
             return await crud_sim.create(obj_in=obj_in)
@@ -1,8 +1,8 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from app.infra.postgres.crud.store import crud_store
-from app.infra.postgres.models.user import User
+from app.infra.postgres.crud.user import crud_user
 from app.schemas.store import StoreDB, StoreCreate, StoreUpdate
 from app.services.base import BaseService
 
@@ -20,6 +20,15 @@ class StoreService(BaseService):
         """
         return await self.crud.get_all_with_country(skip=skip, limit=limit, payload=payload)
 
+    async def get_page_with_country(
+        self, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[StoreDB], Optional[str]]:
+        """
+        Cursor page of stores with country information, plus the next cursor.
+        """
+        stores, next_cursor = await self.get_page(cursor=cursor, limit=limit)
+        return [StoreDB.from_orm(store) for store in stores], next_cursor
+
     async def create(self, *, obj_in: StoreCreate, admin_id: Optional[UUID] = None) -> StoreDB:
         """Crea una nueva tienda y carga sus relaciones.
         
@@ -87,8 +96,7 @@ class StoreService(BaseService):
             bool: True if the store was deleted, False otherwise
         """
         # First, disassociate all users from this store
-        # Using store_id=None directly instead of store=None
-        await User.filter(store_id=id).update(store_id=None)
+        await crud_user.detach_store(store_id=id)
         
         # Then delete the store
         return await super().delete(id=id)
@@ -5,9 +5,27 @@ from tortoise.expressions import Q
 from app.infra.postgres.crud.user import crud_user
 from app.infra.postgres.models.user import User
 from app.services.base import BaseService
+from app.services.credential_cache import publish_invalidation
 
 
 class UserService(BaseService):
+    async def create(self, *, obj_in: Any) -> User:
+        user = await super().create(obj_in=obj_in)
+        # Descarta resultados negativos cacheados para el nuevo username
+        await publish_invalidation(username=user.username)
+        return user
+
+    async def update(self, *, id: Any, obj_in: Any) -> Optional[User]:
+        user = await super().update(id=id, obj_in=obj_in)
+        # Contraseña, estado o username pueden haber cambiado
+        await publish_invalidation(user_id=id, username=user.username if user else None)
+        return user
+
+    async def delete(self, *, id: Any) -> bool:
+        deleted = await super().delete(id=id)
+        await publish_invalidation(user_id=id)
+        return deleted
+
     async def get_by_dni(self, *, dni: str) -> Optional[User]:
         return await self.crud.get_by_dni(dni=dni)
 
@@ -0,0 +1,7 @@
+-- +goose NO TRANSACTION
+-- +goose Up
+-- Historial y última ubicación por dispositivo (device_id, created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_location_device_id_created_at ON "location"(device_id, created_at DESC);
+
+-- +goose Down
+DROP INDEX CONCURRENTLY IF EXISTS idx_location_device_id_created_at;
@@ -0,0 +1,18 @@
+-- +goose Up
+-- Última ubicación conocida por dispositivo, mantenida al insertar en location
+CREATE TABLE IF NOT EXISTS "device_last_location" (
+    "device_id" UUID NOT NULL PRIMARY KEY REFERENCES "device" ("device_id") ON DELETE CASCADE,
+    "location_id" UUID NOT NULL,
+    "latitude" DOUBLE PRECISION NOT NULL,
+    "longitude" DOUBLE PRECISION NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL
+);
+
+INSERT INTO "device_last_location" ("device_id", "location_id", "latitude", "longitude", "created_at")
+SELECT DISTINCT ON ("device_id") "device_id", "location_id", "latitude", "longitude", "created_at"
+FROM "location"
+ORDER BY "device_id", "created_at" DESC
+ON CONFLICT ("device_id") DO NOTHING;
+
+-- +goose Down
+DROP TABLE IF EXISTS "device_last_location";
@@ -0,0 +1,112 @@
+-- +goose Up
+-- Particionado mensual de location por created_at.
+-- location_ensure_partitions crea las particiones desde p_from hasta
+-- p_months_ahead meses después del mes actual; location_drop_partitions elimina
+-- las particiones anteriores a la ventana de retención. Ambas las ejecuta la
+-- aplicación al arrancar y scripts/maintain_location_partitions.py.
+-- La copia de datos reescribe la tabla completa: aplicar en ventana de mantenimiento.
+
+-- +goose StatementBegin
+CREATE OR REPLACE FUNCTION location_ensure_partitions(p_from DATE, p_months_ahead INT)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    -- Evita que varios workers creen la misma partición a la vez
+    PERFORM pg_advisory_xact_lock(hashtext('location_partitions'));
+    WHILE month_start <= last_month LOOP
+        partition_name := 'location_p' || to_char(month_start, 'YYYYMM');
+        month_end := (month_start + INTERVAL '1 month')::date;
+        IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+            -- Las filas del mes que hayan caído en la partición por defecto se
+            -- mueven antes de adjuntar la nueva partición
+            EXECUTE format('CREATE TABLE %I (LIKE "location" INCLUDING DEFAULTS)', partition_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM "location_default" WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE "location" ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+-- +goose StatementEnd
+
+-- +goose StatementBegin
+CREATE OR REPLACE FUNCTION location_drop_partitions(p_retention_months INT)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => p_retention_months))::date;
+    partition_name TEXT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('location_partitions'));
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = '"location"'::regclass
+          AND c.relname ~ '^location_p[0-9]{6}$'
+        ORDER BY c.relname
+    LOOP
+        -- Solo particiones cuyo mes completo es anterior al corte
+        IF to_date(substr(partition_name, 11), 'YYYYMM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+    DELETE FROM "location_default" WHERE created_at < cutoff;
+    RETURN;
+END;
+$$;
+-- +goose StatementEnd
+
+ALTER TABLE "location" RENAME TO "location_unpartitioned";
+
+CREATE TABLE "location" (LIKE "location_unpartitioned" INCLUDING DEFAULTS)
+    PARTITION BY RANGE ("created_at");
+CREATE TABLE "location_default" PARTITION OF "location" DEFAULT;
+
+SELECT location_ensure_partitions(
+    COALESCE((SELECT MIN("created_at") FROM "location_unpartitioned")::date, CURRENT_DATE),
+    3
+);
+
+INSERT INTO "location" SELECT * FROM "location_unpartitioned";
+DROP TABLE "location_unpartitioned";
+
+-- La clave primaria de una tabla particionada debe incluir la clave de partición
+ALTER TABLE "location" ADD PRIMARY KEY ("location_id", "created_at");
+ALTER TABLE "location" ADD CONSTRAINT "location_device_id_fkey"
+    FOREIGN KEY ("device_id") REFERENCES "device" ("device_id") ON DELETE CASCADE;
+CREATE INDEX IF NOT EXISTS idx_location_device_id_created_at ON "location"("device_id", "created_at" DESC);
+CREATE INDEX IF NOT EXISTS idx_location_location_id ON "location"("location_id");
+
+-- +goose Down
+ALTER TABLE "location" RENAME TO "location_partitioned";
+
+CREATE TABLE "location" (LIKE "location_partitioned" INCLUDING DEFAULTS);
+INSERT INTO "location" SELECT * FROM "location_partitioned";
+DROP TABLE "location_partitioned";
+
+ALTER TABLE "location" ADD PRIMARY KEY ("location_id");
+ALTER TABLE "location" ADD CONSTRAINT "location_device_id_fkey"
+    FOREIGN KEY ("device_id") REFERENCES "device" ("device_id") ON DELETE CASCADE;
+CREATE INDEX IF NOT EXISTS idx_location_device_id_created_at ON "location"("device_id", "created_at" DESC);
+
+DROP FUNCTION IF EXISTS location_drop_partitions(INT);
+DROP FUNCTION IF EXISTS location_ensure_partitions(DATE, INT);
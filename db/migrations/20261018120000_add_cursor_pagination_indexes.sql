@@ -0,0 +1,17 @@
+-- +goose NO TRANSACTION
+-- +goose Up
+-- Orden estable (created_at, pk) de la paginación por cursor de los listados
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_created_at_user_id ON "user"(created_at, user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_device_created_at_device_id ON "device"(created_at, device_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sim_created_at_sim_id ON "sim"(created_at, sim_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_action_created_at_action_id ON "action"(created_at, action_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_store_created_at_id ON "store"(created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payment_date_payment_id ON "payment"(date, payment_id);
+
+-- +goose Down
+DROP INDEX CONCURRENTLY IF EXISTS idx_payment_date_payment_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_store_created_at_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_action_created_at_action_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_sim_created_at_sim_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_device_created_at_device_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_created_at_user_id;
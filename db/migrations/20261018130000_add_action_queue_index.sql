@@ -0,0 +1,15 @@
+-- +goose NO TRANSACTION
+-- +goose Up
+-- Cola de acciones: solo las pendientes o reclamadas, en orden de llegada por
+-- dispositivo (claim_pending y la deduplicación de la creación masiva)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_action_queue
+    ON "action"(device_id, created_at, action_id)
+    WHERE state IN ('pending', 'claimed');
+-- Reclamo sin dispositivo: las más antiguas de toda la cola
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_action_queue_created_at
+    ON "action"(created_at, action_id)
+    WHERE state IN ('pending', 'claimed');
+
+-- +goose Down
+DROP INDEX CONCURRENTLY IF EXISTS idx_action_queue_created_at;
+DROP INDEX CONCURRENTLY IF EXISTS idx_action_queue;
@@ -0,0 +1,26 @@
+-- +goose Up
+-- Resumen de pagos aprobados por plan, mantenido por CRUDPayment en la misma
+-- transacción que escribe en payment
+ALTER TABLE "plan"
+    ADD COLUMN IF NOT EXISTS "paid_amount" DECIMAL(12,2) NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS "approved_payments" INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS "last_payment_at" TIMESTAMPTZ;
+
+UPDATE "plan" p
+SET "paid_amount" = s.paid_amount,
+    "approved_payments" = s.approved_payments,
+    "last_payment_at" = s.last_payment_at
+FROM (
+    SELECT "plan_id", SUM("value") AS paid_amount, COUNT(*) AS approved_payments,
+           MAX("date") AS last_payment_at
+    FROM "payment"
+    WHERE "state" = 'Approved'
+    GROUP BY "plan_id"
+) s
+WHERE p."plan_id" = s."plan_id";
+
+-- +goose Down
+ALTER TABLE "plan"
+    DROP COLUMN IF EXISTS "last_payment_at",
+    DROP COLUMN IF EXISTS "approved_payments",
+    DROP COLUMN IF EXISTS "paid_amount";
@@ -0,0 +1,30 @@
+-- +goose Up
+-- Métricas diarias por tienda de los días cerrados, para /analytics. Los
+-- registros sin tienda se agrupan bajo el UUID nulo (00000000-...).
+CREATE TABLE IF NOT EXISTS "daily_store_metrics" (
+    "day" DATE NOT NULL,
+    "store_id" UUID NOT NULL,
+    "customers" INT NOT NULL DEFAULT 0,
+    "vendors" INT NOT NULL DEFAULT 0,
+    "devices" INT NOT NULL DEFAULT 0,
+    "payments" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "payments_approved" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "payments_pending" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "payments_rejected" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "payments_failed" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "payments_returned" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY ("day", "store_id")
+);
+CREATE INDEX IF NOT EXISTS idx_daily_store_metrics_store_day ON "daily_store_metrics"("store_id", "day");
+
+-- Último día consolidado en daily_store_metrics (NULL = aún no se ha llenado)
+CREATE TABLE IF NOT EXISTS "daily_store_metrics_state" (
+    "id" SMALLINT NOT NULL PRIMARY KEY DEFAULT 1 CHECK ("id" = 1),
+    "sealed_through" DATE,
+    "updated_at" TIMESTAMPTZ
+);
+INSERT INTO "daily_store_metrics_state" ("id") VALUES (1) ON CONFLICT DO NOTHING;
+
+-- +goose Down
+DROP TABLE IF EXISTS "daily_store_metrics_state";
+DROP TABLE IF EXISTS "daily_store_metrics";
@@ -0,0 +1,18 @@
+-- +goose NO TRANSACTION
+-- +goose Up
+-- Índices para resolver en SQL el filtro por tienda de pagos, planes y dispositivos
+-- (usuario o vendedor del plan/enrolamiento pertenece a la tienda)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_store_id ON "user"(store_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_plan_user_id ON "plan"(user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_plan_vendor_id ON "plan"(vendor_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payment_plan_id ON "payment"(plan_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_enrolment_user_id ON "enrolment"(user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_enrolment_vendor_id ON "enrolment"(vendor_id);
+
+-- +goose Down
+DROP INDEX CONCURRENTLY IF EXISTS idx_enrolment_vendor_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_enrolment_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_payment_plan_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_plan_vendor_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_plan_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_store_id;
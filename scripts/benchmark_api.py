@@ -0,0 +1,498 @@
+#!/usr/bin/env python
+"""
+Benchmark de las rutas más usadas de la API contra un dataset sintético.
+
+Siembra tiendas, vendedores, clientes con su dispositivo y plan, pagos y
+ubicaciones en la base de POSTGRES_DATABASE_URL (con las migraciones ya
+aplicadas) y ejecuta la app en el mismo proceso a través de un cliente ASGI,
+sin servidor HTTP de por medio. Para cada escenario reporta latencia
+p50/p95/p99, peticiones por segundo y sentencias SQL por petición (de la
+cabecera Server-Timing), y lo compara con una línea base guardada.
+
+Escenarios: analytics por rango de fechas, listado de pagos, listado de
+planes, login (/auth/verify) sin caché de credenciales (cada petición paga
+bcrypt) y con ella ya caliente, e ingesta de ubicaciones (/locations/bulk).
+
+Usar una base de datos dedicada: los datos sembrados se marcan con el
+prefijo "bench_" y --reset los elimina.
+
+Uso:
+
+    python scripts/benchmark_api.py --seed --customers 2000 --stores 5
+    python scripts/benchmark_api.py --requests 200 --concurrency 10
+    python scripts/benchmark_api.py --requests 200 --save-baseline
+    python scripts/benchmark_api.py --reset
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+# Añadir el directorio raíz del proyecto al path de Python
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+from tortoise import Tortoise  # noqa: E402
+from tortoise.transactions import in_transaction  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import PRIMARY, init_db  # noqa: E402
+from app.infra.postgres.crud.daily_store_metrics import (  # noqa: E402
+    crud_daily_store_metrics,
+    date_batches,
+)
+from app.infra.postgres.crud.location import location_crud  # noqa: E402
+from app.infra.postgres.crud.plan import crud_plan  # noqa: E402
+from app.infra.postgres.models import (  # noqa: E402
+    City,
+    Country,
+    Device,
+    Enrolment,
+    Payment,
+    Plan,
+    Role,
+    Store,
+    User,
+)
+from app.infra.postgres.models.payment import PaymentState  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.analytics import analytics_service  # noqa: E402
+from app.services.credential_cache import credential_cache  # noqa: E402
+from app.services.password import pwd_context  # noqa: E402
+
+PREFIX = "bench_"
+PASSWORD = "benchmark-password"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_api_baseline.json")
+BATCH_SIZE = 1000
+
+PAYMENT_STATES = [PaymentState.APPROVED] * 7 + [
+    PaymentState.PENDING,
+    PaymentState.REJECTED,
+    PaymentState.FAILED,
+]
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+BENCH_USERS_SQL = f"SELECT \"user_id\" FROM \"user\" WHERE \"username\" LIKE '{PREFIX}%'"
+BENCH_ENROLMENTS_SQL = (
+    f'SELECT e."enrolment_id" FROM "enrolment" e WHERE e."user_id" IN ({BENCH_USERS_SQL})'
+)
+
+# Borra el dataset sembrado respetando las claves foráneas
+RESET_SQL = [
+    f'DELETE FROM "payment" WHERE "plan_id" IN (SELECT "plan_id" FROM "plan" WHERE "user_id" IN ({BENCH_USERS_SQL}))',
+    f'DELETE FROM "plan" WHERE "user_id" IN ({BENCH_USERS_SQL})',
+    f'DELETE FROM "location" WHERE "device_id" IN (SELECT "device_id" FROM "device" WHERE "enrolment_id" IN ({BENCH_ENROLMENTS_SQL}))',
+    f'DELETE FROM "device" WHERE "enrolment_id" IN ({BENCH_ENROLMENTS_SQL})',
+    f'DELETE FROM "enrolment" WHERE "user_id" IN ({BENCH_USERS_SQL})',
+    f"DELETE FROM \"store\" WHERE \"nombre\" LIKE '{PREFIX}%'",
+    f"DELETE FROM \"user\" WHERE \"username\" LIKE '{PREFIX}%'",
+]
+
+
+def _moment(rng: random.Random, days: int) -> datetime:
+    """Instante aleatorio de los últimos `days` días."""
+    return datetime.now(timezone.utc) - timedelta(seconds=rng.uniform(0, days * 86400))
+
+
+async def _bulk_create(model, objects) -> None:
+    for start in range(0, len(objects), BATCH_SIZE):
+        await model.bulk_create(objects[start:start + BATCH_SIZE])
+
+
+async def _rebuild_rollup(start_date: date) -> None:
+    """Recalcula los días ya consolidados afectados por la siembra o el borrado."""
+    sealed_through = await crud_daily_store_metrics.get_sealed_through()
+    if sealed_through is not None and start_date <= sealed_through:
+        for batch_start, batch_end in date_batches(
+            start_date, sealed_through, settings.ANALYTICS_ROLLUP_BATCH_DAYS
+        ):
+            async with in_transaction(connection_name=PRIMARY):
+                await crud_daily_store_metrics.lock_state()
+                await crud_daily_store_metrics.rollup_days(start_date=batch_start, end_date=batch_end)
+    await analytics_service.refresh_rollup()
+
+
+async def reset() -> None:
+    first_day = await crud_daily_store_metrics.get_first_day()
+    async with in_transaction(connection_name=PRIMARY) as connection:
+        for sql in RESET_SQL:
+            await connection.execute_query(sql)
+    if first_day is not None:
+        await _rebuild_rollup(first_day)
+    print("Dataset de benchmark eliminado")
+
+
+async def seed(args) -> None:
+    if await User.filter(username__startswith=PREFIX).exists():
+        print("Ya existe un dataset de benchmark; usa --reset para sembrarlo de nuevo")
+        return
+    customer_role = await Role.get_or_none(name="Cliente")
+    vendor_role = await Role.get_or_none(name="Vendedor")
+    city = await City.first()
+    country = await Country.first()
+    if not (customer_role and vendor_role and city and country):
+        sys.exit("Faltan roles, países o ciudades: ejecuta antes scripts/seed_all.py")
+
+    rng = random.Random(args.random_seed)
+    started = time.perf_counter()
+    hashed = pwd_context.hash(PASSWORD)
+
+    stores = [
+        Store(id=uuid.uuid4(), nombre=f"{PREFIX}store_{i}", country_id=country.pk, plan="bench")
+        for i in range(args.stores)
+    ]
+    await _bulk_create(Store, stores)
+
+    def new_user(role: Role, kind: str, i: int) -> User:
+        return User(
+            user_id=uuid.uuid4(),
+            city_id=city.pk,
+            store_id=stores[i % len(stores)].id,
+            dni=f"{900000000 + i}",
+            first_name=kind.capitalize(),
+            last_name=f"Bench {i}",
+            email=f"{PREFIX}{kind}_{i}@example.com",
+            prefix="+57",
+            phone=f"300{i:07d}",
+            address="Calle 1 # 2-3",
+            username=f"{PREFIX}{kind}_{i}",
+            password=hashed,
+            role_id=role.pk,
+            created_at=_moment(rng, args.days),
+        )
+
+    vendors = [new_user(vendor_role, "vendor", i) for i in range(args.vendors)]
+    customers = [new_user(customer_role, "customer", i) for i in range(args.customers)]
+    await _bulk_create(User, vendors + customers)
+
+    enrolments, devices, plans, payments = [], [], [], []
+    for i, customer in enumerate(customers):
+        vendor = vendors[i % len(vendors)]
+        enrolment = Enrolment(enrolment_id=uuid.uuid4(), user_id=customer.user_id, vendor_id=vendor.user_id)
+        device = Device(
+            device_id=uuid.uuid4(),
+            enrolment_id=enrolment.enrolment_id,
+            name=f"Bench {i}",
+            imei=f"9{i:014d}",
+            imei_two=f"8{i:014d}",
+            serial_number=f"SN{i:010d}",
+            model="Bench",
+            brand="Bench",
+            product_name="Bench",
+            created_at=max(customer.created_at, _moment(rng, args.days)),
+        )
+        value = Decimal(rng.choice([600, 900, 1200, 1800]))
+        quotas = rng.choice([3, 6, 12])
+        plan = Plan(
+            plan_id=uuid.uuid4(),
+            user_id=customer.user_id,
+            vendor_id=vendor.user_id,
+            device_id=device.device_id,
+            initial_date=device.created_at.date(),
+            quotas=quotas,
+            period=30,
+            value=value,
+            contract=f"{PREFIX}contract_{i}",
+        )
+        for number in range(args.payments_per_plan):
+            payments.append(
+                Payment(
+                    payment_id=uuid.uuid4(),
+                    device_id=device.device_id,
+                    plan_id=plan.plan_id,
+                    value=(value / quotas).quantize(Decimal("0.01")),
+                    method="cash",
+                    state=rng.choice(PAYMENT_STATES),
+                    date=max(device.created_at, _moment(rng, args.days)),
+                    reference=f"{PREFIX}{i}_{number}",
+                )
+            )
+        enrolments.append(enrolment)
+        devices.append(device)
+        plans.append(plan)
+    await _bulk_create(Enrolment, enrolments)
+    await _bulk_create(Device, devices)
+    await _bulk_create(Plan, plans)
+    await _bulk_create(Payment, payments)
+    await crud_plan.reconcile_payment_summaries()
+
+    locations = [
+        (uuid.uuid4(), device.device_id, rng.uniform(4.5, 4.8), rng.uniform(-74.2, -74.0), _moment(rng, args.days))
+        for device in devices
+        for _ in range(args.locations_per_device)
+    ]
+    for start in range(0, len(locations), BATCH_SIZE):
+        await location_crud.bulk_create(rows=locations[start:start + BATCH_SIZE])
+
+    await _rebuild_rollup(date.today() - timedelta(days=args.days))
+    print(
+        f"Sembrado en {time.perf_counter() - started:.1f} s: {len(stores)} tiendas, "
+        f"{len(vendors)} vendedores, {len(customers)} clientes/dispositivos/planes, "
+        f"{len(payments)} pagos, {len(locations)} ubicaciones"
+    )
+
+
+async def load_dataset() -> dict:
+    """Identificadores del dataset sembrado que usan los escenarios."""
+    stores = await Store.filter(nombre__startswith=PREFIX).values_list("id", flat=True)
+    vendors = await User.filter(username__startswith=f"{PREFIX}vendor_").order_by(
+        "username"
+    ).values_list("username", flat=True)
+    customers = await User.filter(username__startswith=f"{PREFIX}customer_").order_by(
+        "username"
+    ).values_list("username", flat=True)
+    devices = await Device.filter(
+        enrolment__user__username__startswith=PREFIX
+    ).values_list("device_id", flat=True)
+    if not (stores and vendors and devices):
+        sys.exit("No hay dataset de benchmark: ejecuta antes con --seed")
+    return {
+        "stores": [str(store_id) for store_id in stores],
+        "vendors": list(vendors),
+        "devices": [str(device_id) for device_id in devices],
+        "customer_usernames": list(customers),
+        "customers": len(customers),
+        "payments": await Payment.filter(reference__startswith=PREFIX).count(),
+    }
+
+
+def build_scenarios(args, dataset: dict) -> dict:
+    """
+    Cada escenario devuelve los argumentos de la petición i-ésima:
+    (método, ruta, cuerpo JSON).
+    """
+    today = date.today()
+    stores, vendors, devices = dataset["stores"], dataset["vendors"], dataset["devices"]
+    customers = dataset["customer_usernames"]
+
+    def analytics(i, rng):
+        start = (today - timedelta(days=args.days)).isoformat()
+        store = f"&store_id={stores[i % len(stores)]}" if i % 2 else ""
+        return "GET", f"/api/v1/analytics/date-range?start_date={start}{store}", None
+
+    def payments_list(i, rng):
+        return "GET", f"/api/v1/payments?limit=50&store_id={stores[i % len(stores)]}&cursor=", None
+
+    def plans_list(i, rng):
+        return "GET", f"/api/v1/plans?limit=50&store_id={stores[i % len(stores)]}", None
+
+    def auth_verify_cold(i, rng):
+        # Un cliente distinto en cada petición y sin entrada en la caché:
+        # mide bcrypt, como el primer login de cada usuario
+        username = customers[i % len(customers)]
+        credential_cache.invalidate(username=username)
+        return "POST", "/api/v1/auth/verify", {"username": username, "password": PASSWORD}
+
+    def auth_verify_warm(i, rng):
+        # El calentamiento verifica antes a todos los vendedores (ver
+        # warmup_requests): solo se miden aciertos de la caché
+        return "POST", "/api/v1/auth/verify", {"username": vendors[i % len(vendors)], "password": PASSWORD}
+
+    def location_ingest(i, rng):
+        return "POST", "/api/v1/locations/bulk", [
+            {
+                "device_id": rng.choice(devices),
+                "latitude": rng.uniform(4.5, 4.8),
+                "longitude": rng.uniform(-74.2, -74.0),
+            }
+            for _ in range(args.location_batch)
+        ]
+
+    return {
+        "analytics": analytics,
+        "payments_list": payments_list,
+        "plans_list": plans_list,
+        "auth_verify_cold": auth_verify_cold,
+        "auth_verify_warm": auth_verify_warm,
+        "location_ingest": location_ingest,
+    }
+
+
+def warmup_requests(name: str, args, dataset: dict) -> int:
+    """Peticiones sin medir antes de un escenario."""
+    if name == "auth_verify_warm":
+        # Una por vendedor como mínimo, para no medir fallos de la caché
+        return max(args.warmup, len(dataset["vendors"]))
+    return args.warmup
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, build, args, warmup: int) -> dict:
+    rng = random.Random(args.random_seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, queries = [], []
+    errors = 0
+
+    async def one(i: int, record: bool) -> None:
+        nonlocal errors
+        method, path, body = build(i, rng)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            elapsed = time.perf_counter() - started
+        if not record:
+            return
+        if response.status_code >= 400:
+            errors += 1
+        latencies.append(elapsed)
+        match = QUERIES_RE.search(response.headers.get("server-timing", ""))
+        if match:
+            queries.append(int(match.group(1)))
+
+    await asyncio.gather(*(one(i, False) for i in range(warmup)))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(warmup + i, True) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Escenarios cuyo p95 supera al de la línea base en más de `tolerance`
+    (fracción) o que ejecutan más sentencias por petición.
+    """
+    regressions = []
+    print(f"\n{'escenario':<16} {'p95 base':>10} {'p95':>10} {'Δ p95':>8} {'q/pet base':>11} {'q/pet':>7}")
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<16} {'-':>10} {result['p95_ms']:>10.2f} {'nuevo':>8}")
+            continue
+        change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        print(
+            f"{name:<16} {base['p95_ms']:>10.2f} {result['p95_ms']:>10.2f} {change:>+8.0%} "
+            f"{base['queries_per_request'] or 0:>11.2f} {result['queries_per_request'] or 0:>7.2f}"
+        )
+        if change > tolerance:
+            regressions.append(f"{name}: p95 {base['p95_ms']} ms -> {result['p95_ms']} ms")
+        if (result["queries_per_request"] or 0) > (base["queries_per_request"] or 0) + 0.5:
+            regressions.append(
+                f"{name}: {base['queries_per_request']} -> {result['queries_per_request']} sentencias por petición"
+            )
+    return regressions
+
+
+async def main(args) -> int:
+    if settings.POSTGRES_DATABASE_URL.startswith("sqlite"):
+        sys.exit("El benchmark necesita PostgreSQL (SQL nativo de analytics y ubicaciones)")
+    await init_db()
+    try:
+        if args.reset:
+            await reset()
+            return 0
+        if args.seed:
+            await seed(args)
+
+        dataset = await load_dataset()
+        scenarios = build_scenarios(args, dataset)
+        selected = args.scenarios or list(scenarios)
+        print(
+            f"requests={args.requests} concurrency={args.concurrency} warmup={args.warmup} "
+            f"customers={dataset['customers']} payments={dataset['payments']}"
+        )
+        print(
+            f"{'escenario':<16} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+            f"{'pet/s':>8} {'q/pet':>6} {'errores':>8}"
+        )
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name in selected:
+                result = results[name] = await run_scenario(
+                    client, scenarios[name], args, warmup_requests(name, args, dataset)
+                )
+                print(
+                    f"{name:<16} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                    f"{result['p99_ms']:>9.2f} {result['throughput_rps']:>8.1f} "
+                    f"{result['queries_per_request'] or 0:>6.1f} {result['errors']:>8}"
+                )
+
+        if args.save_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(
+                    {
+                        "dataset": {
+                            "customers": dataset["customers"],
+                            "payments": dataset["payments"],
+                            "stores": len(dataset["stores"]),
+                        },
+                        "settings": {
+                            "requests": args.requests,
+                            "concurrency": args.concurrency,
+                            "location_batch": args.location_batch,
+                        },
+                        "scenarios": results,
+                    },
+                    f,
+                    indent=2,
+                )
+                f.write("\n")
+            print(f"\nLínea base guardada en {args.baseline}")
+            return 0
+
+        if not os.path.exists(args.baseline):
+            print(f"\nSin línea base en {args.baseline}; usa --save-baseline para crearla")
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegresiones:\n" + "\n".join(f"- {regression}" for regression in regressions))
+            return 1
+        print("\nSin regresiones respecto a la línea base")
+        return 0
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true", help="Sembrar el dataset antes de medir")
+    parser.add_argument("--reset", action="store_true", help="Eliminar el dataset sembrado y salir")
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--vendors", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--payments-per-plan", type=int, default=6)
+    parser.add_argument("--locations-per-device", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90, help="Antigüedad máxima de los datos sembrados")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por escenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--location-batch", type=int, default=50, help="Ubicaciones por petición de ingesta")
+    parser.add_argument("--scenarios", nargs="+", choices=[
+        "analytics", "payments_list", "plans_list", "auth_verify_cold", "auth_verify_warm",
+        "location_ingest",
+    ])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Aumento de p95 admitido respecto a la línea base (0.2 = 20%%)",
+    )
+    parser.add_argument("--random-seed", type=int, default=42)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Benchmark de verificación de contraseñas (login) bajo concurrencia.
+
+Compara la verificación bcrypt ejecutada directamente en el event loop (como
+hacían los handlers antes) contra PasswordService, que la envía a un pool de
+workers acotado. Para cada modo reporta verificaciones por segundo y el
+retraso máximo del event loop, que es lo que perciben las demás peticiones
+del worker durante una ráfaga de logins.
+
+Uso:
+
+    python scripts/benchmark_password_hashing.py --requests 64 --concurrency 16 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al path de Python
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault("POSTGRES_DATABASE_URL", "sqlite://:memory:")
+
+from app.services.password import PasswordService, pwd_context  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+async def _monitor_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Mide el mayor retraso observado al despertar cada `interval` segundos."""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def _run(verify, hashed: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            assert await verify(PASSWORD, hashed)
+
+    stop = asyncio.Event()
+    monitor = asyncio.ensure_future(_monitor_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await monitor
+    return requests / elapsed, elapsed, max_lag
+
+
+async def main(args):
+    hashed = pwd_context.hash(PASSWORD)
+
+    async def inline_verify(password, hashed_password):
+        return pwd_context.verify(password, hashed_password)
+
+    service = PasswordService(
+        workers=args.workers,
+        max_concurrency=args.workers,
+        executor_type=args.executor,
+    )
+
+    print(
+        f"requests={args.requests} concurrency={args.concurrency} "
+        f"workers={args.workers} executor={args.executor}"
+    )
+    print(f"{'modo':<10} {'verif/s':>10} {'total (s)':>10} {'lag máx (ms)':>14}")
+    for name, verify in (("inline", inline_verify), ("pool", service.verify)):
+        throughput, elapsed, max_lag = await _run(
+            verify, hashed, args.requests, args.concurrency
+        )
+        print(f"{name:<10} {throughput:>10.1f} {elapsed:>10.2f} {max_lag * 1000:>14.1f}")
+
+    print(f"\nEstadísticas del pool: {service.stats()}")
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""
+Mantenimiento de las particiones mensuales de la tabla location.
+
+Crea las particiones de los próximos LOCATION_PARTITION_MONTHS_AHEAD meses y
+elimina las anteriores a LOCATION_RETENTION_MONTHS. La aplicación ya lo hace
+al arrancar y periódicamente; este script permite ejecutarlo desde cron.
+
+Uso:
+
+    python scripts/maintain_location_partitions.py
+"""
+import asyncio
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al path de Python
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tortoise import Tortoise  # noqa: E402
+
+from app.core.database import init_db  # noqa: E402
+from app.services.location import location_service  # noqa: E402
+
+
+async def main():
+    await init_db()
+    try:
+        result = await location_service.maintain_partitions()
+        print(f"Particiones creadas: {result['created']}")
+        print(f"Particiones eliminadas: {', '.join(result['dropped']) or 'ninguna'}")
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
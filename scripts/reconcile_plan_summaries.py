@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Reconstrucción del resumen de pagos de los planes.
+
+Recalcula paid_amount, approved_payments y last_payment_at de todos los planes
+a partir de la tabla payment, por lotes y en orden de plan_id. CRUDPayment ya
+los mantiene al escribir pagos; este script corrige las desviaciones que dejen
+las escrituras hechas fuera de la aplicación (SQL manual, restauraciones).
+
+Uso:
+
+    python scripts/reconcile_plan_summaries.py [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Añadir el directorio raíz del proyecto al path de Python
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tortoise import Tortoise  # noqa: E402
+
+from app.core.database import init_db  # noqa: E402
+from app.infra.postgres.crud.plan import crud_plan  # noqa: E402
+
+
+async def main(batch_size: int):
+    await init_db()
+    try:
+        result = await crud_plan.reconcile_payment_summaries(batch_size=batch_size)
+        print(f"Planes revisados: {result['checked']}")
+        print(f"Planes corregidos: {result['corrected']}")
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Planes por transacción")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,213 @@
+"""
+Integration tests against PostgreSQL.
+
+They need a database with the schema of db/migrations applied:
+
+    TEST_POSTGRES_DATABASE_URL=postgres://postgres@localhost:5432/smartpay_test pytest
+
+The read-replica tests also need TEST_POSTGRES_REPLICA_DATABASE_URL, a
+second database with the same schema. The rows each test creates are
+copied to it, as replication would. Without TEST_POSTGRES_DATABASE_URL
+every test is skipped.
+"""
+import os
+import uuid
+from datetime import date
+from decimal import Decimal
+
+# Settings se lee al importar la app
+TEST_DATABASE_URL = os.environ.get("TEST_POSTGRES_DATABASE_URL")
+TEST_REPLICA_DATABASE_URL = os.environ.get("TEST_POSTGRES_REPLICA_DATABASE_URL")
+os.environ["POSTGRES_DATABASE_URL"] = TEST_DATABASE_URL or "postgres://localhost/unused"
+os.environ.pop("POSTGRES_REPLICA_DATABASE_URL", None)
+for name, value in (
+    ("WEP_APP_TITLE", "smartpay-db"),
+    ("WEB_APP_VERSION", "test"),
+    ("WEP_APP_DESCRIPTION", "Database service for SmartPay"),
+    ("ENVIRONMENT", "test"),
+    ("DEFAULT_DATA", "False"),
+):
+    os.environ.setdefault(name, value)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from tortoise import Tortoise, connections  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import REPLICA, init_db, read_router  # noqa: E402
+from app.infra.postgres.models import (  # noqa: E402
+    City,
+    Country,
+    Device,
+    Enrolment,
+    Payment,
+    Plan,
+    Region,
+    Role,
+    Store,
+    User,
+)
+
+
+DATABASE_FIXTURES = {"db", "replica_db"}
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="TEST_POSTGRES_DATABASE_URL is not set")
+    for item in items:
+        if DATABASE_FIXTURES.intersection(getattr(item, "fixturenames", ())):
+            item.add_marker(skip)
+
+
+class Dataset:
+    """
+    Rows created by a test, deleted in reverse order when it finishes. With
+    a replica configured, each row is also written to it.
+    """
+
+    def __init__(self) -> None:
+        self._rows = []
+
+    async def add(self, model_class, /, **fields):
+        obj = await model_class.create(**fields)
+        if REPLICA in connections.db_config:
+            await model_class.create(
+                using_db=connections.get(REPLICA), **fields, **{model_class._meta.pk_attr: obj.pk}
+            )
+        self._rows.append((model_class, obj.pk))
+        return obj
+
+    def track(self, model, pk) -> None:
+        """Delete at the end a row created by the code under test."""
+        self._rows.append((model, pk))
+
+    async def role(self, name: str) -> Role:
+        role = await Role.get_or_none(name=name)
+        if role is not None:
+            return role
+        return await self.add(Role, name=name, description=name)
+
+    async def user(self, *, role: Role, store: Store = None, city: City = None, **fields) -> User:
+        suffix = uuid.uuid4().hex[:12]
+        if city is None:
+            city = await self.city()
+        return await self.add(
+            User,
+            city=city,
+            store=store,
+            dni=suffix,
+            first_name="Test",
+            last_name=suffix,
+            email=f"{suffix}@example.com",
+            prefix="+57",
+            phone="3000000000",
+            address="Calle 1",
+            username=f"test_{suffix}",
+            password="x",
+            role=role,
+            **fields,
+        )
+
+    async def city(self) -> City:
+        suffix = uuid.uuid4().hex[:8]
+        region = await self.add(Region, country=await self.country(), name=f"Region {suffix}")
+        return await self.add(City, region=region, name=f"City {suffix}")
+
+    async def country(self) -> Country:
+        return await self.add(Country, code="TST", name=f"Country {uuid.uuid4().hex[:8]}")
+
+    async def store(self) -> Store:
+        return await self.add(
+            Store, nombre=f"Store {uuid.uuid4().hex[:8]}", country=await self.country(), plan="test"
+        )
+
+    async def device(self, *, customer: User, vendor: User) -> Device:
+        enrolment = await self.add(Enrolment, user=customer, vendor=vendor)
+        imei = str(uuid.uuid4().int)[:15]
+        return await self.add(
+            Device,
+            enrolment=enrolment,
+            name="Test",
+            imei=imei,
+            imei_two=imei[::-1],
+            serial_number=imei[:10],
+            model="Test",
+            brand="Test",
+            product_name="Test",
+        )
+
+    async def plan(
+        self,
+        *,
+        value: Decimal = Decimal("900.00"),
+        quotas: int = 3,
+        period: int = 30,
+        initial_date: date = None,
+        store: Store = None,
+    ) -> Plan:
+        """A plan with its own customer, vendor and device."""
+        city = await self.city()
+        customer = await self.user(role=await self.role("Cliente"), store=store, city=city)
+        vendor = await self.user(role=await self.role("Vendedor"), store=store, city=city)
+        device = await self.device(customer=customer, vendor=vendor)
+        return await self.add(
+            Plan,
+            user=customer,
+            vendor=vendor,
+            device=device,
+            initial_date=initial_date or date.today(),
+            quotas=quotas,
+            period=period,
+            value=value,
+            contract=f"test-{uuid.uuid4().hex[:8]}",
+        )
+
+    async def cleanup(self) -> None:
+        plan_ids = [pk for model, pk in self._rows if model is Plan]
+        databases = [connections.get(name) for name in connections.db_config]
+        for db in databases:
+            await Payment.filter(plan_id__in=plan_ids).using_db(db).delete()
+        for model, pk in reversed(self._rows):
+            for db in databases:
+                await model.filter(**{model._meta.pk_attr: pk}).using_db(db).delete()
+
+
+@pytest.fixture
+async def db():
+    """Tortoise initialised like the app, on the test database only."""
+    read_router.healthy = False
+    await init_db()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def replica_db(monkeypatch):
+    """Tortoise with the test replica registered and serving reads."""
+    if not TEST_REPLICA_DATABASE_URL:
+        pytest.skip("TEST_POSTGRES_REPLICA_DATABASE_URL is not set")
+    monkeypatch.setattr(settings, "POSTGRES_REPLICA_DATABASE_URL", TEST_REPLICA_DATABASE_URL)
+    read_router.healthy = False
+    await init_db()
+    assert read_router.healthy
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def dataset():
+    # Pedirla después de db o replica_db: se limpia antes de cerrar las conexiones
+    data = Dataset()
+    yield data
+    await data.cleanup()
+
+
+@pytest.fixture
+async def client():
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client
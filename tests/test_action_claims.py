@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
+from app.infra.postgres.crud.action import crud_action
+from app.infra.postgres.models import Action
+
+
+async def _queue_actions(dataset, count: int):
+    plan = await dataset.plan()
+    admin = await dataset.user(role=await dataset.role("Vendedor"))
+    action_ids = [uuid.uuid4() for _ in range(count)]
+    rows = await crud_action.bulk_create(
+        action_ids=action_ids,
+        device_ids=[plan.device_id] * count,
+        applied_by_id=admin.user_id,
+        action="locate",
+        description="test",
+        skip_if_pending=False,
+    )
+    assert len(rows) == count
+    for action_id in action_ids:
+        dataset.track(Action, action_id)
+    return plan.device_id, action_ids
+
+
+async def test_concurrent_claims_get_disjoint_actions(db, dataset):
+    device_id, action_ids = await _queue_actions(dataset, 12)
+
+    claims = await asyncio.gather(
+        *(crud_action.claim_pending(device_ids=[device_id], limit=5) for _ in range(4))
+    )
+
+    claimed = [action.action_id for claim in claims for action in claim]
+    assert len(claimed) == len(set(claimed))
+    assert set(claimed) == set(action_ids)
+    assert all(len(claim) <= 5 for claim in claims)
+    assert await Action.filter(action_id__in=action_ids, state="claimed").count() == 12
+
+
+async def test_claim_skips_rows_locked_by_another_claimer(db, dataset):
+    device_id, action_ids = await _queue_actions(dataset, 4)
+    locked, release = asyncio.Event(), asyncio.Event()
+
+    async def hold_lock():
+        # Otro despachador con las dos primeras acciones bloqueadas a mitad de su reclamación
+        async with in_transaction(connection_name=PRIMARY) as connection:
+            await connection.execute_query(
+                'SELECT 1 FROM "action" WHERE "action_id" = ANY($1::uuid[]) FOR UPDATE',
+                [action_ids[:2]],
+            )
+            locked.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold_lock())
+    try:
+        await locked.wait()
+        claimed = await asyncio.wait_for(
+            crud_action.claim_pending(device_ids=[device_id], limit=10), timeout=5
+        )
+    finally:
+        release.set()
+        await holder
+
+    assert {action.action_id for action in claimed} == set(action_ids[2:])
+
+
+async def test_stale_claims_are_claimed_again(db, dataset):
+    device_id, action_ids = await _queue_actions(dataset, 2)
+    assert len(await crud_action.claim_pending(device_ids=[device_id], claim_timeout=300)) == 2
+    assert await crud_action.claim_pending(device_ids=[device_id], claim_timeout=300) == []
+
+    # Despachador caído: la reclamación de la primera caducó
+    await connections.get(PRIMARY).execute_query(
+        'UPDATE "action" SET "updated_at" = $1 WHERE "action_id" = $2',
+        [datetime.now(timezone.utc) - timedelta(minutes=10), action_ids[0]],
+    )
+    reclaimed = await crud_action.claim_pending(device_ids=[device_id], claim_timeout=300)
+    assert [action.action_id for action in reclaimed] == [action_ids[0]]
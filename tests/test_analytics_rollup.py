@@ -0,0 +1,98 @@
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from tortoise.transactions import in_transaction
+
+from app.core.database import PRIMARY
+from app.infra.postgres.crud.daily_store_metrics import crud_daily_store_metrics
+from app.infra.postgres.models import Device, Payment, Plan, User
+from app.services.analytics import analytics_service
+
+
+async def _seal_day(dataset, plan: Plan) -> datetime:
+    """
+    Date the plan's customer, device and an approved payment on a day that
+    is already sealed, and store that day's rollup.
+    """
+    await analytics_service.refresh_rollup()
+    sealed_through = await crud_daily_store_metrics.get_sealed_through()
+    moment = datetime.combine(sealed_through - timedelta(days=2), time(12), tzinfo=timezone.utc)
+    await User.filter(user_id=plan.user_id).update(created_at=moment)
+    await Device.filter(device_id=plan.device_id).update(created_at=moment)
+    await dataset.add(
+        Payment,
+        plan=plan,
+        device_id=plan.device_id,
+        value=Decimal("300.00"),
+        method="cash",
+        state="Approved",
+        date=moment,
+        reference="test",
+    )
+    async with in_transaction(connection_name=PRIMARY):
+        await crud_daily_store_metrics.rollup_days(start_date=moment.date(), end_date=moment.date())
+    return moment
+
+
+async def _metrics(moment: datetime, store) -> dict:
+    daily = await crud_daily_store_metrics.get_daily(
+        start_date=moment.date(), end_date=moment.date(), store_id=store.pk
+    )
+    row = daily.get(moment.date())
+    if row is None:
+        return {"customers": 0, "devices": 0, "payments": 0}
+    return {"customers": row["customers"], "devices": row["devices"], "payments": row["payments"]}
+
+
+async def test_moving_a_customer_refreshes_sealed_days(db, dataset, client):
+    store, other_store = await dataset.store(), await dataset.store()
+    plan = await dataset.plan(store=store)
+    moment = await _seal_day(dataset, plan)
+    assert await _metrics(moment, store) == {"customers": 1, "devices": 1, "payments": Decimal("300.00")}
+
+    response = await client.patch(
+        f"/api/v1/users/{plan.user_id}", json={"store_id": str(other_store.pk)}
+    )
+    assert response.status_code == 200, response.text
+
+    assert await _metrics(moment, store) == {"customers": 0, "devices": 0, "payments": 0}
+    assert await _metrics(moment, other_store) == {
+        "customers": 1, "devices": 1, "payments": Decimal("300.00"),
+    }
+
+
+async def test_reassigning_a_plan_refreshes_sealed_days(db, dataset, client):
+    store, other_store = await dataset.store(), await dataset.store()
+    plan = await dataset.plan(store=store)
+    moment = await _seal_day(dataset, plan)
+    other_customer = await dataset.user(role=await dataset.role("Cliente"), store=other_store)
+
+    response = await client.patch(
+        f"/api/v1/plans/{plan.plan_id}", json={"user_id": str(other_customer.user_id)}
+    )
+    assert response.status_code == 200, response.text
+
+    assert (await _metrics(moment, store))["payments"] == 0
+    assert (await _metrics(moment, other_store))["payments"] == Decimal("300.00")
+
+
+async def test_deleting_a_device_refreshes_sealed_days(db, dataset, client):
+    store = await dataset.store()
+    plan = await dataset.plan(store=store)
+    moment = await _seal_day(dataset, plan)
+
+    response = await client.delete(f"/api/v1/devices/{plan.device_id}")
+    assert response.status_code == 204, response.text
+
+    assert await _metrics(moment, store) == {"customers": 1, "devices": 0, "payments": 0}
+
+
+async def test_deleting_a_customer_refreshes_sealed_days(db, dataset, client):
+    store = await dataset.store()
+    plan = await dataset.plan(store=store)
+    moment = await _seal_day(dataset, plan)
+
+    response = await client.delete(f"/api/v1/users/{plan.user_id}")
+    assert response.status_code == 204, response.text
+
+    assert await _metrics(moment, store) == {"customers": 0, "devices": 0, "payments": 0}
@@ -0,0 +1,60 @@
+import json
+
+from app.schemas.user import UserUpdate
+from app.services.cache_invalidation import invalidation_bus
+from app.services.credential_cache import INVALID, INVALIDATION_TOPIC, credential_cache
+from app.services.user import user_service
+
+PASSWORD = "secret"
+
+
+class RecordingBackend:
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def publish(self, message: str) -> None:
+        self.messages.append(json.loads(message))
+
+
+def _remote_invalidation(key):
+    # Mensaje recibido de otro proceso por el canal del bus
+    invalidation_bus._on_message(
+        json.dumps({"origin": "other-process", "topic": INVALIDATION_TOPIC, "key": key})
+    )
+
+
+def test_invalidation_from_another_process_drops_entries():
+    credential_cache.clear()
+    credential_cache.set_valid("alice", PASSWORD, {"user_id": "1", "username": "alice"})
+    credential_cache.set_valid("bob", PASSWORD, {"user_id": "2", "username": "bob"})
+    credential_cache.set_unknown_user("carol")
+
+    _remote_invalidation("user_id:1")
+    assert credential_cache.get("alice", PASSWORD) is None
+    assert credential_cache.get("bob", PASSWORD) is not None
+
+    _remote_invalidation("username:carol")
+    assert credential_cache.get("carol", PASSWORD) is None
+
+    _remote_invalidation(None)
+    assert credential_cache.get("bob", PASSWORD) is None
+
+
+def test_wrong_password_is_cached_per_password():
+    credential_cache.clear()
+    credential_cache.set_invalid("alice", "guess-1")
+    assert credential_cache.get("alice", "guess-1") is INVALID
+    assert credential_cache.get("alice", "guess-2") is None
+
+
+async def test_user_update_publishes_invalidation(db, dataset, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(invalidation_bus, "backend", backend)
+    user = await dataset.user(role=await dataset.role("Cliente"))
+    credential_cache.set_valid(user.username, PASSWORD, {"user_id": str(user.user_id)})
+
+    await user_service.update(id=user.user_id, obj_in=UserUpdate(state="Inactive"))
+
+    assert credential_cache.get(user.username, PASSWORD) is None
+    keys = {message["key"] for message in backend.messages if message["topic"] == INVALIDATION_TOPIC}
+    assert keys == {f"username:{user.username}", f"user_id:{user.user_id}"}
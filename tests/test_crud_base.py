@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.infra.postgres.crud.base import encode_cursor
+from app.infra.postgres.crud.payment import crud_payment
+from app.infra.postgres.crud.user import crud_user
+from app.infra.postgres.models import Payment, User
+
+
+async def test_update_returning_writes_one_row(db, dataset):
+    store = await dataset.store()
+    user = await dataset.user(role=await dataset.role("Cliente"))
+
+    updated = await crud_user._update_returning(
+        id=user.user_id, values={"first_name": "Changed", "store": store, "not_a_column": 1}
+    )
+
+    assert updated.first_name == "Changed"
+    assert updated.store_id == store.pk
+    # auto_now se actualiza como con save()
+    assert updated.updated_at > user.updated_at
+    stored = await User.get(user_id=user.user_id)
+    assert (stored.first_name, stored.store_id, stored.updated_at) == (
+        "Changed", store.pk, updated.updated_at,
+    )
+
+
+async def test_update_returning_missing_row(db, dataset):
+    user = await dataset.user(role=await dataset.role("Cliente"))
+    await User.filter(user_id=user.user_id).delete()
+    assert await crud_user._update_returning(id=user.user_id, values={"first_name": "x"}) is None
+
+
+async def test_keyset_pages_are_stable(db, dataset):
+    plan = await dataset.plan()
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    # Dos pagos con la misma fecha: el desempate es por payment_id
+    moments = [start, start, start + timedelta(hours=1), start + timedelta(hours=2), start + timedelta(hours=3)]
+    for moment in moments:
+        await dataset.add(
+            Payment,
+            plan=plan,
+            device_id=plan.device_id,
+            value=Decimal("10.00"),
+            method="cash",
+            state="Approved",
+            date=moment,
+            reference="test",
+        )
+    payload = {"plan_id": plan.plan_id}
+
+    seen, cursor = [], ""
+    while True:
+        page, cursor = await crud_payment.get_page(cursor=cursor, limit=2, payload=payload)
+        seen += page
+        if len(seen) == 2:
+            # Un pago anterior a la posición del cursor no desplaza las páginas siguientes
+            await dataset.add(
+                Payment,
+                plan=plan,
+                device_id=plan.device_id,
+                value=Decimal("10.00"),
+                method="cash",
+                state="Approved",
+                date=start - timedelta(hours=1),
+                reference="test",
+            )
+        if cursor is None:
+            break
+
+    assert len(seen) == len(moments)
+    assert len({payment.payment_id for payment in seen}) == len(moments)
+    keys = [(payment.date, payment.payment_id) for payment in seen]
+    assert keys == sorted(keys)
+
+
+async def test_invalid_cursors(db, client):
+    for cursor in ("not-a-cursor", encode_cursor(["x"]), encode_cursor(["not-a-date", "x"])):
+        with pytest.raises(ValueError):
+            await crud_payment.get_page(cursor=cursor)
+    response = await client.get("/api/v1/payments?cursor=not-a-cursor")
+    assert response.status_code == 400
@@ -0,0 +1,15 @@
+from app.core.config import settings
+from app.core.database import connection_config
+
+
+def test_postgres_url_gets_pool_and_timeout_settings():
+    config = connection_config("postgres://user:secret@db:5432/smartpay")
+    assert config["engine"] == "app.core.database"
+    credentials = config["credentials"]
+    assert credentials["maxsize"] == settings.POSTGRES_POOL_MAX_SIZE
+    assert credentials["statement_cache_size"] == settings.POSTGRES_STATEMENT_CACHE_SIZE
+    assert credentials["server_settings"]["statement_timeout"] == str(settings.POSTGRES_STATEMENT_TIMEOUT_MS)
+
+
+def test_other_urls_pass_through_unchanged():
+    assert connection_config("sqlite://:memory:") == "sqlite://:memory:"
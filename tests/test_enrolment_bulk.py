@@ -0,0 +1,59 @@
+import uuid
+from datetime import date
+
+from app.infra.postgres.models import Device, Enrolment, Plan
+
+
+def _item(customer, vendor, *, imei: str = None, **plan) -> dict:
+    imei = imei or str(uuid.uuid4().int)[:15]
+    return {
+        "user_id": str(customer.user_id),
+        "vendor_id": str(vendor.user_id),
+        "device": {
+            "name": "Bulk",
+            "imei": imei,
+            "imei_two": imei[::-1][:15],
+            "serial_number": imei[:10],
+            "model": "Test",
+            "brand": "Test",
+            "product_name": "Test",
+        },
+        "plan": {
+            "initial_date": date.today().isoformat(),
+            "value": "600.00",
+            "quotas": 2,
+            "contract": "bulk",
+            **plan,
+        },
+    }
+
+
+async def test_out_of_range_items_fail_alone(db, dataset, client):
+    customer = await dataset.user(role=await dataset.role("Cliente"))
+    vendor = await dataset.user(role=await dataset.role("Vendedor"))
+
+    response = await client.post(
+        "/api/v1/enrolments/bulk",
+        json=[
+            _item(customer, vendor),
+            _item(customer, vendor, imei="1" * 20),
+            _item(customer, vendor, contract="x" * 81),
+            _item(customer, vendor, quotas=40000),
+            _item(customer, vendor, value="123456789.00"),
+        ],
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    created, *invalid = body["items"]
+    assert created["status"] == "created", created
+    dataset.track(Enrolment, created["enrolment_id"])
+    dataset.track(Device, created["device_id"])
+    dataset.track(Plan, created["plan_id"])
+    assert [item["status"] for item in invalid] == ["error"] * 4
+    assert "device.imei" in invalid[0]["detail"]
+    assert "plan.contract" in invalid[1]["detail"]
+    assert "plan.quotas" in invalid[2]["detail"]
+    assert "plan.value" in invalid[3]["detail"]
+    assert (body["created"], body["failed"]) == (1, 4)
+    assert await Device.filter(device_id=created["device_id"]).exists()
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timezone
+
+from tortoise import connections
+
+from app.core.database import PRIMARY
+from app.infra.postgres.crud.location import location_crud
+from app.infra.postgres.models import Location
+
+PARTITIONS_SQL = """
+SELECT c.relname AS name
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = '"location"'::regclass
+"""
+
+
+def _month(months_from_now: int) -> date:
+    today = date.today()
+    index = today.year * 12 + today.month - 1 + months_from_now
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def _partitions() -> set:
+    rows = await connections.get(PRIMARY).execute_query_dict(PARTITIONS_SQL)
+    return {row["name"] for row in rows}
+
+
+async def _partition_of(location_id) -> str:
+    rows = await connections.get(PRIMARY).execute_query_dict(
+        'SELECT tableoid::regclass::text AS name FROM "location" WHERE "location_id" = $1',
+        [location_id],
+    )
+    return rows[0]["name"]
+
+
+async def test_ensure_partitions_moves_rows_out_of_the_default_partition(db, dataset):
+    plan = await dataset.plan()
+    month = _month(18)
+    name = f"location_p{month:%Y%m}"
+    db_client = connections.get(PRIMARY)
+    before = await _partitions()
+    await db_client.execute_query(f'DROP TABLE IF EXISTS "{name}"')
+    location = await Location.create(device_id=plan.device_id, latitude=4.6, longitude=-74.1)
+    try:
+        await Location.filter(location_id=location.location_id).update(
+            created_at=datetime(month.year, month.month, 15, tzinfo=timezone.utc)
+        )
+        assert await _partition_of(location.location_id) == "location_default"
+
+        assert await location_crud.ensure_partitions(months_ahead=18) >= 1
+        assert await _partition_of(location.location_id) == name
+        # Idempotente
+        assert await location_crud.ensure_partitions(months_ahead=18) == 0
+    finally:
+        await Location.filter(location_id=location.location_id).delete()
+        for created in await _partitions() - before:
+            await db_client.execute_query(f'DROP TABLE "{created}"')
+
+
+async def test_drop_expired_partitions(db):
+    db_client = connections.get(PRIMARY)
+    old_month = _month(-30)
+    before = await _partitions()
+    await db_client.execute_query(
+        "SELECT location_ensure_partitions($1, 0)", [old_month]
+    )
+    try:
+        created = await _partitions() - before
+        assert f"location_p{old_month:%Y%m}" in created
+
+        dropped = await location_crud.drop_expired_partitions(retention_months=24)
+
+        assert f"location_p{old_month:%Y%m}" in dropped
+        assert all(name < f"location_p{_month(-24):%Y%m}" for name in dropped)
+        assert f"location_p{_month(-24):%Y%m}" not in dropped
+        assert not set(dropped) & (await _partitions())
+    finally:
+        for name in await _partitions() - before:
+            await db_client.execute_query(f'DROP TABLE "{name}"')
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.infra.postgres.crud.plan import crud_plan
+from app.infra.postgres.models import Payment, Plan
+
+
+def _payment_body(plan: Plan, value: str, state: str = "Approved") -> dict:
+    return {
+        "device_id": str(plan.device_id),
+        "plan_id": str(plan.plan_id),
+        "value": value,
+        "method": "cash",
+        "state": state,
+        "date": datetime.now(timezone.utc).isoformat(),
+        "reference": "test",
+    }
+
+
+async def test_concurrent_payments_keep_the_summary(db, dataset, client):
+    plan = await dataset.plan(value=Decimal("900.00"), quotas=3)
+
+    responses = await asyncio.gather(
+        *(client.post("/api/v1/payments", json=_payment_body(plan, "100.00")) for _ in range(6)),
+        client.post("/api/v1/payments", json=_payment_body(plan, "50.00", state="Pending")),
+    )
+    for response in responses:
+        assert response.status_code == 201, response.text
+        dataset.track(Payment, response.json()["payment_id"])
+
+    plan = await Plan.get(plan_id=plan.plan_id)
+    assert plan.paid_amount == Decimal("600.00")
+    assert plan.approved_payments == 6
+
+    response = await client.get(f"/api/v1/plans/{plan.plan_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["installments_paid"] == 2
+    assert Decimal(str(response.json()["balance"])) == Decimal("300.00")
+
+
+async def test_state_changes_update_the_summary(db, dataset, client):
+    plan = await dataset.plan()
+    response = await client.post("/api/v1/payments", json=_payment_body(plan, "300.00", state="Pending"))
+    assert response.status_code == 201, response.text
+    payment_id = response.json()["payment_id"]
+    dataset.track(Payment, payment_id)
+    assert (await Plan.get(plan_id=plan.plan_id)).paid_amount == Decimal("0.00")
+
+    response = await client.patch(f"/api/v1/payments/{payment_id}", json={"state": "Approved"})
+    assert response.status_code == 200, response.text
+    plan = await Plan.get(plan_id=plan.plan_id)
+    assert (plan.paid_amount, plan.approved_payments) == (Decimal("300.00"), 1)
+
+
+async def test_reconcile_fixes_a_drifted_summary(db, dataset, client):
+    plan = await dataset.plan()
+    response = await client.post("/api/v1/payments", json=_payment_body(plan, "300.00"))
+    assert response.status_code == 201, response.text
+    dataset.track(Payment, response.json()["payment_id"])
+
+    # Escritura que se saltó el mantenimiento del resumen
+    await Plan.filter(plan_id=plan.plan_id).update(paid_amount=Decimal("0.00"), approved_payments=0)
+
+    result = await crud_plan.reconcile_payment_summaries(batch_size=2)
+    assert result["corrected"] >= 1
+    plan = await Plan.get(plan_id=plan.plan_id)
+    assert (plan.paid_amount, plan.approved_payments) == (Decimal("300.00"), 1)
+    assert (await crud_plan.reconcile_payment_summaries())["corrected"] == 0
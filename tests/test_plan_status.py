@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.infra.postgres.crud.plan import crud_plan
+from app.infra.postgres.models import Payment
+
+
+async def test_plans_with_zero_installments(db, dataset, client):
+    # 0.01 en 3 cuotas: cada cuota redondea a 0.00
+    store = await dataset.store()
+    plan = await dataset.plan(
+        value=Decimal("0.01"), quotas=3, initial_date=date.today() - timedelta(days=45), store=store
+    )
+
+    rows, _ = await crud_plan.get_overdue(as_of=date.today(), store_id=store.pk)
+    assert [(row["plan_id"], row["installments_paid"]) for row in rows] == [(plan.plan_id, 0)]
+    assert rows[0]["installments_due"] == 2
+
+    response = await client.get(f"/api/v1/plans/{plan.plan_id}/schedule")
+    assert response.status_code == 200, response.text
+    assert [item["status"] for item in response.json()] == ["overdue", "overdue", "upcoming"]
+
+    response = await client.get(f"/api/v1/plans/{plan.plan_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["installments_paid"] == 0
+
+
+async def test_overdue_status_and_pages(db, dataset):
+    store = await dataset.store()
+    initial_date = date.today() - timedelta(days=65)
+    plans = [
+        await dataset.plan(value=Decimal("900.00"), quotas=3, initial_date=initial_date, store=store)
+        for _ in range(3)
+    ]
+    await dataset.add(
+        Payment,
+        plan=plans[0],
+        device_id=plans[0].device_id,
+        value=Decimal("300.00"),
+        method="cash",
+        state="Approved",
+        date=datetime.now(timezone.utc) - timedelta(days=50),
+        reference="test",
+    )
+
+    rows, cursor = await crud_plan.get_overdue(as_of=date.today(), store_id=store.pk, limit=2)
+    assert cursor is not None
+    next_rows, last_cursor = await crud_plan.get_overdue(
+        as_of=date.today(), store_id=store.pk, limit=2, cursor=cursor
+    )
+    assert last_cursor is None
+    by_plan = {row["plan_id"]: row for row in rows + next_rows}
+    assert list(by_plan) == sorted(plan.plan_id for plan in plans)
+
+    paid = by_plan[plans[0].plan_id]
+    assert (paid["installments_due"], paid["installments_paid"], paid["overdue_installments"]) == (3, 1, 2)
+    assert paid["overdue_amount"] == Decimal("600.00")
+    assert paid["first_unpaid_due_date"] == initial_date + timedelta(days=30)
+    assert paid["days_overdue"] == 35
+    assert by_plan[plans[1].plan_id]["days_overdue"] == 65
+
+    rows, _ = await crud_plan.get_overdue(as_of=date.today(), store_id=store.pk, min_days_overdue=40)
+    assert {row["plan_id"] for row in rows} == {plans[1].plan_id, plans[2].plan_id}
+
+    schedule = await crud_plan.get_schedule(plan_id=plans[0].plan_id, as_of=date.today())
+    assert [(item["amount"], item["status"]) for item in schedule] == [
+        (Decimal("300.00"), "paid"), (Decimal("300.00"), "overdue"), (Decimal("300.00"), "overdue"),
+    ]
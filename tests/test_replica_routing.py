@@ -0,0 +1,104 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from tortoise import connections
+
+from app.core.database import PRIMARY, read_db, read_router
+from app.infra.postgres.crud.plan import crud_plan
+from app.infra.postgres.models import Device, Enrolment, Payment, Plan
+from app.services.analytics import analytics_service
+
+
+def _payment_body(plan: Plan, value: str = "300.00") -> dict:
+    return {
+        "device_id": str(plan.device_id),
+        "plan_id": str(plan.plan_id),
+        "value": value,
+        "method": "cash",
+        "state": "Approved",
+        "date": datetime.now(timezone.utc).isoformat(),
+        "reference": "test",
+    }
+
+
+async def test_reads_outside_requests_use_the_replica(replica_db):
+    assert read_db() is read_router.read_db()
+    replica_reads = read_router.replica_reads
+    await crud_plan.filter_query().count()
+    assert read_router.replica_reads == replica_reads + 1
+
+
+async def test_list_endpoint_reads_from_replica(replica_db, dataset, client):
+    replica_reads = read_router.replica_reads
+    response = await client.get("/api/v1/plans?limit=5")
+    assert response.status_code == 200
+    assert read_router.replica_reads > replica_reads
+
+
+async def test_payment_writes_with_replica(replica_db, dataset, client):
+    plan = await dataset.plan()
+
+    response = await client.post("/api/v1/payments", json=_payment_body(plan))
+    assert response.status_code == 201, response.text
+    payment_id = response.json()["payment_id"]
+    dataset.track(Payment, payment_id)
+    # La respuesta se lee después de escribir: debe venir del primario
+    assert Decimal(str(response.json()["plan"]["paid_amount"])) == Decimal("300.00")
+
+    response = await client.patch(f"/api/v1/payments/{payment_id}", json={"value": "450.00"})
+    assert response.status_code == 200, response.text
+    assert (await Plan.get(plan_id=plan.plan_id).using_db(connections.get(PRIMARY))).paid_amount == Decimal("450.00")
+
+    response = await client.delete(f"/api/v1/payments/{payment_id}")
+    assert response.status_code == 204, response.text
+    assert (await Plan.get(plan_id=plan.plan_id).using_db(connections.get(PRIMARY))).paid_amount == Decimal("0.00")
+
+
+async def test_location_and_enrolment_writes_with_replica(replica_db, dataset, client):
+    plan = await dataset.plan()
+
+    response = await client.post(
+        "/api/v1/locations/",
+        json={"device_id": str(plan.device_id), "latitude": 4.6, "longitude": -74.1},
+    )
+    assert response.status_code == 201, response.text
+
+    suffix = str(plan.plan_id.int)[:14]
+    response = await client.post(
+        "/api/v1/enrolments/bulk",
+        json=[
+            {
+                "user_id": str(plan.user_id),
+                "vendor_id": str(plan.vendor_id),
+                "device": {
+                    "name": "Bulk",
+                    "imei": f"7{suffix}",
+                    "imei_two": f"6{suffix}",
+                    "serial_number": suffix,
+                    "model": "Test",
+                    "brand": "Test",
+                    "product_name": "Test",
+                },
+                "plan": {
+                    "initial_date": date.today().isoformat(),
+                    "value": "600.00",
+                    "quotas": 2,
+                    "contract": "bulk",
+                },
+            }
+        ],
+    )
+    assert response.status_code == 200, response.text
+    item = response.json()["items"][0]
+    assert item["status"] == "created", item
+    dataset.track(Enrolment, item["enrolment_id"])
+    dataset.track(Device, item["device_id"])
+    dataset.track(Plan, item["plan_id"])
+
+
+async def test_background_writers_with_replica(replica_db, dataset):
+    await dataset.plan()
+    result = await analytics_service.refresh_rollup()
+    assert "days" in result
+    result = await crud_plan.reconcile_payment_summaries()
+    assert result["checked"] >= 1